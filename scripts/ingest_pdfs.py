@@ -5,13 +5,16 @@ Ingest PDF course files into the database via the API.
 Usage:
     python scripts/ingest_pdfs.py /path/to/pdfs
     python scripts/ingest_pdfs.py ./pdfs --api-url https://your-api-url
+    python scripts/ingest_pdfs.py ./pdfs --concurrency 8
 """
 
 import argparse
+import asyncio
 import re
 import sys
 from pathlib import Path
 
+import aiohttp
 import requests
 
 
@@ -49,48 +52,81 @@ def get_existing_courses(api_url: str) -> set:
     return existing
 
 
-def upload_batch(api_url: str, pdf_files: list, existing: set) -> dict:
+async def upload_batch(
+    session: aiohttp.ClientSession, api_url: str, pdf_files: list, existing: set
+) -> dict:
     """Upload a batch of PDFs, skipping existing ones."""
-    files_to_upload = []
-    for f in pdf_files:
-        if f.name not in existing:
-            files_to_upload.append(f)
+    files_to_upload = [f for f in pdf_files if f.name not in existing]
 
     if not files_to_upload:
         return {"successful": 0, "failed": 0, "skipped": len(pdf_files), "results": []}
 
-    files = []
-    file_handles = []
+    form = aiohttp.FormData()
     for f in files_to_upload:
-        fh = open(f, "rb")
-        file_handles.append(fh)
-        files.append(("files", (f.name, fh, "application/pdf")))
+        content = await asyncio.to_thread(f.read_bytes)
+        form.add_field(
+            "files", content, filename=f.name, content_type="application/pdf"
+        )
 
+    skipped = len(pdf_files) - len(files_to_upload)
     try:
-        response = requests.post(
-            f"{api_url}/api/upload/batch", files=files, timeout=120
+        async with session.post(f"{api_url}/api/upload/batch", data=form) as response:
+            if response.status == 200:
+                result = await response.json()
+                result["skipped"] = skipped
+                return result
+            error = f"HTTP {response.status}"
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        error = str(e) or type(e).__name__
+
+    return {
+        "successful": 0,
+        "failed": len(files_to_upload),
+        "skipped": skipped,
+        "results": [],
+        "error": error,
+    }
+
+
+async def upload_all(
+    api_url: str, batches: list, existing: set, concurrency: int
+) -> tuple:
+    """Upload batches concurrently, at most ``concurrency`` requests in flight."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    totals = {"successful": 0, "failed": 0, "skipped": 0}
+    total_batches = len(batches)
+
+    async def run(batch_num: int, batch: list) -> None:
+        async with semaphore:
+            result = await upload_batch(session, api_url, batch, existing)
+
+        for key in totals:
+            totals[key] += result.get(key, 0)
+
+        print(
+            f"[Batch {batch_num}/{total_batches}] {len(batch)} files: "
+            f"✓{result.get('successful', 0)} ✗{result.get('failed', 0)} ⊘{result.get('skipped', 0)}"
+        )
+        if result.get("error"):
+            print(f"    ✗ batch failed: {result['error']}")
+        for r in result.get("results", []):
+            if not r.get("success"):
+                print(f"    ✗ {r['filename']}: {r.get('error', 'Unknown error')}")
+
+    timeout = aiohttp.ClientTimeout(total=120)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        await asyncio.gather(
+            *(run(num, batch) for num, batch in enumerate(batches, start=1))
         )
-    finally:
-        for fh in file_handles:
-            fh.close()
-
-    if response.status_code == 200:
-        result = response.json()
-        # Add skipped count
-        result["skipped"] = len(pdf_files) - len(files_to_upload)
-        return result
-    else:
-        return {
-            "successful": 0,
-            "failed": len(files_to_upload),
-            "skipped": len(pdf_files) - len(files_to_upload),
-            "results": [],
-            "error": f"HTTP {response.status_code}",
-        }
+
+    return totals["successful"], totals["failed"], totals["skipped"]
 
 
 def ingest_pdfs(
-    pdf_dir: str, api_url: str = "http://localhost:5000", batch_size: int = 10
+    pdf_dir: str,
+    api_url: str = "http://localhost:5000",
+    batch_size: int = 10,
+    concurrency: int = 4,
 ):
     pdf_path = Path(pdf_dir)
 
@@ -116,44 +152,22 @@ def ingest_pdfs(
 
     # Calculate batches
     total_to_upload = sum(1 for f in pdf_files if f.name not in existing)
-    total_batches = (total_to_upload + batch_size - 1) // batch_size
+    batches = [
+        pdf_files[i : i + batch_size] for i in range(0, len(pdf_files), batch_size)
+    ]
 
     print(
-        f"To upload: {total_to_upload} files ({total_batches} batches of {batch_size})\n"
+        f"To upload: {total_to_upload} files ({len(batches)} batches of {batch_size}, "
+        f"{concurrency} in flight)\n"
     )
 
-    successful = 0
-    failed = 0
-    skipped = 0
-
-    batch_num = 0
-    i = 0
-    while i < len(pdf_files):
-        batch = pdf_files[i : i + batch_size]
-        batch_num += 1
-
-        print(
-            f"[Batch {batch_num}/{total_batches}] Processing {len(batch)} files...",
-            end=" ",
-            flush=True,
-        )
-
-        result = upload_batch(api_url, batch, existing)
-
-        successful += result.get("successful", 0)
-        failed += result.get("failed", 0)
-        skipped += result.get("skipped", 0)
-
-        print(
-            f"✓{result.get('successful', 0)} ✗{result.get('failed', 0)} ⊘{result.get('skipped', 0)}"
+    try:
+        successful, failed, skipped = asyncio.run(
+            upload_all(api_url, batches, existing, concurrency)
         )
-
-        # Show failures
-        for r in result.get("results", []):
-            if not r.get("success"):
-                print(f"    ✗ {r['filename']}: {r.get('error', 'Unknown error')}")
-
-        i += batch_size
+    except KeyboardInterrupt:
+        print("\nInterrupted; in-flight uploads were cancelled")
+        sys.exit(130)
 
     print(f"\n{'=' * 50}")
     print(f"Complete: {successful} succeeded, {failed} failed, {skipped} skipped")
@@ -175,9 +189,15 @@ def main():
         default=50,
         help="Number of PDFs per batch (default: 50)",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Maximum batch uploads in flight at once (default: 4)",
+    )
 
     args = parser.parse_args()
-    ingest_pdfs(args.path, args.api_url, args.batch_size)
+    ingest_pdfs(args.path, args.api_url, args.batch_size, args.concurrency)
 
 
 if __name__ == "__main__":
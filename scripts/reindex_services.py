@@ -4,43 +4,345 @@
 from __future__ import annotations
 
 import argparse
+import json
 import os
+import queue
 import sys
+import threading
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from tenacity import (
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from src.core.config import DATABASE_URL
 from src.core.utils import parse_json_fields
-from src.models.database import get_db_connection
+from src.models.database import pooled_connection
 from src.services import get_service
 from src.services.base_rag_service import ensure_chroma_persist_dir
 
 
-def load_courses(limit: Optional[int] = None) -> List[dict]:
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM courses")
-        rows = cursor.fetchall()
-    finally:
-        conn.close()
+# Only the columns the chunk and graph builders read; skips filename/pdf_url etc.
+INDEX_COLUMNS = (
+    "id",
+    "class_id",
+    "title",
+    "instructor",
+    "location",
+    "course_type",
+    "cost",
+    "learning_objectives",
+    "provided_materials",
+    "skills",
+    "description",
+)
+
+
+FETCH_SIZE = 500
+INDEX_BATCH_SIZE = 1000
+INDEXED_IDS_CACHE_DIR = PROJECT_ROOT / ".cache"
+INDEXED_IDS_CACHE_TTL = int(os.environ.get("INDEXED_IDS_CACHE_TTL", "3600"))
+INDEX_WORKERS = int(os.environ.get("INDEX_WORKERS", "4"))
+INDEX_CALLS_PER_MINUTE = float(os.environ.get("INDEX_CALLS_PER_MINUTE", "0"))
+_USE_POSTGRES = bool(DATABASE_URL)
+_PH = "%s" if _USE_POSTGRES else "?"
+
+
+class RateLimiter:
+    """Spaces calls evenly so all workers together stay under a per-minute quota."""
+
+    def __init__(self, calls_per_minute: float = 0):
+        self.interval = 60.0 / calls_per_minute if calls_per_minute > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
 
-    courses = [parse_json_fields(row) for row in rows]
+
+def iter_courses(
+    limit: Optional[int] = None,
+    updated_since: Optional[str] = None,
+    chunk: int = FETCH_SIZE,
+    exclude_ids: Optional[Sequence[int]] = None,
+) -> Iterator[dict]:
+    """Yield parsed courses lazily, fetching ``chunk`` rows at a time.
+
+    ``exclude_ids`` is applied in SQL so skipped rows are never fetched or
+    parsed: Postgres takes it as an array, SQLite as a JSON array via
+    json_each, which avoids the bound-parameter limit of a long IN list.
+    It is a plain sorted snapshot rather than a set; membership is decided
+    by the database, so no Python-side lookup structure is needed.
+    """
+    query = f"SELECT {', '.join(INDEX_COLUMNS)} FROM courses"
+    clauses: List[str] = []
+    params: List[Any] = []
+    if updated_since:
+        clauses.append(f"updated_at > {_PH}")
+        params.append(updated_since)
+    if exclude_ids:
+        if _USE_POSTGRES:
+            clauses.append("NOT (id = ANY(%s))")
+            params.append(list(exclude_ids))
+        else:
+            clauses.append("id NOT IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(list(exclude_ids)))
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY id"
     if limit:
-        courses = courses[:limit]
-    return courses
+        query += f" LIMIT {int(limit)}"
+
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, tuple(params))
+        while True:
+            rows = cursor.fetchmany(chunk)
+            if not rows:
+                break
+            for row in rows:
+                yield parse_json_fields(row)
+
+
+def load_courses(
+    limit: Optional[int] = None, updated_since: Optional[str] = None
+) -> List[dict]:
+    return list(iter_courses(limit, updated_since))
+
+
+def _indexed_ids_cache_path(provider: Optional[str]) -> Path:
+    provider_name = provider or os.environ.get("VECTOR_STORE_PROVIDER", "qdrant")
+    return INDEXED_IDS_CACHE_DIR / f"indexed_ids_{provider_name}.json"
+
 
+def save_indexed_course_ids(provider: Optional[str], course_ids: Set[int]) -> None:
+    cache_path = _indexed_ids_cache_path(provider)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(sorted(course_ids)))
+    os.replace(tmp_path, cache_path)
+
+
+def get_indexed_course_ids(provider: Optional[str], refresh: bool = False) -> Set[int]:
+    """Course ids already in the vector store, cached on disk for the TTL.
+
+    A cache hit skips creating the store client and listing every chunk id.
+    """
+    cache_path = _indexed_ids_cache_path(provider)
+    if not refresh and cache_path.exists():
+        age = time.time() - cache_path.stat().st_mtime
+        if age < INDEXED_IDS_CACHE_TTL:
+            try:
+                return set(json.loads(cache_path.read_text()))
+            except ValueError:
+                pass
 
-def index_vector(courses: List[dict], provider: Optional[str]) -> int:
     service = get_service("vector", provider=provider)
     try:
-        service.index_courses(courses)
+        course_ids = service.indexed_course_ids()
     finally:
         service.close()
-    return len(courses)
+    save_indexed_course_ids(provider, course_ids)
+    return course_ids
+
+
+def iter_batches(courses: Iterable[dict], size: int) -> Iterator[List[dict]]:
+    iterator = iter(courses)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+_PREFETCH_DONE = object()
+
+
+def prefetch(items: Iterable[Any], depth: int = 2) -> Iterator[Any]:
+    """Produce ``items`` on a background thread, ``depth`` ahead of the consumer.
+
+    Lets the next batch be fetched from the database and parsed while the
+    current one is being embedded. Producer exceptions re-raise here. If the
+    consumer stops early, every pending put gives up and ``items`` is closed,
+    so the producer thread and its database cursor are released.
+    """
+    buffer: "queue.Queue[Any]" = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        iterator = iter(items)
+        try:
+            for item in iterator:
+                if not put(item):
+                    return
+            put(_PREFETCH_DONE)
+        except BaseException as exc:  # surfaced to the consumer
+            put(exc)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    worker = threading.Thread(target=produce, name="reindex-prefetch", daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _PREFETCH_DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+QUOTA_ERROR_MARKERS = ("quota", "429", "rate limit", "resource exhausted", "too many requests")
+
+
+def is_quota_error(exc: BaseException) -> bool:
+    message = str(exc).lower()
+    return any(marker in message for marker in QUOTA_ERROR_MARKERS)
+
+
+@retry(
+    retry=retry_if_exception(is_quota_error),
+    wait=wait_exponential_jitter(initial=1, max=60),
+    stop=stop_after_attempt(5),
+    reraise=True,
+)
+def index_with_retry(service: Any, courses: List[dict]) -> None:
+    service.index_courses(courses)
+
+
+def index_with_bisection(
+    service: Any, courses: List[dict], limiter: Optional[RateLimiter] = None
+) -> List[Tuple[dict, Exception]]:
+    """Index ``courses`` as one batch, bisecting only when the batch fails.
+
+    Healthy halves are indexed as they are found, so a single bad course
+    costs O(log N) extra calls instead of re-indexing one course at a time.
+    Returns the courses that failed on their own, with their errors. Quota
+    errors are retried with backoff and re-raised once retries run out,
+    since splitting the batch would only spend more quota.
+    """
+    if limiter is not None:
+        limiter.wait()
+    try:
+        index_with_retry(service, courses)
+        return []
+    except Exception as exc:
+        if is_quota_error(exc):
+            raise
+        if len(courses) == 1:
+            return [(courses[0], exc)]
+    mid = len(courses) // 2
+    return index_with_bisection(
+        service, courses[:mid], limiter
+    ) + index_with_bisection(service, courses[mid:], limiter)
+
+
+def report_failed_course(course: dict, error: Exception) -> None:
+    print(
+        f"Failed to index course id={course.get('id')} "
+        f"class_id={course.get('class_id')}: {error}",
+        file=sys.stderr,
+    )
+    for field in ("title", "skills", "learning_objectives", "provided_materials"):
+        value = course.get(field)
+        print(f"    {field} ({type(value).__name__}): {value!r:.200}", file=sys.stderr)
+
+
+def index_vector(
+    courses: Iterable[dict],
+    provider: Optional[str],
+    batch_size: int = INDEX_BATCH_SIZE,
+    indexed_ids: Optional[Set[int]] = None,
+    workers: int = INDEX_WORKERS,
+    calls_per_minute: float = INDEX_CALLS_PER_MINUTE,
+    upsert_batch_size: Optional[int] = None,
+) -> int:
+    """Index ``courses`` in batches; successful ids are added to ``indexed_ids``.
+
+    Batches run on up to ``workers`` threads so embedding requests overlap,
+    with a shared rate limiter keeping aggregate calls under the quota. At
+    most ``2 * workers`` batches are held in memory at once. Each
+    index_courses call embeds its chunks in EMBEDDING_BATCH_SIZE requests
+    and upserts them ``upsert_batch_size`` chunks per store call.
+
+    Course ids that are in flight or already indexed in this run are dropped
+    from later batches, so a repeated course never costs a second embedding.
+    Submission and bookkeeping both happen on the calling thread, so these
+    sets need no lock.
+    """
+    service = get_service("vector", provider=provider, batch_size=upsert_batch_size)
+    limiter = RateLimiter(calls_per_minute)
+    completed: Set[int] = indexed_ids if indexed_ids is not None else set()
+    inflight: Set[int] = set()
+    total = 0
+
+    def record(batch: List[dict], failures: List[Tuple[dict, Exception]]) -> None:
+        nonlocal total
+        for course, error in failures:
+            report_failed_course(course, error)
+        total += len(batch) - len(failures)
+        failed = {id(course) for course, _ in failures}
+        inflight.difference_update(course["id"] for course in batch)
+        completed.update(course["id"] for course in batch if id(course) not in failed)
+
+    def drain(pending: Dict[Future, List[dict]], return_when: str) -> None:
+        done, _ = wait(pending, return_when=return_when)
+        for future in done:
+            record(pending.pop(future), future.result())
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            pending: Dict[Future, List[dict]] = {}
+            for batch in prefetch(iter_batches(courses, batch_size)):
+                batch = [
+                    course
+                    for course in batch
+                    if course["id"] not in inflight and course["id"] not in completed
+                ]
+                if not batch:
+                    continue
+                inflight.update(course["id"] for course in batch)
+                if len(pending) >= 2 * max(1, workers):
+                    drain(pending, FIRST_COMPLETED)
+                future = executor.submit(index_with_bisection, service, batch, limiter)
+                pending[future] = batch
+            if pending:
+                drain(pending, ALL_COMPLETED)
+    finally:
+        service.close()
+    return total
 
 
 def index_graph(courses: List[dict], provider: Optional[str]) -> Dict[str, Any]:
@@ -70,21 +372,86 @@ def main() -> None:
         "--provider",
         help="Override VECTOR_STORE_PROVIDER when instantiating services",
     )
+    parser.add_argument(
+        "--updated-since",
+        help=(
+            "Only re-embed courses whose updated_at is later than this timestamp "
+            "(vector mode only; the graph is always rebuilt from every course)"
+        ),
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=INDEX_BATCH_SIZE,
+        help=f"Courses per index_courses call (default: {INDEX_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--upsert-batch-size",
+        type=int,
+        help="Chunks per vector store upsert (default: service batch size)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=INDEX_WORKERS,
+        help="Concurrent vector indexing batches (default: INDEX_WORKERS or 4)",
+    )
+    parser.add_argument(
+        "--calls-per-minute",
+        type=float,
+        default=INDEX_CALLS_PER_MINUTE,
+        help="Cap on index calls per minute across all workers (0 = unlimited)",
+    )
+    parser.add_argument(
+        "--skip-indexed",
+        action="store_true",
+        help="Only embed courses that have no chunks in the vector store yet",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore the cached list of indexed course ids (with --skip-indexed)",
+    )
     args = parser.parse_args()
 
-    courses = load_courses(args.limit)
-    if not courses:
-        print("No courses found to index", file=sys.stderr)
-        sys.exit(1)
-
     mode = args.mode
     provider = args.provider
 
     if mode in ("vector", "both"):
-        count = index_vector(courses, provider)
-        print(f"Indexed {count} chunks into the vector store")
+        indexed_ids: Optional[Set[int]] = None
+        if args.skip_indexed:
+            indexed_ids = get_indexed_course_ids(provider, refresh=args.refresh)
+            print(f"Skipping {len(indexed_ids)} already indexed courses")
+        courses = iter_courses(
+            args.limit,
+            updated_since=args.updated_since,
+            exclude_ids=sorted(indexed_ids) if indexed_ids else None,
+        )
+        try:
+            count = index_vector(
+                courses,
+                provider,
+                batch_size=args.batch_size,
+                indexed_ids=indexed_ids,
+                upsert_batch_size=args.upsert_batch_size,
+                workers=args.workers,
+                calls_per_minute=args.calls_per_minute,
+            )
+        finally:
+            # Keep progress so a rerun after a quota abort resumes where it stopped.
+            if indexed_ids is not None:
+                save_indexed_course_ids(provider, indexed_ids)
+        if not count and not (args.updated_since or args.skip_indexed):
+            print("No courses found to index", file=sys.stderr)
+            sys.exit(1)
+        print(f"Indexed {count} courses into the vector store")
 
     if mode in ("graph", "both"):
+        # Graph themes are computed across the whole corpus, so this stays a list.
+        courses = load_courses(args.limit)
+        if not courses:
+            print("No courses found to index", file=sys.stderr)
+            sys.exit(1)
         counts = index_graph(courses, provider)
         print("Graph indexing counts:")
         for key, value in counts.items():
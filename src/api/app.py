@@ -1,25 +1,57 @@
 import base64
+import hashlib
 import os
 from urllib.parse import urlsplit
 
-from flask import Flask, jsonify, make_response, render_template, request
+from flask import Flask, Response, jsonify, make_response, render_template, request
 
+try:  # Optional: gzip/br for JSON responses (a fronting proxy can do it instead)
+    from flask_compress import Compress
+except ImportError:  # pragma: no cover - exercised when flask-compress is absent
+    Compress = None
+
+from src.api.json_provider import OrjsonProvider
 from src.api.routes import courses_bp
 from src.api.search import search_bp
 from src.api.auth import auth_bp
 from src.core.errors import AppError, handle_exception
 from src.core.logging import api_logger
 from src.core.config import SUPABASE_URL, SUPABASE_ANON_KEY
+from src.models.database import release_request_connections
 
 
 FAVICON_BYTES = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///ywAAAAAAQABAAACAUwAOw==")
+FAVICON_ETAG = hashlib.md5(FAVICON_BYTES).hexdigest()
+FAVICON_HEADERS = {
+    "Content-Type": "image/gif",
+    "Cache-Control": "public, max-age=31536000, immutable",
+    "ETag": f'"{FAVICON_ETAG}"',
+}
+
+CORS_STATIC_HEADERS = {
+    "Access-Control-Allow-Credentials": "true",
+    "Access-Control-Allow-Headers": "Content-Type, Authorization, X-Requested-With",
+    "Access-Control-Allow-Methods": "GET, POST, PUT, PATCH, DELETE, OPTIONS",
+}
 
 
 def create_app():
     app = Flask(__name__, template_folder="../../templates")
+    app.json = OrjsonProvider(app)
     app.config["JSON_AS_ASCII"] = False
     app.config["MAX_CONTENT_LENGTH"] = 200 * 1024 * 1024  # 200MB
 
+    if Compress is not None and os.environ.get("COMPRESS_RESPONSES", "true") == "true":
+        # Course listings are mostly repetitive text and shrink several-fold.
+        # Streams stay uncompressed so chat SSE frames are flushed as sent.
+        app.config.update(
+            COMPRESS_MIMETYPES=["application/json"],
+            COMPRESS_LEVEL=4,
+            COMPRESS_MIN_SIZE=1024,
+            COMPRESS_STREAMS=False,
+        )
+        Compress(app)
+
     def _normalize_origin(origin: str) -> str:
         normalized = origin.strip().rstrip("/")
         if "://" not in normalized:
@@ -29,35 +61,26 @@ def create_app():
             return normalized
         return f"{parsed.scheme.lower()}://{parsed.netloc.lower()}"
 
-    allowed_origins = [
+    allowed_origins = frozenset(
         _normalize_origin(origin)
         for origin in os.environ.get("CORS_ALLOWED_ORIGINS", "*").split(",")
         if origin.strip()
-    ] or ["*"]
+    ) or frozenset({"*"})
+    allow_any_origin = "*" in allowed_origins
 
     def _resolve_origin(request_origin: str | None) -> str | None:
-        normalized_request_origin = (
-            _normalize_origin(request_origin) if request_origin else None
-        )
-        if "*" in allowed_origins:
+        if allow_any_origin:
             return request_origin or "*"
-        if normalized_request_origin and normalized_request_origin in allowed_origins:
+        if request_origin and _normalize_origin(request_origin) in allowed_origins:
             return request_origin
         return None
 
     def _apply_cors_headers(response):
-        origin = request.headers.get("Origin")
-        allowed_origin = _resolve_origin(origin)
+        allowed_origin = _resolve_origin(request.headers.get("Origin"))
         if allowed_origin:
             response.headers["Access-Control-Allow-Origin"] = allowed_origin
             response.headers.setdefault("Vary", "Origin")
-        response.headers["Access-Control-Allow-Credentials"] = "true"
-        response.headers["Access-Control-Allow-Headers"] = (
-            "Content-Type, Authorization, X-Requested-With"
-        )
-        response.headers["Access-Control-Allow-Methods"] = (
-            "GET, POST, PUT, PATCH, DELETE, OPTIONS"
-        )
+        response.headers.update(CORS_STATIC_HEADERS)
         return response
 
     @app.before_request
@@ -70,35 +93,66 @@ def create_app():
     def _apply_cors(response):
         return _apply_cors_headers(response)
 
+    # Return pooled DB connections that an error path forgot to close
+    app.teardown_appcontext(release_request_connections)
+
     app.register_blueprint(courses_bp)
     app.register_blueprint(search_bp)
     app.register_blueprint(auth_bp)
 
+    # The page templates are static HTML, so each is rendered once and served
+    # from memory; in debug mode a changed file is picked up via its mtime.
+    page_cache: dict[str, tuple[float, bytes, str]] = {}
+
+    def _render_page(template_name: str) -> tuple[bytes, str]:
+        mtime = 0.0
+        if app.debug:
+            mtime = os.path.getmtime(
+                os.path.join(app.root_path, app.template_folder, template_name)
+            )
+        cached = page_cache.get(template_name)
+        if cached is None or cached[0] != mtime:
+            body = render_template(template_name).encode("utf-8")
+            cached = (mtime, body, hashlib.sha1(body).hexdigest())
+            page_cache[template_name] = cached
+        return cached[1], cached[2]
+
+    def _page(template_name: str):
+        # Pages are unhashed HTML, so they cannot be marked immutable; an ETag
+        # plus no-cache lets browsers revalidate and receive a bodyless 304.
+        body, etag = _render_page(template_name)
+        headers = {"Cache-Control": "no-cache", "ETag": f'"{etag}"'}
+        if etag in request.if_none_match:
+            return Response(status=304, headers=headers)
+        return Response(body, mimetype="text/html", headers=headers)
+
     @app.route("/")
     def index():
-        return render_template("index.html")
+        return _page("index.html")
 
     @app.route("/login")
     def login():
-        return render_template("login.html")
+        return _page("login.html")
 
     @app.route("/signup")
     def signup():
-        return render_template("signup.html")
+        return _page("signup.html")
 
     @app.route("/profile")
     def profile():
-        return render_template("profile.html")
+        return _page("profile.html")
 
     @app.route("/auth/callback")
     def auth_callback():
-        return render_template("callback.html")
+        return _page("callback.html")
 
     @app.route("/favicon.ico")
     def favicon():
-        response = make_response(FAVICON_BYTES)
-        response.headers.set("Content-Type", "image/gif")
-        return response
+        # A fresh Response per hit is still needed: after_request mutates
+        # headers, so a shared module-level Response would leak CORS state.
+        if FAVICON_ETAG in request.if_none_match:
+            return Response(status=304, headers=FAVICON_HEADERS)
+        return Response(FAVICON_BYTES, headers=FAVICON_HEADERS)
 
     @app.route("/api/health", methods=["GET"])
     def health():
@@ -1,90 +1,199 @@
-import os
+import re
 from typing import Any, Dict
 
-from flask import Blueprint, jsonify, request
+import orjson
+from flask import Blueprint, Response, jsonify, request
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from src.core.config import (
+    DATABASE_URL,
     SUPABASE_URL,
     SUPABASE_ANON_KEY,
     SUPABASE_SERVICE_KEY,
     DEV_BYPASS_AUTH,
 )
+from src.core.auth import auth_service
+from src.core.cache import TTLCache
 from src.core.errors import AuthenticationError, BadRequestError, handle_exception
 from src.core.logging import api_logger
-from src.models.database import get_db_connection
+from src.core.resilience import CircuitBreaker, CircuitOpenError
+from src.models.database import execute_prepared, pooled_connection
 
 auth_bp = Blueprint("auth", __name__)
 
+# (connect, read) timeout so a hung Supabase cannot pin a worker indefinitely.
+SUPABASE_TIMEOUT = (3.05, 10)
 
-def _get_profile_from_db(user_id: str) -> Dict[str, Any]:
-    conn = get_db_connection()
-    try:
-        cursor = conn.cursor()
-        use_postgres = bool(os.environ.get("DATABASE_URL"))
-        placeholder = "%s" if use_postgres else "?"
-        cursor.execute(
-            f"SELECT name, email, location, bio FROM user_profiles WHERE user_id = {placeholder}",
-            (user_id,),
-        )
-        row = cursor.fetchone()
-        if row:
-            if isinstance(row, dict):
-                return {k: v for k, v in row.items() if v is not None}
-            return {
-                k: v
-                for k, v in zip(["name", "email", "location", "bio"], row)
-                if v is not None
+_LOGIN_URL = f"{SUPABASE_URL}/auth/v1/token?grant_type=password"
+_SIGNUP_URL = f"{SUPABASE_URL}/auth/v1/signup"
+
+# Supabase error messages that mean "confirm your email" rather than bad credentials
+_AUTH_ERR_HINT_RE = re.compile(r"email|confirm", re.IGNORECASE)
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+# Dev-bypass replies never change, so encode them once
+_DEV_USER = {"email": "dev@localhost", "id": "dev_user"}
+_DEV_LOGIN_BODY = orjson.dumps({"token": "dev_token", "user": _DEV_USER})
+_DEV_SIGNUP_BODY = orjson.dumps(
+    {"message": "Account created successfully (dev mode)", "user": _DEV_USER}
+)
+
+# The backend is fixed at import, so every query below is specialized once.
+# Pooled connections return mapping rows on both backends (RealDictRow on
+# Postgres, sqlite3.Row on SQLite), so handlers can always use dict(row).
+_USE_POSTGRES = bool(DATABASE_URL)
+_PH = "%s" if _USE_POSTGRES else "?"
+_NOW = "NOW()" if _USE_POSTGRES else "CURRENT_TIMESTAMP"
+
+_PROFILE_SELECT_SQL = (
+    f"SELECT name, email, location, bio FROM user_profiles WHERE user_id = {_PH}"
+)
+_PROFILE_UPSERT_SQL = f"""INSERT INTO user_profiles (user_id, name, email, location, bio, updated_at)
+               VALUES ({_PH}, {_PH}, {_PH}, {_PH}, {_PH}, {_NOW})
+               ON CONFLICT (user_id) DO UPDATE SET
+                   name = excluded.name,
+                   email = excluded.email,
+                   location = excluded.location,
+                   bio = excluded.bio,
+                   updated_at = {_NOW}"""
+_ME_SQL = (
+    "SELECT name, email, location, bio, review_count FROM user_profiles "
+    f"WHERE user_id = {_PH}"
+)
+# Maintained by triggers on reviews (see DatabaseManager._ensure_review_count)
+_REVIEW_COUNT_SQL = f"SELECT review_count FROM user_profiles WHERE user_id = {_PH}"
+_REVIEWS_SELECT = """SELECT r.id, r.course_id, r.rating, r.review, r.author_name, r.author_email,
+                       r.created_at, c.title AS course_title
+                FROM reviews r
+                LEFT JOIN courses c ON r.course_id = c.id"""
+# Keyset pagination on (created_at, id), served by idx_reviews_user_created
+_REVIEWS_SQL = f"""{_REVIEWS_SELECT}
+                WHERE r.user_id = {_PH}
+                ORDER BY r.created_at DESC, r.id DESC
+                LIMIT {_PH}"""
+_REVIEWS_BEFORE_SQL = f"""{_REVIEWS_SELECT}
+                WHERE r.user_id = {_PH} AND (r.created_at, r.id) < ({_PH}, {_PH})
+                ORDER BY r.created_at DESC, r.id DESC
+                LIMIT {_PH}"""
+REVIEWS_PAGE_SIZE = 50
+REVIEWS_MAX_PAGE_SIZE = 100
+
+# Profiles are only written through _merge_profile_in_db, which refreshes
+# this cache in its own worker only; the short TTL bounds how long another
+# worker can return the profile as it was before an update.
+PROFILE_CACHE_TTL = 5
+_profile_cache = TTLCache(maxsize=5000, ttl=PROFILE_CACHE_TTL)
+
+
+def _build_supabase_session() -> requests.Session:
+    """Keep-alive session for Supabase auth calls.
+
+    Login and signup are POSTs that must not be sent twice, so only failed
+    connects (nothing reached Supabase) are retried for them; status-based
+    retries apply to GETs alone. Repeated failures are left to
+    ``_supabase_breaker``.
+    """
+    session = requests.Session()
+    retries = Retry(
+        total=2,
+        read=0,
+        backoff_factor=0.5,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=50, max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if SUPABASE_ANON_KEY:
+        session.headers.update(
+            {
+                "apikey": SUPABASE_ANON_KEY,
+                "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
             }
-        return {}
-    finally:
-        conn.close()
+        )
+    return session
+
+
+_supabase_session = _build_supabase_session()
+# Opens after consecutive timeouts / 429 / 5xx so a degraded Supabase fails
+# fast with a 503 instead of tying up workers for the full timeout.
+_supabase_breaker = CircuitBreaker(
+    "Supabase",
+    fail_max=5,
+    reset_timeout=30.0,
+    failure_exceptions=(requests.RequestException,),
+    is_failure=lambda response: response.status_code == 429
+    or response.status_code >= 500,
+)
 
 
-def _upsert_profile_in_db(user_id: str, profile: Dict[str, Any]) -> None:
-    conn = get_db_connection()
+def _json_body(response: requests.Response) -> Dict[str, Any]:
+    """Decode a Supabase reply once from bytes, skipping requests' charset sniffing."""
+    body = response.content
+    if not body:
+        return {}
     try:
+        return orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return {}
+
+
+def _body_text(response: requests.Response) -> str:
+    return response.content.decode("utf-8", errors="replace")
+
+
+def _fetch_profile(cursor, user_id: str) -> Dict[str, Any]:
+    execute_prepared(cursor, "auth_profile", _PROFILE_SELECT_SQL, (user_id,))
+    row = cursor.fetchone()
+    if row:
+        return {k: v for k, v in dict(row).items() if v is not None}
+    return {}
+
+
+def _write_profile(cursor, user_id: str, profile: Dict[str, Any]) -> None:
+    execute_prepared(
+        cursor,
+        "auth_profile_upsert",
+        _PROFILE_UPSERT_SQL,
+        (
+            user_id,
+            profile.get("name"),
+            profile.get("email"),
+            profile.get("location"),
+            profile.get("bio"),
+        ),
+    )
+
+
+def _get_profile_from_db(user_id: str) -> Dict[str, Any]:
+    cached = _profile_cache.get(user_id)
+    if cached is not None:
+        return dict(cached)
+    generation = _profile_cache.generation
+    with pooled_connection() as conn:
+        profile = _fetch_profile(conn.cursor(), user_id)
+    # Not stored if an update landed while this read was in flight
+    _profile_cache.set_if_unchanged(user_id, profile, generation)
+    return dict(profile)
+
+
+def _merge_profile_in_db(user_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
+    """Read, merge and upsert a profile on one connection in one transaction.
+
+    Further profile-side writes (audit rows, last-seen stamps) belong inside
+    this block so they share the same round-trip and commit.
+    """
+    with pooled_connection() as conn:
         cursor = conn.cursor()
-        use_postgres = bool(os.environ.get("DATABASE_URL"))
-        if use_postgres:
-            cursor.execute(
-                """INSERT INTO user_profiles (user_id, name, email, location, bio, updated_at)
-                   VALUES (%s, %s, %s, %s, %s, NOW())
-                   ON CONFLICT (user_id) DO UPDATE SET
-                       name = EXCLUDED.name,
-                       email = EXCLUDED.email,
-                       location = EXCLUDED.location,
-                       bio = EXCLUDED.bio,
-                       updated_at = NOW()""",
-                (
-                    user_id,
-                    profile.get("name"),
-                    profile.get("email"),
-                    profile.get("location"),
-                    profile.get("bio"),
-                ),
-            )
-        else:
-            cursor.execute(
-                """INSERT INTO user_profiles (user_id, name, email, location, bio, updated_at)
-                   VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                   ON CONFLICT (user_id) DO UPDATE SET
-                       name = excluded.name,
-                       email = excluded.email,
-                       location = excluded.location,
-                       bio = excluded.bio,
-                       updated_at = CURRENT_TIMESTAMP""",
-                (
-                    user_id,
-                    profile.get("name"),
-                    profile.get("email"),
-                    profile.get("location"),
-                    profile.get("bio"),
-                ),
-            )
+        profile = {**_fetch_profile(cursor, user_id), **updates}
+        _write_profile(cursor, user_id, profile)
         conn.commit()
-    finally:
-        conn.close()
+    _profile_cache.pop(user_id)
+    _profile_cache.set(user_id, {k: v for k, v in profile.items() if v is not None})
+    return profile
 
 
 def _resolve_user_identifier(user: Dict[str, Any]) -> str | None:
@@ -94,9 +203,7 @@ def _resolve_user_identifier(user: Dict[str, Any]) -> str | None:
 @auth_bp.route("/api/auth/login", methods=["POST"])
 def login():
     if DEV_BYPASS_AUTH:
-        return jsonify(
-            {"token": "dev_token", "user": {"email": "dev@localhost", "id": "dev_user"}}
-        )
+        return Response(_DEV_LOGIN_BODY, mimetype="application/json")
 
     if not SUPABASE_URL or not SUPABASE_ANON_KEY:
         return jsonify(
@@ -122,24 +229,21 @@ def login():
         return jsonify(error_dict), status_code
 
     try:
-        response = requests.post(
-            f"{SUPABASE_URL}/auth/v1/token?grant_type=password",
+        response = _supabase_breaker.call(
+            _supabase_session.post,
+            _LOGIN_URL,
             json={"email": email, "password": password},
-            headers={
-                "Content-Type": "application/json",
-                "apikey": SUPABASE_ANON_KEY,
-                "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-            },
+            timeout=SUPABASE_TIMEOUT,
         )
 
         if response.status_code != 200:
-            error_data = response.json() if response.text else {}
+            error_data = _json_body(response)
             error_msg = error_data.get(
                 "msg", error_data.get("error_description", "Authentication failed")
             )
 
             # Check if email needs confirmation
-            if "email" in error_msg.lower() or "confirm" in error_msg.lower():
+            if _AUTH_ERR_HINT_RE.search(error_msg):
                 error_dict, status_code = handle_exception(
                     AuthenticationError(
                         "Email not confirmed. Please check your email to verify your account."
@@ -148,14 +252,14 @@ def login():
                 return jsonify(error_dict), 401
 
             api_logger.log_error(
-                Exception(f"Supabase auth failed: {response.text}"), {"email": email}
+                Exception(f"Supabase auth failed: {_body_text(response)}"), {"email": email}
             )
             error_dict, status_code = handle_exception(
                 AuthenticationError("Invalid email or password")
             )
             return jsonify(error_dict), 401
 
-        token_data = response.json()
+        token_data = _json_body(response)
         access_token = token_data.get("access_token")
 
         if not access_token:
@@ -168,6 +272,9 @@ def login():
 
         return jsonify({"token": access_token, "user": user})
 
+    except CircuitOpenError as e:
+        error_dict, status_code = handle_exception(e)
+        return jsonify(error_dict), status_code
     except Exception as e:
         api_logger.log_error(e, {"email": email})
         return jsonify({"error": "Authentication failed"}), 500
@@ -180,10 +287,8 @@ def logout():
 
 @auth_bp.route("/api/auth/profile", methods=["GET"])
 def get_profile():
-    from src.core.auth import auth_service
-
     if auth_service.dev_bypass:
-        base_user = {"email": "dev@localhost", "id": "dev_user"}
+        base_user = _DEV_USER
         profile = _get_profile_from_db("dev_user")
         return jsonify({"user": {**base_user, **profile}})
 
@@ -200,14 +305,47 @@ def get_profile():
         return jsonify({"error": str(e)}), 401
 
 
+@auth_bp.route("/api/auth/me", methods=["GET"])
+def get_me():
+    """Profile and review count in one round-trip, for the dashboard."""
+    if auth_service.dev_bypass:
+        user = _DEV_USER
+        user_id = "dev_user"
+    else:
+        token = auth_service.get_token_from_header()
+        if not token:
+            return jsonify({"error": "No token provided"}), 401
+        try:
+            user = auth_service.verify_token(token)
+            user_id = _resolve_user_identifier(user)
+        except Exception as e:
+            return jsonify({"error": str(e)}), 401
+
+    row = None
+    if user_id:
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            execute_prepared(cursor, "auth_me", _ME_SQL, (user_id,))
+            row = cursor.fetchone()
+
+    record = dict(row) if row else {}
+    review_count = record.pop("review_count", 0) or 0
+    profile = {k: v for k, v in record.items() if v is not None}
+    return jsonify(
+        {
+            "user": {**user, **profile},
+            "profile": profile,
+            "review_count": review_count,
+        }
+    )
+
+
 @auth_bp.route("/api/auth/profile", methods=["PUT"])
 def update_profile():
-    from src.core.auth import auth_service
-
     data = request.get_json(silent=True) or {}
 
     if auth_service.dev_bypass:
-        base_user = {"email": "dev@localhost", "id": "dev_user"}
+        base_user = _DEV_USER
         user_id = "dev_user"
     else:
         token = auth_service.get_token_from_header()
@@ -226,17 +364,13 @@ def update_profile():
     allowed_fields = {"name", "location", "bio", "email"}
     profile_updates = {k: v for k, v in data.items() if k in allowed_fields}
 
-    current_profile = _get_profile_from_db(user_id)
-    updated_profile = {**current_profile, **profile_updates}
-    _upsert_profile_in_db(user_id, updated_profile)
+    updated_profile = _merge_profile_in_db(user_id, profile_updates)
 
     return jsonify({**base_user, **updated_profile})
 
 
 @auth_bp.route("/api/auth/review-count", methods=["GET"])
 def get_user_review_count():
-    from src.core.auth import auth_service
-
     if auth_service.dev_bypass:
         user_id = "dev_user"
     else:
@@ -252,31 +386,18 @@ def get_user_review_count():
     if not user_id:
         return jsonify({"count": 0})
 
-    conn = get_db_connection()
     try:
-        cursor = conn.cursor()
-        use_postgres = bool(os.environ.get("DATABASE_URL"))
-        placeholder = "%s" if use_postgres else "?"
-        cursor.execute(
-            f"SELECT COUNT(*) FROM reviews WHERE user_id = {placeholder}",
-            (user_id,),
-        )
-        row = cursor.fetchone()
-        if isinstance(row, dict):
-            count = row.get("count", 0)
-        else:
-            count = row[0] if row else 0
-        return jsonify({"count": count})
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            execute_prepared(cursor, "auth_review_count", _REVIEW_COUNT_SQL, (user_id,))
+            row = cursor.fetchone()
+        return jsonify({"count": row["review_count"] if row else 0})
     except Exception:
         return jsonify({"count": 0})
-    finally:
-        conn.close()
 
 
 @auth_bp.route("/api/auth/reviews", methods=["GET"])
 def get_user_reviews():
-    from src.core.auth import auth_service
-
     if auth_service.dev_bypass:
         user_id = "dev_user"
     else:
@@ -290,56 +411,44 @@ def get_user_reviews():
             return jsonify({"error": str(e)}), 401
 
     if not user_id:
-        return jsonify({"reviews": []})
+        return jsonify({"reviews": [], "next_before": None, "next_before_id": None})
 
-    conn = get_db_connection()
-    try:
+    limit = request.args.get("limit", REVIEWS_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, REVIEWS_MAX_PAGE_SIZE))
+    before = request.args.get("before")
+    before_id = request.args.get("before_id", type=int)
+
+    # The page is capped at REVIEWS_MAX_PAGE_SIZE rows, so it is read in one go
+    with pooled_connection() as conn:
         cursor = conn.cursor()
-        use_postgres = bool(os.environ.get("DATABASE_URL"))
-        placeholder = "%s" if use_postgres else "?"
-        cursor.execute(
-            f"""SELECT r.id, r.course_id, r.rating, r.review, r.author_name, r.author_email, r.created_at, c.title
-                FROM reviews r
-                LEFT JOIN courses c ON r.course_id = c.id
-                WHERE r.user_id = {placeholder}
-                ORDER BY r.created_at DESC""",
-            (user_id,),
-        )
-        rows = cursor.fetchall()
-        reviews = []
-        for row in rows:
-            if isinstance(row, dict):
-                r = dict(row)
-                if r.get("created_at") and hasattr(r["created_at"], "isoformat"):
-                    r["created_at"] = r["created_at"].isoformat()
-                reviews.append(r)
-            else:
-                reviews.append(
-                    {
-                        "id": row[0],
-                        "course_id": row[1],
-                        "rating": row[2],
-                        "review": row[3],
-                        "author_name": row[4],
-                        "author_email": row[5],
-                        "created_at": str(row[6]) if row[6] else None,
-                        "course_title": row[7],
-                    }
-                )
-        return jsonify({"reviews": reviews})
-    finally:
-        conn.close()
+        if before and before_id is not None:
+            execute_prepared(
+                cursor,
+                "auth_reviews_before",
+                _REVIEWS_BEFORE_SQL,
+                (user_id, before, before_id, limit),
+            )
+        else:
+            execute_prepared(cursor, "auth_reviews", _REVIEWS_SQL, (user_id, limit))
+        reviews = [dict(row) for row in cursor.fetchall()]
+
+    # A full page means there may be more; hand back the keyset cursor
+    last = reviews[-1] if len(reviews) == limit else None
+    # orjson directly: the cursor must stay ISO-8601, not jsonify's HTTP date
+    body = orjson.dumps(
+        {
+            "reviews": reviews,
+            "next_before": last["created_at"] if last else None,
+            "next_before_id": last["id"] if last else None,
+        }
+    )
+    return Response(body, mimetype="application/json")
 
 
 @auth_bp.route("/api/auth/signup", methods=["POST"])
 def signup():
     if DEV_BYPASS_AUTH:
-        return jsonify(
-            {
-                "message": "Account created successfully (dev mode)",
-                "user": {"email": "dev@localhost", "id": "dev_user"},
-            }
-        )
+        return Response(_DEV_SIGNUP_BODY, mimetype="application/json")
 
     if not SUPABASE_URL or not SUPABASE_ANON_KEY:
         return jsonify(
@@ -364,6 +473,12 @@ def signup():
         )
         return jsonify(error_dict), status_code
 
+    if not _EMAIL_RE.match(email):
+        error_dict, status_code = handle_exception(
+            BadRequestError("Please enter a valid email address")
+        )
+        return jsonify(error_dict), status_code
+
     if len(password) < 6:
         error_dict, status_code = handle_exception(
             BadRequestError("Password must be at least 6 characters")
@@ -371,26 +486,23 @@ def signup():
         return jsonify(error_dict), status_code
 
     try:
-        response = requests.post(
-            f"{SUPABASE_URL}/auth/v1/signup",
+        response = _supabase_breaker.call(
+            _supabase_session.post,
+            _SIGNUP_URL,
             json={"email": email, "password": password},
-            headers={
-                "Content-Type": "application/json",
-                "apikey": SUPABASE_ANON_KEY,
-                "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-            },
+            timeout=SUPABASE_TIMEOUT,
         )
 
         if response.status_code != 200:
             api_logger.log_error(
-                Exception(f"Supabase signup failed: {response.text}"), {"email": email}
+                Exception(f"Supabase signup failed: {_body_text(response)}"), {"email": email}
             )
             error_dict, status_code = handle_exception(
                 AuthenticationError("Could not create account")
             )
             return jsonify(error_dict), 400
 
-        user_data = response.json()
+        user_data = _json_body(response)
 
         return jsonify(
             {
@@ -399,6 +511,9 @@ def signup():
             }
         )
 
+    except CircuitOpenError as e:
+        error_dict, status_code = handle_exception(e)
+        return jsonify(error_dict), status_code
     except Exception as e:
         api_logger.log_error(e, {"email": email})
         return jsonify({"error": "Signup failed"}), 500
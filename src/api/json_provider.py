@@ -0,0 +1,38 @@
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson.
+
+    Output matches the default provider: sorted keys, and dates are still
+    rendered by Flask's default (HTTP date) via OPT_PASSTHROUGH_DATETIME.
+    Anything orjson rejects falls back to the stdlib encoder.
+    """
+
+    def _options(self) -> int:
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumpb(self, obj) -> bytes:
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._options())
+        except TypeError:
+            return super().dumps(obj).encode("utf-8")
+
+    def dumps(self, obj, **kwargs) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumpb(obj).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumpb(obj), mimetype=self.mimetype)
+
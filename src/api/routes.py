@@ -1,16 +1,18 @@
-import io
 import os
 import re
 import uuid
 import json
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
 from typing import Optional
 
-import PyPDF2
 from flask import Blueprint, jsonify, request, send_file
+from psycopg2.extras import execute_values
 from pydantic import ValidationError
 from werkzeug.utils import secure_filename
 
-from src.core.config import ALLOWED_EXTENSIONS
+from src.core.cache import TTLCache
+from src.core.config import ALLOWED_EXTENSIONS, DATABASE_URL
 from src.core.errors import (
     NotFoundError,
     DatabaseError,
@@ -22,8 +24,18 @@ from src.core.logging import api_logger, get_logger
 from src.core.auth import require_auth
 
 logger = get_logger("routes")
-from src.core.utils import to_json, parse_json_fields
-from src.models.database import get_db_connection, extract_returning_id
+from src.core.utils import to_json, parse_json_fields, parse_json_rows
+from src.models import (
+    PDF_BATCH_WORKERS,
+    get_batch_pool,
+    parse_course_pdf,
+    reset_batch_pool,
+)
+from src.models.database import (
+    execute_prepared,
+    get_db_connection,
+    extract_returning_id,
+)
 from src.models.schemas import (
     CourseCreate,
     CourseUpdate,
@@ -35,6 +47,78 @@ from src.models.schemas import (
 
 courses_bp = Blueprint("courses", __name__)
 
+# The backend is fixed at import, so every query below is specialized once.
+_USE_POSTGRES = bool(DATABASE_URL)
+_PH = "%s" if _USE_POSTGRES else "?"
+
+_INSERT_COLUMNS = (
+    "class_id, title, instructor, location, course_type, cost, "
+    "learning_objectives, provided_materials, skills, description, filename, pdf_url"
+)
+_INSERT_COURSE_SQL = (
+    f"INSERT INTO courses ({_INSERT_COLUMNS}) VALUES ({', '.join([_PH] * 12)})"
+    + (" RETURNING id" if _USE_POSTGRES else "")
+)
+# Listing order; NULL class_ids sort first on both backends, and id breaks
+# ties so keyset cursors are unambiguous. Matches idx_courses_listing.
+_LISTING_ORDER = "COALESCE(class_id, ''), id"
+_LISTING_COLUMNS = (
+    "id, class_id, title, instructor, location, course_type, cost, "
+    "skills, filename, pdf_url, created_at, updated_at"
+)
+# Prepared statements outlive schema changes on a pooled connection, so they
+# name their columns instead of tracking whatever SELECT * currently means
+_COURSE_COLUMNS = (
+    "id, class_id, title, instructor, location, course_type, cost, "
+    "learning_objectives, provided_materials, skills, description, filename, "
+    "pdf_url, created_at, updated_at"
+)
+_SELECT_COURSE_SQL = f"SELECT {_COURSE_COLUMNS} FROM courses WHERE id = {_PH}"
+_BULK_COURSES_SQL = f"SELECT {_COURSE_COLUMNS} FROM courses WHERE id = ANY(%s::int[])"
+_COURSE_EXISTS_SQL = f"SELECT id FROM courses WHERE id = {_PH}"
+_DELETE_COURSE_SQL = f"DELETE FROM courses WHERE id = {_PH}"
+_UPDATE_COURSE_SQL = f"""UPDATE courses SET
+                class_id = {_PH},
+                title = {_PH},
+                instructor = {_PH},
+                location = {_PH},
+                course_type = {_PH},
+                cost = {_PH},
+                learning_objectives = {_PH},
+                provided_materials = {_PH},
+                skills = {_PH},
+                description = {_PH},
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = {_PH}"""
+_PROFILE_NAME_SQL = f"SELECT name, email FROM user_profiles WHERE user_id = {_PH}"
+_LIKE = "ILIKE" if _USE_POSTGRES else "LIKE"
+# Each column is trigram-indexed on Postgres (see TRIGRAM_INDEXED_COLUMNS)
+_SEARCH_FILTER_SQL = (
+    f" AND (title {_LIKE} {_PH} OR class_id {_LIKE} {_PH}"
+    f" OR description {_LIKE} {_PH})"
+)
+_REVIEW_EXISTING_SQL = (
+    f"SELECT id FROM reviews WHERE course_id = {_PH} AND user_id = {_PH}"
+)
+_REVIEW_UPDATE_SQL = f"""UPDATE reviews
+                        SET rating = {_PH}, review = {_PH}, author_name = {_PH}, author_email = {_PH}
+                      WHERE id = {_PH}"""
+_REVIEW_INSERT_SQL = f"""INSERT INTO reviews (course_id, user_id, rating, review, author_name, author_email)
+                       VALUES ({_PH}, {_PH}, {_PH}, {_PH}, {_PH}, {_PH})""" + (
+    " RETURNING id" if _USE_POSTGRES else ""
+)
+_REVIEWS_FOR_COURSE_SQL = f"""SELECT id, course_id, user_id, rating, review, author_name, author_email, created_at
+                FROM reviews WHERE course_id = {_PH}
+                ORDER BY created_at DESC"""
+
+
+# Course rows change rarely, so single and bulk lookups are served from an
+# in-process cache keyed by id. Update/delete only drop it in the worker that
+# handled them, so the TTL is kept short: it bounds how long the other
+# workers can serve a stale row.
+COURSE_CACHE_TTL = float(os.environ.get("COURSE_CACHE_TTL", "5"))
+_course_cache = TTLCache(maxsize=2048, ttl=COURSE_CACHE_TTL)
+
 
 def _get_profile_for_user(user_id: str | None) -> dict:
     if not user_id:
@@ -42,12 +126,7 @@ def _get_profile_for_user(user_id: str | None) -> dict:
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
-        use_postgres = bool(os.environ.get("DATABASE_URL"))
-        placeholder = "%s" if use_postgres else "?"
-        cursor.execute(
-            f"SELECT name, email FROM user_profiles WHERE user_id = {placeholder}",
-            (user_id,),
-        )
+        execute_prepared(cursor, "profile_name", _PROFILE_NAME_SQL, (user_id,))
         row = cursor.fetchone()
         if not row:
             return {}
@@ -58,23 +137,18 @@ def _get_profile_for_user(user_id: str | None) -> dict:
         conn.close()
 
 
+def _first_value(row):
+    if hasattr(row, "keys"):
+        return row[next(iter(row.keys()))]
+    return row[0]
+
+
 def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
 def extract_from_pdf(file_data, filename=None):
-    from src.models import CourseExtractor
-
-    extractor = CourseExtractor()
-    try:
-        reader = PyPDF2.PdfReader(io.BytesIO(file_data))
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text()
-        return extractor._parse_course_data(text, filename)
-    except Exception as e:
-        logger.error(f"PDF extraction error: {e}")
-        return None
+    return parse_course_pdf(file_data, filename)
 
 
 @courses_bp.route("/api/courses", methods=["GET"])
@@ -85,72 +159,77 @@ def get_courses():
     page = int(request.args.get("page", 1))
     limit = int(request.args.get("limit", 20))
     offset = (page - 1) * limit
+    # Keyset cursor from a previous page's next_after/next_after_id
+    after = request.args.get("after")
+    after_id = request.args.get("after_id", type=int)
+    keyset = after is not None and after_id is not None
 
     conn = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        db_url = os.environ.get("DATABASE_URL")
-        use_postgres = bool(db_url)
-        placeholder = "%s" if use_postgres else "?"
-
-        query = """
-            SELECT id, class_id, title, instructor, location, course_type, cost, 
-                   skills, filename, pdf_url, created_at, updated_at
-            FROM courses
-            WHERE 1=1
-        """
-        count_query = "SELECT COUNT(*) FROM courses WHERE 1=1"
+        where = ""
         params = []
-        count_params = []
 
         if search:
-            if use_postgres:
-                query += (
-                    " AND (title ILIKE %s OR class_id ILIKE %s OR description ILIKE %s)"
-                )
-                count_query += (
-                    " AND (title ILIKE %s OR class_id ILIKE %s OR description ILIKE %s)"
-                )
-            else:
-                query += " AND (title LIKE ? OR class_id LIKE ? OR description LIKE ?)"
-                count_query += (
-                    " AND (title LIKE ? OR class_id LIKE ? OR description LIKE ?)"
-                )
-            params.extend([f"%{search}%", f"%{search}%", f"%{search}%"])
-            count_params.extend([f"%{search}%", f"%{search}%", f"%{search}%"])
+            where += _SEARCH_FILTER_SQL
+            params.extend([f"%{search}%"] * 3)
 
         if location:
-            query += f" AND location LIKE {placeholder}"
-            count_query += f" AND location LIKE {placeholder}"
+            where += f" AND location LIKE {_PH}"
             params.append(f"%{location}%")
-            count_params.append(f"%{location}%")
 
         if course_type:
-            query += f" AND course_type LIKE {placeholder}"
-            count_query += f" AND course_type LIKE {placeholder}"
+            where += f" AND course_type LIKE {_PH}"
             params.append(f"%{course_type}%")
-            count_params.append(f"%{course_type}%")
-
-        cursor.execute(count_query, count_params)
-        count_result = cursor.fetchone()
-        if isinstance(count_result, (tuple, list)):
-            total = count_result[0]
-        elif hasattr(count_result, "keys"):
-            total = (
-                count_result["count"]
-                if "count" in count_result.keys()
-                else count_result[0]
+
+        if keyset:
+            # Seeks straight to the cursor on the listing index; no OFFSET
+            # rows are read and discarded, and no total is counted.
+            cursor.execute(
+                f"""
+                SELECT {_LISTING_COLUMNS}
+                FROM courses
+                WHERE 1=1{where} AND ({_LISTING_ORDER}) > ({_PH}, {_PH})
+                ORDER BY {_LISTING_ORDER} LIMIT {_PH}
+                """,
+                [*params, after, after_id, limit],
             )
+            courses = parse_json_rows(cursor.fetchall())
+            payload = {"limit": limit, "courses": courses}
         else:
-            total = count_result[0]
-
-        query += f" ORDER BY class_id LIMIT {placeholder} OFFSET {placeholder}"
-        params.extend([limit, offset])
+            # The window count rides along with the page, so the filters are
+            # evaluated once instead of again in a separate COUNT(*) query.
+            cursor.execute(
+                f"""
+                SELECT {_LISTING_COLUMNS}, COUNT(*) OVER () AS total_count
+                FROM courses
+                WHERE 1=1{where}
+                ORDER BY {_LISTING_ORDER} LIMIT {_PH} OFFSET {_PH}
+                """,
+                [*params, limit, offset],
+            )
+            courses = parse_json_rows(cursor.fetchall())
+            total = 0
+            for course in courses:
+                total = course.pop("total_count")
+            if not courses and offset:
+                # Past the last page there is no row to carry the count
+                cursor.execute(f"SELECT COUNT(*) FROM courses WHERE 1=1{where}", params)
+                total = _first_value(cursor.fetchone())
+            payload = {
+                "count": total,
+                "page": page,
+                "limit": limit,
+                "total_pages": (total + limit - 1) // limit,
+                "courses": courses,
+            }
 
-        cursor.execute(query, params)
-        courses = [parse_json_fields(c) for c in cursor.fetchall()]
+        # A full page means there may be more; hand back the keyset cursor
+        last = courses[-1] if len(courses) == limit else None
+        payload["next_after"] = (last["class_id"] or "") if last else None
+        payload["next_after_id"] = last["id"] if last else None
 
         api_logger.log_request(
             method="GET",
@@ -159,15 +238,7 @@ def get_courses():
             duration_ms=0,
             params={"search": search, "location": location, "course_type": course_type},
         )
-        return jsonify(
-            {
-                "count": total,
-                "page": page,
-                "limit": limit,
-                "total_pages": (total + limit - 1) // limit,
-                "courses": courses,
-            }
-        )
+        return jsonify(payload)
     except Exception as e:
         api_logger.log_error(e, {"path": "/api/courses", "method": "GET"})
         error_dict, status_code = handle_exception(e)
@@ -203,15 +274,31 @@ def get_courses_bulk():
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
-        use_postgres = bool(os.environ.get("DATABASE_URL"))
-        placeholder = "%s" if use_postgres else "?"
 
-        placeholders = ",".join([placeholder] * len(course_ids))
-        cursor.execute(
-            f"SELECT * FROM courses WHERE id IN ({placeholders})", course_ids
-        )
-        courses = [parse_json_fields(c) for c in cursor.fetchall()]
-        course_map = {c["id"]: c for c in courses}
+        course_map = {}
+        missing = []
+        generation = _course_cache.generation
+        for cid in dict.fromkeys(course_ids):
+            cached = _course_cache.get(cid)
+            if cached is None:
+                missing.append(cid)
+            else:
+                course_map[cid] = cached
+
+        if missing:
+            if _USE_POSTGRES:
+                # One array parameter keeps the statement text fixed, so it is
+                # prepared once whatever the number of ids
+                execute_prepared(cursor, "course_bulk", _BULK_COURSES_SQL, (missing,))
+            else:
+                placeholders = ",".join([_PH] * len(missing))
+                cursor.execute(
+                    f"SELECT {_COURSE_COLUMNS} FROM courses WHERE id IN ({placeholders})",
+                    missing,
+                )
+            for course in parse_json_rows(cursor.fetchall()):
+                _course_cache.set_if_unchanged(course["id"], course, generation)
+                course_map[course["id"]] = course
         ordered = [course_map[cid] for cid in course_ids if cid in course_map]
 
         api_logger.log_request(
@@ -233,15 +320,24 @@ def get_courses_bulk():
 
 @courses_bp.route("/api/courses/<int:course_id>", methods=["GET"])
 def get_course(course_id):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    use_postgres = bool(os.environ.get("DATABASE_URL"))
-    placeholder = "%s" if use_postgres else "?"
+    course = _course_cache.get(course_id)
+    if course is not None:
+        api_logger.log_request(
+            method="GET",
+            path=f"/api/courses/{course_id}",
+            status_code=200,
+            duration_ms=0,
+        )
+        return jsonify(course)
 
+    # Taken before the read: a row read before a concurrent update commits
+    # must not be cached after that update has dropped the entry
+    generation = _course_cache.generation
+    conn = get_db_connection()
     try:
-        cursor.execute(f"SELECT * FROM courses WHERE id = {placeholder}", (course_id,))
+        cursor = conn.cursor()
+        execute_prepared(cursor, "course_get", _SELECT_COURSE_SQL, (course_id,))
         course = cursor.fetchone()
-        conn.close()
 
         if course:
             api_logger.log_request(
@@ -250,7 +346,9 @@ def get_course(course_id):
                 status_code=200,
                 duration_ms=0,
             )
-            return jsonify(parse_json_fields(course))
+            course = parse_json_fields(course)
+            _course_cache.set_if_unchanged(course_id, course, generation)
+            return jsonify(course)
         api_logger.log_request(
             method="GET",
             path=f"/api/courses/{course_id}",
@@ -263,6 +361,8 @@ def get_course(course_id):
         api_logger.log_error(e, {"path": f"/api/courses/{course_id}", "method": "GET"})
         error_dict, status_code = handle_exception(e)
         return jsonify(error_dict), status_code
+    finally:
+        conn.close()
 
 
 @courses_bp.route("/api/courses", methods=["POST"])
@@ -276,65 +376,32 @@ def create_course():
         error_dict, _ = handle_exception(BadRequestError(str(e)))
         return jsonify(error_dict), 400
 
-    use_postgres = bool(os.environ.get("DATABASE_URL"))
-
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
     class_id = (validated_data.class_id or "").strip()
     if class_id:
         filename = f"{class_id}_{uuid.uuid4().hex[:8]}.pdf"
     else:
         filename = f"manual_{uuid.uuid4().hex}.pdf"
 
+    conn = get_db_connection()
     try:
-        if use_postgres:
-            cursor.execute(
-                """INSERT INTO courses (
-                    class_id, title, instructor, location, course_type, cost,
-                    learning_objectives, provided_materials, skills, description, filename
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING id""",
-                (
-                    class_id or None,
-                    validated_data.title,
-                    validated_data.instructor,
-                    validated_data.location,
-                    validated_data.course_type,
-                    validated_data.cost,
-                    to_json(validated_data.learning_objectives),
-                    to_json(validated_data.provided_materials),
-                    to_json(validated_data.skills),
-                    validated_data.description,
-                    filename,
-                ),
-            )
-            course_id = extract_returning_id(cursor.fetchone())
-        else:
-            cursor.execute(
-                """INSERT INTO courses (
-                    class_id, title, instructor, location, course_type, cost,
-                    learning_objectives, provided_materials, skills, description, filename
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    class_id or None,
-                    validated_data.title,
-                    validated_data.instructor,
-                    validated_data.location,
-                    validated_data.course_type,
-                    validated_data.cost,
-                    to_json(validated_data.learning_objectives),
-                    to_json(validated_data.provided_materials),
-                    to_json(validated_data.skills),
-                    validated_data.description,
-                    filename,
-                ),
-            )
-            course_id = cursor.lastrowid
+        course_id = _execute_insert(
+            conn.cursor(),
+            (
+                class_id or None,
+                validated_data.title,
+                validated_data.instructor,
+                validated_data.location,
+                validated_data.course_type,
+                validated_data.cost,
+                to_json(validated_data.learning_objectives),
+                to_json(validated_data.provided_materials),
+                to_json(validated_data.skills),
+                validated_data.description,
+                filename,
+                None,
+            ),
+        )
         conn.commit()
-        conn.close()
         api_logger.log_request(
             method="POST",
             path="/api/courses",
@@ -345,38 +412,23 @@ def create_course():
         return jsonify({"id": course_id, "message": "Course created"}), 201
     except Exception as e:
         api_logger.log_error(e, {"path": "/api/courses", "method": "POST"})
-        conn.close()
         error_dict, status_code = handle_exception(e)
         return jsonify(error_dict), status_code
+    finally:
         conn.close()
-        return jsonify({"error": str(e)}), 400
 
 
 @courses_bp.route("/api/courses/<int:course_id>", methods=["PUT"])
 @require_auth
 def update_course(course_id):
     data = request.json
-    use_postgres = bool(os.environ.get("DATABASE_URL"))
-    placeholder = "%s" if use_postgres else "?"
 
     conn = get_db_connection()
-    cursor = conn.cursor()
-
     try:
-        cursor.execute(
-            f"""UPDATE courses SET
-                class_id = {placeholder},
-                title = {placeholder},
-                instructor = {placeholder},
-                location = {placeholder},
-                course_type = {placeholder},
-                cost = {placeholder},
-                learning_objectives = {placeholder},
-                provided_materials = {placeholder},
-                skills = {placeholder},
-                description = {placeholder},
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = {placeholder}""",
+        execute_prepared(
+            conn.cursor(),
+            "course_update",
+            _UPDATE_COURSE_SQL,
             (
                 data.get("class_id"),
                 data.get("title"),
@@ -392,7 +444,7 @@ def update_course(course_id):
             ),
         )
         conn.commit()
-        conn.close()
+        _course_cache.pop(course_id)
         api_logger.log_request(
             method="PUT",
             path=f"/api/courses/{course_id}",
@@ -402,32 +454,28 @@ def update_course(course_id):
         return jsonify({"message": "Course updated"}), 200
     except Exception as e:
         api_logger.log_error(e, {"path": f"/api/courses/{course_id}", "method": "PUT"})
-        conn.close()
         error_dict, status_code = handle_exception(e)
         return jsonify(error_dict), status_code
+    finally:
+        conn.close()
 
 
 @courses_bp.route("/api/courses/<int:course_id>", methods=["DELETE"])
 @require_auth
 def delete_course(course_id):
-    use_postgres = bool(os.environ.get("DATABASE_URL"))
-    placeholder = "%s" if use_postgres else "?"
-
     conn = get_db_connection()
-    cursor = conn.cursor()
-
     try:
-        cursor.execute(f"SELECT id FROM courses WHERE id = {placeholder}", (course_id,))
+        cursor = conn.cursor()
+        execute_prepared(cursor, "course_exists", _COURSE_EXISTS_SQL, (course_id,))
         if not cursor.fetchone():
-            conn.close()
             error_dict, status_code = handle_exception(
                 NotFoundError("Course", course_id)
             )
             return jsonify(error_dict), status_code
 
-        cursor.execute(f"DELETE FROM courses WHERE id = {placeholder}", (course_id,))
+        execute_prepared(cursor, "course_delete", _DELETE_COURSE_SQL, (course_id,))
         conn.commit()
-        conn.close()
+        _course_cache.pop(course_id)
         api_logger.log_request(
             method="DELETE",
             path=f"/api/courses/{course_id}",
@@ -439,9 +487,10 @@ def delete_course(course_id):
         api_logger.log_error(
             e, {"path": f"/api/courses/{course_id}", "method": "DELETE"}
         )
-        conn.close()
         error_dict, status_code = handle_exception(e)
         return jsonify(error_dict), status_code
+    finally:
+        conn.close()
 
 
 @courses_bp.route("/api/upload", methods=["POST"])
@@ -462,11 +511,11 @@ def upload_pdf():
         )
         return jsonify(error_dict), status_code
 
-    file_data = file.read()
     filename = secure_filename(file.filename) if file.filename else "unknown.pdf"
     unique_filename = f"{uuid.uuid4().hex}_{filename}"
 
-    course_data = extract_from_pdf(file_data, filename)
+    # The upload is already spooled by Werkzeug; parse it in place
+    course_data = extract_from_pdf(file.stream, filename)
     if not course_data:
         error_dict, status_code = handle_exception(
             FileProcessingError("Failed to extract data from PDF")
@@ -478,58 +527,9 @@ def upload_pdf():
         course_data["class_id"] = f"CLASS_{uuid.uuid4().hex[:8].upper()}"
 
     conn = get_db_connection()
-    cursor = conn.cursor()
-
     try:
-        if os.environ.get("DATABASE_URL"):
-            cursor.execute(
-                """INSERT INTO courses (
-                    class_id, title, instructor, location, course_type, cost,
-                    learning_objectives, provided_materials, skills, description, filename, pdf_url
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING id""",
-                (
-                    course_data.get("class_id"),
-                    course_data.get("title"),
-                    course_data.get("instructor"),
-                    course_data.get("location"),
-                    course_data.get("course_type"),
-                    course_data.get("cost"),
-                    to_json(course_data.get("learning_objectives")),
-                    to_json(course_data.get("provided_materials")),
-                    to_json(course_data.get("skills")),
-                    course_data.get("description"),
-                    course_data.get("filename"),
-                    course_data.get("pdf_url"),
-                ),
-            )
-            course_id = extract_returning_id(cursor.fetchone())
-        else:
-            cursor.execute(
-                """INSERT INTO courses (
-                    class_id, title, instructor, location, course_type, cost,
-                    learning_objectives, provided_materials, skills, description, filename, pdf_url
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    course_data.get("class_id"),
-                    course_data.get("title"),
-                    course_data.get("instructor"),
-                    course_data.get("location"),
-                    course_data.get("course_type"),
-                    course_data.get("cost"),
-                    to_json(course_data.get("learning_objectives")),
-                    to_json(course_data.get("provided_materials")),
-                    to_json(course_data.get("skills")),
-                    course_data.get("description"),
-                    course_data.get("filename"),
-                    course_data.get("pdf_url"),
-                ),
-            )
-            course_id = cursor.lastrowid
+        course_id = _execute_insert(conn.cursor(), build_insert_row(course_data))
         conn.commit()
-        conn.close()
         api_logger.log_request(
             method="POST",
             path="/api/upload",
@@ -542,87 +542,111 @@ def upload_pdf():
         ), 201
     except Exception as e:
         api_logger.log_error(e, {"path": "/api/upload", "method": "POST"})
-        conn.close()
         error_dict, status_code = handle_exception(e)
         return jsonify(error_dict), status_code
+    finally:
+        conn.close()
 
 
-def process_single_pdf(file, use_postgres):
+def process_single_pdf(file):
     """Process a single PDF file and return course data."""
-    file_data = file.read()
-    filename = secure_filename(file.filename) if file.filename else "unknown.pdf"
-    unique_filename = f"{uuid.uuid4().hex}_{filename}"
+    return process_pdf_bytes(file.stream, file.filename)
+
 
-    course_data = extract_from_pdf(file_data, filename)
+def process_pdf_bytes(file_data, original_filename):
+    """Extract and insert one PDF (bytes or stream); safe on a worker thread."""
+    course_data = prepare_pdf_course(file_data, original_filename)
     if not course_data:
         return None
+    return insert_course(course_data)
 
-    course_data["filename"] = unique_filename
+
+def prepare_pdf_course(file_data, original_filename):
+    """Extract course data from PDF bytes or a seekable stream, without the DB."""
+    filename = _pdf_filename(original_filename)
+    return finish_pdf_course(extract_from_pdf(file_data, filename), filename)
+
+
+def _pdf_filename(original_filename):
+    return secure_filename(original_filename) if original_filename else "unknown.pdf"
+
+
+def finish_pdf_course(course_data, filename):
+    """Give parsed ``course_data`` a unique stored filename and a class id."""
+    if not course_data:
+        return None
+
+    course_data["filename"] = f"{uuid.uuid4().hex}_{filename}"
     if not course_data.get("class_id"):
         course_data["class_id"] = f"CLASS_{uuid.uuid4().hex[:8].upper()}"
+    return course_data
+
+
+def build_insert_row(course_data):
+    """Parameter tuple for inserting ``course_data`` in ``_INSERT_COLUMNS`` order."""
+    return (
+        course_data.get("class_id"),
+        course_data.get("title"),
+        course_data.get("instructor"),
+        course_data.get("location"),
+        course_data.get("course_type"),
+        course_data.get("cost"),
+        to_json(course_data.get("learning_objectives")),
+        to_json(course_data.get("provided_materials")),
+        to_json(course_data.get("skills")),
+        course_data.get("description"),
+        course_data.get("filename"),
+        course_data.get("pdf_url"),
+    )
 
-    return insert_course(course_data, use_postgres)
 
+_INSERT_PAGE_SIZE = 1000
 
-def insert_course(course_data, use_postgres):
-    """Insert course data into database."""
+
+def _execute_insert(cursor, row):
+    execute_prepared(cursor, "course_insert", _INSERT_COURSE_SQL, row)
+    if _USE_POSTGRES:
+        return extract_returning_id(cursor.fetchone())
+    return cursor.lastrowid
+
+
+def insert_courses(courses):
+    """Insert several courses in one transaction; returns their ids in order."""
+    if not courses:
+        return []
+    rows = [build_insert_row(course_data) for course_data in courses]
     conn = get_db_connection()
     cursor = conn.cursor()
 
     try:
-        if use_postgres:
-            cursor.execute(
-                """INSERT INTO courses (
-                    class_id, title, instructor, location, course_type, cost,
-                    learning_objectives, provided_materials, skills, description, filename, pdf_url
-                )
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING id""",
-                (
-                    course_data.get("class_id"),
-                    course_data.get("title"),
-                    course_data.get("instructor"),
-                    course_data.get("location"),
-                    course_data.get("course_type"),
-                    course_data.get("cost"),
-                    to_json(course_data.get("learning_objectives")),
-                    to_json(course_data.get("provided_materials")),
-                    to_json(course_data.get("skills")),
-                    course_data.get("description"),
-                    course_data.get("filename"),
-                    course_data.get("pdf_url"),
-                ),
+        if _USE_POSTGRES:
+            returned = execute_values(
+                cursor,
+                f"INSERT INTO courses ({_INSERT_COLUMNS}) VALUES %s RETURNING id",
+                rows,
+                # One statement per page keeps huge batches under Postgres'
+                # 65535 bind-parameter limit; fetch collects every page's ids
+                page_size=_INSERT_PAGE_SIZE,
+                fetch=True,
             )
-            course_id = extract_returning_id(cursor.fetchone())
+            course_ids = [extract_returning_id(row) for row in returned]
         else:
-            cursor.execute(
-                """INSERT INTO courses (
-                    class_id, title, instructor, location, course_type, cost,
-                    learning_objectives, provided_materials, skills, description, filename, pdf_url
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    course_data.get("class_id"),
-                    course_data.get("title"),
-                    course_data.get("instructor"),
-                    course_data.get("location"),
-                    course_data.get("course_type"),
-                    course_data.get("cost"),
-                    to_json(course_data.get("learning_objectives")),
-                    to_json(course_data.get("provided_materials")),
-                    to_json(course_data.get("skills")),
-                    course_data.get("description"),
-                    course_data.get("filename"),
-                    course_data.get("pdf_url"),
-                ),
-            )
-            course_id = cursor.lastrowid
+            # executemany can't report per-row ids; the single commit is what
+            # saves the per-file fsync on SQLite
+            course_ids = [_execute_insert(cursor, row) for row in rows]
         conn.commit()
+        return course_ids
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
         conn.close()
-        return {"id": course_id, "message": "Course created", "data": course_data}
-    except Exception as e:
-        conn.close()
-        raise e
+
+
+def insert_course(course_data):
+    """Insert course data into database."""
+    (course_id,) = insert_courses([course_data])
+    return {"id": course_id, "message": "Course created", "data": course_data}
 
 
 @courses_bp.route("/api/upload/batch", methods=["POST"])
@@ -637,49 +661,82 @@ def upload_batch():
         error_dict, status_code = handle_exception(BadRequestError("No files selected"))
         return jsonify(error_dict), status_code
 
-    use_postgres = bool(os.environ.get("DATABASE_URL"))
     results = []
-    successful = 0
-    failed = 0
 
-    for i, file in enumerate(files):
+    # Files are parsed in worker processes, one per task, and inserted here;
+    # streams can't be pickled, so each upload is sent as bytes. Only a couple
+    # of files per worker are read into memory at a time; the rest stay in
+    # Werkzeug's spooled temp files. Results keep the order files were sent in.
+    pool = get_batch_pool()
+    pending = []
+    in_flight = set()
+    for file in files:
         if not allowed_file(file.filename):
+            pending.append((file.filename, None, None))
+            continue
+        if len(in_flight) >= 2 * PDF_BATCH_WORKERS:
+            _, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+        safe_name = _pdf_filename(file.filename)
+        data = file.read()
+        try:
+            future = pool.submit(parse_course_pdf, data, safe_name)
+        except BrokenProcessPool:
+            # A worker died on an earlier file; go on with a fresh pool
+            reset_batch_pool(pool)
+            pool = get_batch_pool()
+            future = pool.submit(parse_course_pdf, data, safe_name)
+        in_flight.add(future)
+        pending.append((file.filename, safe_name, future))
+
+    for filename, safe_name, future in pending:
+        if future is None:
             results.append(
                 {
-                    "filename": file.filename,
+                    "filename": filename,
                     "success": False,
                     "error": "File type not allowed",
                 }
             )
-            failed += 1
             continue
 
         try:
-            result = process_single_pdf(file, use_postgres)
-            if result:
+            course_data = finish_pdf_course(future.result(), safe_name)
+            if course_data:
                 results.append(
                     {
-                        "filename": file.filename,
+                        "filename": filename,
                         "success": True,
-                        "course_id": result["id"],
-                        "title": result["data"].get("title"),
+                        "title": course_data.get("title"),
+                        "data": course_data,
                     }
                 )
-                successful += 1
             else:
                 results.append(
                     {
-                        "filename": file.filename,
+                        "filename": filename,
                         "success": False,
                         "error": "Failed to extract data from PDF",
                     }
                 )
-                failed += 1
         except Exception as e:
-            results.append(
-                {"filename": file.filename, "success": False, "error": str(e)}
-            )
-            failed += 1
+            results.append({"filename": filename, "success": False, "error": str(e)})
+
+    # Every parsed course goes in with one multi-row insert and one commit
+    extracted = [result for result in results if result["success"]]
+    try:
+        course_ids = insert_courses(
+            [result.pop("data") for result in extracted]
+        )
+        for result, course_id in zip(extracted, course_ids):
+            result["course_id"] = course_id
+    except Exception as e:
+        api_logger.log_error(e, {"path": "/api/upload/batch", "method": "POST"})
+        for result in extracted:
+            result.update(success=False, error=str(e))
+            result.pop("title")
+
+    successful = sum(1 for result in results if result["success"])
+    failed = len(results) - successful
 
     api_logger.log_request(
         method="POST",
@@ -736,42 +793,35 @@ def add_review(course_id):
     )
     author_email = profile.get("email") or user.get("email")
 
-    use_postgres = bool(os.environ.get("DATABASE_URL"))
-    placeholder = "%s" if use_postgres else "?"
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
-        cursor.execute(
-            f"SELECT id FROM reviews WHERE course_id = {placeholder} AND user_id = {placeholder}",
-            (course_id, user_id),
+        execute_prepared(
+            cursor, "review_existing", _REVIEW_EXISTING_SQL, (course_id, user_id)
         )
         existing = cursor.fetchone()
 
         if existing:
             review_id = existing["id"] if isinstance(existing, dict) else existing[0]
-            cursor.execute(
-                f"""UPDATE reviews
-                        SET rating = {placeholder}, review = {placeholder}, author_name = {placeholder}, author_email = {placeholder}
-                      WHERE id = {placeholder}""",
+            execute_prepared(
+                cursor,
+                "review_update",
+                _REVIEW_UPDATE_SQL,
                 (rating, review_text, author_name, author_email, review_id),
             )
             conn.commit()
             message = "Review updated"
             status_code = 200
         else:
-            if use_postgres:
-                cursor.execute(
-                    """INSERT INTO reviews (course_id, user_id, rating, review, author_name, author_email)
-                       VALUES (%s, %s, %s, %s, %s, %s) RETURNING id""",
-                    (course_id, user_id, rating, review_text, author_name, author_email),
-                )
+            execute_prepared(
+                cursor,
+                "review_insert",
+                _REVIEW_INSERT_SQL,
+                (course_id, user_id, rating, review_text, author_name, author_email),
+            )
+            if _USE_POSTGRES:
                 review_id = extract_returning_id(cursor.fetchone())
             else:
-                cursor.execute(
-                    """INSERT INTO reviews (course_id, user_id, rating, review, author_name, author_email)
-                       VALUES (?, ?, ?, ?, ?, ?)""",
-                    (course_id, user_id, rating, review_text, author_name, author_email),
-                )
                 review_id = cursor.lastrowid
             conn.commit()
             message = "Review added"
@@ -797,16 +847,11 @@ def add_review(course_id):
 
 @courses_bp.route("/api/courses/<int:course_id>/reviews", methods=["GET"])
 def get_reviews(course_id):
-    use_postgres = bool(os.environ.get("DATABASE_URL"))
-    placeholder = "%s" if use_postgres else "?"
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
-        cursor.execute(
-            f"""SELECT id, course_id, user_id, rating, review, author_name, author_email, created_at
-                FROM reviews WHERE course_id = {placeholder}
-                ORDER BY created_at DESC""",
-            (course_id,),
+        execute_prepared(
+            cursor, "course_reviews", _REVIEWS_FOR_COURSE_SQL, (course_id,)
         )
         rows = cursor.fetchall()
         reviews = []
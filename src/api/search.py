@@ -1,17 +1,41 @@
-import json
 import os
+
+import orjson
 from flask import Blueprint, Response, jsonify, request
 from typing import Optional
 
-from src.core.utils import parse_json_fields
-from src.core.errors import BadRequestError, handle_exception
+from src.core.config import DATABASE_URL
+from src.core.utils import parse_json_rows
+from src.core.errors import (
+    AuthenticationError,
+    BadRequestError,
+    NotFoundError,
+    handle_exception,
+)
 from src.core.logging import api_logger
-from src.core.auth import require_auth
+from src.core.auth import auth_service, require_auth
 from src.models.database import get_db_connection
 from src.models.schemas import SearchQuery
+from src.services.conversation_store import conversation_store
 
 search_bp = Blueprint("search", __name__)
 
+# The backend is fixed at import, so the SQL below is specialized once.
+_USE_POSTGRES = bool(DATABASE_URL)
+_PH = "%s" if _USE_POSTGRES else "?"
+_LIKE = "ILIKE" if _USE_POSTGRES else "LIKE"
+# Each column has its own pg_trgm GIN index on Postgres, so the OR becomes a
+# BitmapOr of index scans instead of a sequential scan
+_FALLBACK_TERMS = (
+    "title",
+    "class_id",
+    "description",
+    "instructor",
+    "location",
+    "course_type",
+)
+_FALLBACK_WHERE = " OR ".join(f"{term} {_LIKE} {_PH}" for term in _FALLBACK_TERMS)
+
 
 @search_bp.route("/api/config", methods=["GET"])
 def get_config():
@@ -30,8 +54,6 @@ def get_config():
 
 
 rag_service = None
-graph_rag_service = None
-graph_rag_provider = None
 
 
 def get_rag():
@@ -50,17 +72,15 @@ def get_rag():
 
 
 def get_graph_rag():
-    global graph_rag_service, graph_rag_provider
-    provider_override = request.args.get("provider")
-    env_provider = os.environ.get("GRAPH_RAG_VECTOR_PROVIDER", "chroma")
-    provider = provider_override or env_provider
+    from src.services.graph_rag_service import shared_graph_rag_service
+
+    return shared_graph_rag_service(request.args.get("provider"))
+
 
-    if graph_rag_service is None or provider != graph_rag_provider:
-        from src.services.graph_rag_service import get_graph_rag_service
+if os.environ.get("GRAPH_RAG_WARMUP", "false").lower() == "true":
+    from src.services.graph_rag_service import warm_graph_rag_service
 
-        graph_rag_service = get_graph_rag_service(provider)
-        graph_rag_provider = provider
-    return graph_rag_service
+    warm_graph_rag_service()
 
 
 @search_bp.route("/api/search", methods=["GET"])
@@ -115,14 +135,11 @@ def semantic_search():
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        use_postgres = bool(os.environ.get("DATABASE_URL"))
-        placeholder = "%s" if use_postgres else "?"
-
-        placeholders = ",".join([placeholder] * len(paginated_ids))
+        placeholders = ",".join([_PH] * len(paginated_ids))
         cursor.execute(
             f"SELECT * FROM courses WHERE id IN ({placeholders})", paginated_ids
         )
-        courses = {c["id"]: parse_json_fields(c) for c in cursor.fetchall()}
+        courses = {c["id"]: c for c in parse_json_rows(cursor.fetchall())}
         conn.close()
 
         ordered_results = []
@@ -164,29 +181,30 @@ def semantic_search():
         try:
             conn = get_db_connection()
             cursor = conn.cursor()
-            use_postgres = bool(os.environ.get("DATABASE_URL"))
-            placeholder = "%s" if use_postgres else "?"
-            if use_postgres:
-                where = (
-                    "title ILIKE %s OR class_id ILIKE %s OR description ILIKE %s "
-                    "OR instructor ILIKE %s OR location ILIKE %s OR course_type ILIKE %s"
-                )
-            else:
-                where = (
-                    "title LIKE ? OR class_id LIKE ? OR description LIKE ? "
-                    "OR instructor LIKE ? OR location LIKE ? OR course_type LIKE ?"
-                )
+            where = _FALLBACK_WHERE
             pattern = f"%{query}%"
-            params = [pattern, pattern, pattern, pattern, pattern, pattern]
-            cursor.execute(f"SELECT COUNT(*) FROM courses WHERE {where}", params)
-            count_row = cursor.fetchone()
-            total = count_row[0] if count_row else 0
-
+            params = [pattern] * len(_FALLBACK_TERMS)
+            # The window count rides along with the page, so the OR of LIKEs
+            # is evaluated once rather than again in a separate COUNT(*)
             cursor.execute(
-                f"SELECT * FROM courses WHERE {where} ORDER BY id LIMIT {placeholder} OFFSET {placeholder}",
+                f"""
+                SELECT *, COUNT(*) OVER () AS total_count
+                FROM courses
+                WHERE {where}
+                ORDER BY id LIMIT {_PH} OFFSET {_PH}
+                """,
                 [*params, limit, offset],
             )
-            courses = [parse_json_fields(c) for c in cursor.fetchall()]
+            courses = parse_json_rows(cursor.fetchall())
+            total = 0
+            for course in courses:
+                total = course.pop("total_count")
+            if not courses and offset:
+                # Past the last page there is no row to carry the count
+                cursor.execute(
+                    f"SELECT COUNT(*) AS total FROM courses WHERE {where}", params
+                )
+                total = cursor.fetchone()["total"]
             conn.close()
 
             return jsonify(
@@ -279,6 +297,38 @@ def graph_neighbors():
         return jsonify(error_dict), status_code
 
 
+_SSE_PREFIXES = {
+    name: f"event: {name}\ndata: ".encode()
+    for name in (
+        "text_delta", "retract", "tool_call", "tool_result", "message_end", "error"
+    )
+}
+
+
+def _chat_user_id() -> Optional[str]:
+    """The caller's user id, or None for an anonymous chat request."""
+    if auth_service.dev_bypass:
+        return "dev_user"
+    token = auth_service.get_token_from_header()
+    if not token:
+        return None
+    user = auth_service.verify_token(token)
+    return user.get("sub") or user.get("id") or user.get("email")
+
+
+def _record_turn(events, conversation_id, user_id, history, message):
+    """Pass chat events through, storing the finished turn on ``message_end``."""
+    for event_name, payload in events:
+        if event_name == "message_end":
+            payload = {**payload, "conversation_id": conversation_id}
+            # Blocked turns are not stored, so they never reach the model again
+            if not payload.get("blocked"):
+                conversation_store.append(
+                    conversation_id, user_id, history, message, payload["message"]
+                )
+        yield event_name, payload
+
+
 @search_bp.route("/api/chat", methods=["POST"])
 def chat():
     data = request.get_json(silent=True) or {}
@@ -287,36 +337,75 @@ def chat():
     try:
         from src.services.chat_service import chat_service
 
+        # Without a history field an authenticated caller's conversation is
+        # kept server-side; anonymous callers keep the stateless behaviour.
+        message = (data.get("message") or "").strip()
+        conversation_id = data.get("conversation_id")
+        user_id = _chat_user_id() if data.get("history") is None and message else None
+        if user_id is None:
+            if conversation_id and data.get("history") is None:
+                raise AuthenticationError(
+                    "Authorization token required to continue a conversation"
+                )
+            events = chat_service.stream_chat(data)
+        else:
+            if conversation_id:
+                conversation_id = str(conversation_id)
+                history = conversation_store.load(conversation_id, user_id)
+                if history is None:
+                    raise NotFoundError("Conversation", conversation_id)
+            else:
+                conversation_id = conversation_store.create(user_id)
+                history = []
+            events = _record_turn(
+                chat_service.stream_chat({**data, "history": history}),
+                conversation_id,
+                user_id,
+                history,
+                message,
+            )
+
         if stream:
             def sse_stream():
-                for event_name, payload in chat_service.stream_chat(data):
-                    yield f"event: {event_name}\n"
-                    yield f"data: {json.dumps(payload)}\n\n"
-
-            return Response(sse_stream(), mimetype="text/event-stream")
+                # One pre-encoded frame per event: no str round-trip per token
+                for event_name, payload in events:
+                    prefix = _SSE_PREFIXES.get(event_name)
+                    if prefix is None:
+                        prefix = f"event: {event_name}\ndata: ".encode()
+                    yield prefix + orjson.dumps(payload) + b"\n\n"
+
+            return Response(
+                sse_stream(), mimetype="text/event-stream", direct_passthrough=True
+            )
 
-        final_message = ""
+        deltas = []
+        final_message = None
         artifacts = []
         mode = data.get("mode") or "standard"
         model = None
+        conversation_id = None
         tool_events = []
-        for event_name, payload in chat_service.stream_chat(data):
+        for event_name, payload in events:
             if event_name == "text_delta":
-                final_message += payload.get("delta", "")
+                deltas.append(payload.get("delta", ""))
+            elif event_name == "retract":
+                deltas = []
             elif event_name == "message_end":
-                final_message = payload.get("message", final_message)
+                final_message = payload.get("message")
                 artifacts = payload.get("artifacts", [])
                 mode = payload.get("mode", mode)
                 model = payload.get("model")
+                conversation_id = payload.get("conversation_id")
             elif event_name in {"tool_call", "tool_result", "error"}:
                 tool_events.append({"event": event_name, **payload})
 
         return jsonify({
-            "message": final_message,
+            "message": "".join(deltas) if final_message is None else final_message,
             "artifacts": artifacts,
             "tool_events": tool_events,
             "mode": mode,
             "model": model,
+            "conversation_id": conversation_id,
         })
     except Exception as e:
         api_logger.log_error(e, {"path": "/api/chat", "method": "POST"})
@@ -324,6 +413,27 @@ def chat():
         return jsonify(error_dict), status_code
 
 
+def _invalidate_chat_cache() -> None:
+    """Cached chat answers may cite stale courses once the index changes."""
+    from src.services.chat_service import chat_service
+
+    chat_service.invalidate_response_cache()
+
+
+@search_bp.route("/api/chat/cache/invalidate", methods=["POST"])
+@require_auth
+def invalidate_chat_cache():
+    try:
+        _invalidate_chat_cache()
+        return jsonify({"message": "Chat caches cleared"})
+    except Exception as e:
+        api_logger.log_error(
+            e, {"path": "/api/chat/cache/invalidate", "method": "POST"}
+        )
+        error_dict, status_code = handle_exception(e)
+        return jsonify(error_dict), status_code
+
+
 @search_bp.route("/api/index", methods=["POST"])
 @require_auth
 def index_courses():
@@ -331,7 +441,7 @@ def index_courses():
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM courses")
-        courses = [parse_json_fields(c) for c in cursor.fetchall()]
+        courses = parse_json_rows(cursor.fetchall())
         conn.close()
 
         if not courses:
@@ -346,6 +456,7 @@ def index_courses():
             duration_ms=0,
             count=len(courses),
         )
+        _invalidate_chat_cache()
         return jsonify({"message": "Courses indexed", "count": len(courses)})
     except Exception as e:
         api_logger.log_error(e, {"path": "/api/index", "method": "POST"})
@@ -360,7 +471,7 @@ def graph_index_courses():
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM courses")
-        courses = [parse_json_fields(c) for c in cursor.fetchall()]
+        courses = parse_json_rows(cursor.fetchall())
         conn.close()
 
         if not courses:
@@ -388,6 +499,7 @@ def graph_index_courses():
             count=len(courses),
             params={"limit": course_limit} if course_limit else None,
         )
+        _invalidate_chat_cache()
         return jsonify(
             {
                 "message": "GraphRAG collections indexed",
@@ -408,7 +520,7 @@ def reindex_courses():
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM courses")
-        courses = [parse_json_fields(c) for c in cursor.fetchall()]
+        courses = parse_json_rows(cursor.fetchall())
         conn.close()
 
         if not courses:
@@ -427,6 +539,7 @@ def reindex_courses():
             duration_ms=0,
             count=len(courses),
         )
+        _invalidate_chat_cache()
         return jsonify(
             {"message": "Vector store wiped and re-indexed", "count": len(courses)}
         )
@@ -1,4 +1,6 @@
+import hashlib
 import os
+import time
 from functools import wraps
 from typing import Optional, Dict, Any
 import requests
@@ -14,6 +16,7 @@ from src.core.config import (
     DEV_BYPASS_AUTH,
     ENVIRONMENT,
 )
+from src.core.cache import TTLCache
 from src.core.errors import AuthenticationError, handle_exception
 from src.core.logging import get_logger
 
@@ -21,6 +24,10 @@ logger = get_logger("auth")
 
 _jwks_client = None
 
+# Short TTL so revoked sessions stop working quickly; exp is always honoured too
+VERIFIED_TOKEN_TTL = float(os.environ.get("AUTH_TOKEN_CACHE_TTL", "10"))
+VERIFIED_TOKEN_CACHE_SIZE = 10_000
+
 
 def get_jwks_client():
     global _jwks_client
@@ -36,6 +43,9 @@ class AuthService:
         self.service_key = SUPABASE_SERVICE_KEY
         self.dev_bypass = DEV_BYPASS_AUTH
         self.environment = ENVIRONMENT
+        self._verified_tokens = TTLCache(
+            maxsize=VERIFIED_TOKEN_CACHE_SIZE, ttl=VERIFIED_TOKEN_TTL
+        )
 
     def verify_token(self, token: str) -> Dict[str, Any]:
         if not token:
@@ -53,6 +63,21 @@ class AuthService:
             logger.warning("Supabase not configured, rejecting request")
             raise AuthenticationError("Authentication not configured")
 
+        # Key on a digest so raw bearer tokens are never held in memory
+        cache_key = hashlib.sha256(token.encode()).digest()
+        cached = self._verified_tokens.get(cache_key)
+        if cached is not None:
+            return dict(cached)
+
+        payload = self._decode_token(token)
+        # Only successful verifications are cached, and never past the token's exp
+        ttl = VERIFIED_TOKEN_TTL
+        if isinstance(payload.get("exp"), (int, float)):
+            ttl = min(ttl, payload["exp"] - time.time())
+        self._verified_tokens.set(cache_key, payload, ttl=ttl)
+        return dict(payload)
+
+    def _decode_token(self, token: str) -> Dict[str, Any]:
         try:
             # Supabase tokens - decode without verification to get user info
             # The token came from Supabase login, so we trust it
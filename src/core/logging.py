@@ -70,10 +70,20 @@ class LogContext:
 
 
 class RequestLogger:
+    """Structured request/error logging.
+
+    Each method checks the level before building its payload (request id,
+    nested dicts), so disabled levels cost one cached lookup per call. The
+    check is made per call rather than at import so LOG_LEVEL changes made
+    at runtime still apply.
+    """
+
     def __init__(self, logger_name: str = "api"):
         self.logger = get_logger(logger_name)
 
     def log_info(self, message: str, extra: Optional[Dict[str, Any]] = None):
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         payload = extra or {}
         if "request_id" not in payload:
             payload["request_id"] = str(uuid4())
@@ -89,6 +99,8 @@ class RequestLogger:
         user_id: Optional[str] = None,
         **extra,
     ):
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
         self.logger.info(
             f"{method} {path} {status_code}",
             extra={
@@ -110,6 +122,8 @@ class RequestLogger:
         context: Dict[str, Any],
         request_id: Optional[str] = None,
     ):
+        if not self.logger.isEnabledFor(logging.ERROR):
+            return
         self.logger.error(
             str(error),
             extra={
@@ -0,0 +1,103 @@
+import threading
+import time
+from typing import Any, Callable, Optional, Tuple, Type
+
+from src.core.errors import ExternalServiceError
+from src.core.logging import get_logger
+
+logger = get_logger("resilience")
+
+
+class CircuitOpenError(ExternalServiceError):
+    """Raised without calling upstream while a circuit breaker is open."""
+
+    def __init__(self, service: str, retry_after: float):
+        super().__init__(
+            service,
+            "temporarily unavailable, please retry shortly",
+            details={"retry_after": round(retry_after, 1)},
+        )
+        self.status_code = 503
+
+
+class CircuitBreaker:
+    """Fail fast after repeated upstream failures, then probe for recovery.
+
+    After ``fail_max`` consecutive failures the breaker opens and every call
+    raises :class:`CircuitOpenError` for ``reset_timeout`` seconds. The first
+    call after that is let through as a trial: success closes the breaker,
+    failure re-opens it for another window.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fail_max: int = 5,
+        reset_timeout: float = 30.0,
+        failure_exceptions: Tuple[Type[BaseException], ...] = (Exception,),
+        is_failure: Optional[Callable[[Any], bool]] = None,
+    ):
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self.failure_exceptions = failure_exceptions
+        self.is_failure = is_failure
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def _before_call(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+            if remaining > 0 or self._trial_in_flight:
+                raise CircuitOpenError(self.name, max(remaining, 0.0))
+            self._trial_in_flight = True
+
+    def _on_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"{self.name} circuit closed")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def _on_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.fail_max:
+                if self._opened_at is None:
+                    logger.warning(
+                        f"{self.name} circuit opened after {self._failures} failures"
+                    )
+                self._opened_at = time.monotonic()
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except self.failure_exceptions:
+            self._on_failure()
+            raise
+        except BaseException:
+            # Not an upstream failure; don't leave a half-open trial dangling
+            with self._lock:
+                self._trial_in_flight = False
+            raise
+        if self.is_failure is not None and self.is_failure(result):
+            self._on_failure()
+        else:
+            self._on_success()
+        return result
@@ -0,0 +1,76 @@
+"""Cheap prompt token estimates for budgeting chat context."""
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List
+
+try:  # Optional dependency for exact counts
+    import tiktoken
+
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:  # pragma: no cover - exercised when tiktoken is absent
+    _ENCODING = None
+
+# Role markers and separators add a few tokens per chat message
+MESSAGE_OVERHEAD_TOKENS = 4
+# Assistant turns older than this many messages are cut to a one-line summary
+COMPACT_KEEP_RECENT = 4
+SUMMARY_MAX_CHARS = 200
+
+_DISPLAY_MARKER_RE = re.compile(r"display\(\d+\)")
+_MARKDOWN_RE = re.compile(r"[*_`#>]+|^\s*[-+]\s+", re.MULTILINE)
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s")
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count for ``text``: exact with tiktoken, else ~4 chars per token."""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def trim_history(history: List[Dict[str, Any]], budget: int) -> List[Dict[str, Any]]:
+    """Keep the most recent messages whose combined estimate fits ``budget``."""
+    kept: List[Dict[str, Any]] = []
+    used = 0
+    for message in reversed(history):
+        cost = estimate_tokens(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+        if used + cost > budget:
+            break
+        kept.append(message)
+        used += cost
+    kept.reverse()
+    return kept
+
+
+def summarize_one_line(content: str) -> str:
+    """First sentence of ``content`` without markdown, plus its course cards."""
+    markers = list(dict.fromkeys(_DISPLAY_MARKER_RE.findall(content)))
+    text = " ".join(_MARKDOWN_RE.sub("", _DISPLAY_MARKER_RE.sub("", content)).split())
+    first = _SENTENCE_END_RE.split(text, 1)[0]
+    if len(first) > SUMMARY_MAX_CHARS:
+        first = first[:SUMMARY_MAX_CHARS].rstrip()
+    if first != text:
+        first += "…"
+    return " ".join([first, *markers]) if markers else first
+
+
+def compact_history(
+    history: List[Dict[str, Any]], keep_recent: int = COMPACT_KEEP_RECENT
+) -> List[Dict[str, Any]]:
+    """Summarize assistant turns older than the last ``keep_recent`` messages.
+
+    Old answers are mostly course listings the user already sees as cards, so
+    only their opening line and ``display(id)`` markers are resent. User turns
+    and recent messages are kept verbatim.
+    """
+    cutoff = len(history) - keep_recent
+    compacted: List[Dict[str, Any]] = []
+    for index, message in enumerate(history):
+        if index < cutoff and message.get("role") == "assistant":
+            summary = summarize_one_line(message.get("content") or "")
+            message = {**message, "content": summary}
+        compacted.append(message)
+    return compacted
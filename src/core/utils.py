@@ -1,6 +1,8 @@
 import json
 from typing import List, Optional
 
+import orjson
+
 from src.core.config import LOCATION_CLEANUP
 
 
@@ -24,20 +26,47 @@ def text_to_list(text: Optional[str]) -> Optional[List[str]]:
     return items if items else None
 
 
+JSON_FIELDS = ("learning_objectives", "provided_materials", "skills")
+
+
 def to_json(val):
+    # Stored text keeps stdlib spacing so existing rows and new ones match
     return json.dumps(val) if val is not None else None
 
 
 def parse_json_fields(course):
     if not course:
         return course
-    json_fields = ["learning_objectives", "provided_materials", "skills"]
     result = dict(course) if not isinstance(course, dict) else course.copy()
-    for field in json_fields:
+    for field in JSON_FIELDS:
         val = result.get(field)
         if val and isinstance(val, str):
             try:
-                result[field] = json.loads(val)
-            except json.JSONDecodeError:
+                result[field] = orjson.loads(val)
+            except orjson.JSONDecodeError:
                 pass
     return result
+
+
+def parse_json_rows(rows):
+    """:func:`parse_json_fields` for a whole result set.
+
+    The JSON columns present are looked up once on the first row, then each
+    column is decoded across all rows in one pass. On Postgres they are
+    ``jsonb`` and arrive already decoded, so only legacy TEXT values are
+    parsed here.
+    """
+    results = [dict(row) for row in rows]
+    if not results:
+        return results
+    fields = [field for field in JSON_FIELDS if field in results[0]]
+    loads, decode_error = orjson.loads, orjson.JSONDecodeError
+    for field in fields:
+        for result in results:
+            val = result[field]
+            if val and type(val) is str:
+                try:
+                    result[field] = loads(val)
+                except decode_error:
+                    pass
+    return results
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Iterator
 
 
 class VectorStoreProvider(ABC):
@@ -23,6 +23,10 @@ class VectorStoreProvider(ABC):
     def close(self) -> None:
         pass
 
+    def iter_ids(self, page_size: int = 1000) -> Iterator[str]:
+        """Yield every stored chunk id one page at a time; optional for providers."""
+        raise NotImplementedError(f"{type(self).__name__} cannot list stored ids")
+
 
 class EmbeddingProvider(ABC):
     @abstractmethod
@@ -1,6 +1,6 @@
 import logging
 import os
-from typing import Any
+from typing import Any, Iterator
 
 import chromadb
 from chromadb.config import Settings
@@ -76,6 +76,15 @@ class ChromaDBProvider(VectorStoreProvider):
     def query(self, query_texts: list[str], n_results: int = 5) -> dict:
         return self.collection.query(query_texts=query_texts, n_results=n_results)
 
+    def iter_ids(self, page_size: int = 1000) -> Iterator[str]:
+        offset = 0
+        while True:
+            ids = self.collection.get(include=[], limit=page_size, offset=offset)["ids"]
+            yield from ids
+            if len(ids) < page_size:
+                return
+            offset += page_size
+
     def get_embeddings(self, texts: list[str]) -> list[list[float]]:
         return self.collection._embedding_function(texts)
 
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import os
 from typing import List
 
 from chromadb import Documents, EmbeddingFunction, Embeddings
@@ -12,7 +13,7 @@ class OpenRouterEmbedder(EmbeddingFunction):
         self,
         api_key: str,
         model: str = "google/gemini-embedding-001",
-        batch_size: int = 64,
+        batch_size: int | None = None,
         timeout: int = 60,
         max_chars: int | None = None,
     ) -> None:
@@ -20,7 +21,7 @@ class OpenRouterEmbedder(EmbeddingFunction):
 
         self.api_key = api_key
         self.model = model
-        self.batch_size = batch_size
+        self.batch_size = batch_size or int(os.environ.get("EMBEDDING_BATCH_SIZE", "64"))
         self.timeout = timeout
         self.max_chars = max_chars
         self.base_url = "https://openrouter.ai/api/v1/embeddings"
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import os
 import uuid
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
 
 from src.core.vector_store.base import VectorStoreProvider
 from src.core.vector_store.embeddings import OpenRouterEmbedder
@@ -139,13 +139,31 @@ class QdrantVectorStoreProvider(VectorStoreProvider):
                 payload = getattr(hit, "payload", None) or {}
                 documents.append(payload.get("document", ""))
                 metadatas.append({k: v for k, v in payload.items() if k != "document"})
-                distances.append(float(getattr(hit, "score", 0.0)))
+                # Qdrant reports cosine similarity; callers expect a distance
+                distances.append(1.0 - float(getattr(hit, "score", 0.0)))
             results["ids"].append(ids)
             results["documents"].append(documents)
             results["metadatas"].append(metadatas)
             results["distances"].append(distances)
         return results
 
+    def iter_ids(self, page_size: int = 1000) -> Iterator[str]:
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                limit=page_size,
+                offset=offset,
+                with_payload=["chunk_id"],
+                with_vectors=False,
+            )
+            for point in points:
+                chunk_id = (point.payload or {}).get("chunk_id")
+                if chunk_id:
+                    yield chunk_id
+            if offset is None:
+                return
+
     def get_embeddings(self, texts: list[str]) -> list[list[float]]:
         return self.embedder(texts) if texts else []
 
@@ -108,6 +108,11 @@ class VertexAIVectorSearchProvider(VectorStoreProvider):
         # V2 API client (lazy-loaded)
         self._collection_client = None
 
+        # Query clients are reused so each search does not pay for a new
+        # channel (auth + TLS handshake)
+        self._match_client = None
+        self._search_client = None
+
     @property
     def index(self):
         """Lazy-load V1 Index (legacy)"""
@@ -127,6 +132,22 @@ class VertexAIVectorSearchProvider(VectorStoreProvider):
             self._collection_client = vectorsearch_v1beta.VectorSearchServiceClient()
         return self._collection_client
 
+    @property
+    def match_client(self):
+        """Lazy-load V1 MatchServiceClient (legacy)"""
+        if self._match_client is None:
+            from google.cloud import aiplatform_v1
+            self._match_client = aiplatform_v1.MatchServiceClient()
+        return self._match_client
+
+    @property
+    def search_client(self):
+        """Lazy-load V2 DataObjectSearchServiceClient"""
+        if self._search_client is None:
+            from google.cloud import vectorsearch_v1beta
+            self._search_client = vectorsearch_v1beta.DataObjectSearchServiceClient()
+        return self._search_client
+
     def add(self, ids: list[str], documents: list[str], metadatas: list[dict]) -> None:
         """Add documents to the vector store (V1 or V2)"""
         if self.api_version == "v2":
@@ -229,12 +250,10 @@ class VertexAIVectorSearchProvider(VectorStoreProvider):
                 "No index endpoint configured. Set VERTEX_AI_INDEX_ENDPOINT_ID environment variable"
             )
 
-        from google.cloud import aiplatform_v1
         from google.cloud.aiplatform_v1 import types
 
         query_embedding = self.get_embeddings(query_texts)[0]
 
-        client = aiplatform_v1.MatchServiceClient()
         request = types.FindNeighborsRequest(
             index_endpoint=self._get_index_endpoint_name(),
             query={
@@ -244,7 +263,7 @@ class VertexAIVectorSearchProvider(VectorStoreProvider):
             neighbor_count=n_results,
         )
 
-        response = client.find_neighbors(request)
+        response = self.match_client.find_neighbors(request)
 
         results = {
             "ids": [[n.datapoint_id for n in response.neighbors]]
@@ -283,9 +302,7 @@ class VertexAIVectorSearchProvider(VectorStoreProvider):
             vector_search=vector_search,
         )
 
-        # Use DataObjectSearchServiceClient for V2 search
-        search_client = vectorsearch_v1beta.DataObjectSearchServiceClient()
-        response = search_client.search_data_objects(request=request)
+        response = self.search_client.search_data_objects(request=request)
 
         # Parse response
         ids = []
@@ -321,4 +338,14 @@ class VertexAIVectorSearchProvider(VectorStoreProvider):
         return self.embedding_provider.embed(texts)
 
     def close(self) -> None:
-        pass
+        for client in (self._match_client, self._search_client, self._collection_client):
+            if client is None:
+                continue
+            try:
+                client.transport.close()
+            except Exception:
+                pass
+        self._match_client = None
+        self._search_client = None
+        self._collection_client = None
+
@@ -1,38 +1,310 @@
+import atexit
+import io
 import os
 import re
 import json
+import hashlib
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from itertools import islice
 from pathlib import Path
-from typing import Dict, Optional
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Union
 
 import PyPDF2
 
+try:  # Optional C-backed extractor; PyPDF2 remains the fallback
+    import pypdfium2 as pdfium
+except ImportError:  # pragma: no cover - exercised when pypdfium2 is absent
+    pdfium = None
+
 from src.core.utils import clean_location, text_to_list
 from src.core.logging import get_logger
 from src.models.database import DatabaseManager
 
 logger = get_logger("models")
 
-__all__ = ["CourseExtractor", "DatabaseManager"]
+__all__ = [
+    "COURSE_END_MARKERS",
+    "COURSE_EXTRACTOR",
+    "CourseExtractor",
+    "DatabaseManager",
+    "extract_pdf_text",
+    "get_batch_pool",
+    "parse_course_pdf",
+    "reset_batch_pool",
+    "reset_page_pool",
+]
+
+# "pdfium" (default, when installed) or "pypdf2"
+PDF_TEXT_BACKEND = os.environ.get("PDF_TEXT_BACKEND", "pdfium").lower()
+# PyPDF2 decodes pages in pure Python, so long documents are split across
+# processes. PDFium is native and not thread-safe, so it always runs inline,
+# one document at a time per process (see _pdfium_lock).
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get("PDF_PARALLEL_MIN_PAGES", "16"))
+PDF_PAGE_WORKERS = int(
+    os.environ.get("PDF_PAGE_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+# Batch uploads parse one whole file per task in worker processes: the
+# parser is pure Python and PDFium can't be shared between threads.
+PDF_BATCH_WORKERS = int(
+    os.environ.get("PDF_BATCH_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+_PAGES_PER_TASK = 4
+_page_pool: Optional[ProcessPoolExecutor] = None
+_batch_pool: Optional[ProcessPoolExecutor] = None
+_page_pool_lock = threading.Lock()
+# PDFium keeps global state and must not be entered from two threads at once;
+# single uploads run on request threads, so every document holds this
+_pdfium_lock = threading.Lock()
+
+
+# The parser reads nothing past the "Class ID:" that closes the course
+# description, so extraction can stop at that page instead of reading the
+# whole document.
+COURSE_END_MARKERS = ("Course Description", "Class ID:")
+# Course sheets are a few pages long; a document whose markers haven't shown
+# up by this page isn't one, so the rest of it is not worth extracting.
+COURSE_MAX_PAGES = int(os.environ.get("PDF_COURSE_MAX_PAGES", "30"))
+# Part of the extraction cache key: bump it whenever extraction or parsing
+# changes, so results cached by an older parser are not served again.
+EXTRACTOR_VERSION = 1
+
+_CLASS_ID_FILENAME_RE = re.compile(r"class_(\d+)", re.IGNORECASE)
+_OBJECTIVES_RE = re.compile(
+    r"Learning Objectives\s*\n(.+?)Provided Materials", re.DOTALL
+)
+_MATERIALS_RE = re.compile(r"Provided Materials\s*\n(.+?)Skills Developed", re.DOTALL)
+_SKILLS_RE = re.compile(r"Skills Developed\s*\n(.+?)Course Description", re.DOTALL)
+_DESCRIPTION_RE = re.compile(r"Course Description\s*\n(.+?)Class ID:", re.DOTALL)
+
+
+def _pdfium_pages(source: Union[bytes, str, BinaryIO]) -> Iterator[str]:
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(source)
+        try:
+            for page in pdf:
+                textpage = page.get_textpage()
+                try:
+                    text = textpage.get_text_range()
+                finally:
+                    textpage.close()
+                    page.close()
+                # PDFium separates lines with CRLF; the parser splits on "\n"
+                yield text.replace("\r\n", "\n")
+        finally:
+            pdf.close()
+
+
+def _pypdf2_reader(source: Union[bytes, str, BinaryIO]) -> PyPDF2.PdfReader:
+    return PyPDF2.PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
+
+
+def _pypdf2_page_range(source: Union[bytes, str], start: int, stop: int) -> List[str]:
+    """Text of pages ``start``..``stop``; runs in a page-pool worker process."""
+    pages = _pypdf2_reader(source).pages
+    return [pages[index].extract_text() or "" for index in range(start, stop)]
+
+
+def _get_page_pool() -> ProcessPoolExecutor:
+    global _page_pool
+    if _page_pool is None:
+        with _page_pool_lock:
+            if _page_pool is None:
+                # spawn: forking a threaded server process is unsafe
+                _page_pool = ProcessPoolExecutor(
+                    max_workers=PDF_PAGE_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _page_pool
+
+
+def _serial_pages_only() -> None:
+    # Batch workers already take one file each; don't fan out pages again
+    global PDF_PAGE_WORKERS
+    PDF_PAGE_WORKERS = 1
+
+
+def get_batch_pool() -> ProcessPoolExecutor:
+    """Process pool that runs :func:`parse_course_pdf` for batch uploads."""
+    global _batch_pool
+    if _batch_pool is None:
+        with _page_pool_lock:
+            if _batch_pool is None:
+                _batch_pool = ProcessPoolExecutor(
+                    max_workers=PDF_BATCH_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_serial_pages_only,
+                )
+    return _batch_pool
+
+
+def reset_page_pool() -> None:
+    """Shut down the page pool's workers; the next parallel read starts a new pool."""
+    global _page_pool
+    with _page_pool_lock:
+        page_pool, _page_pool = _page_pool, None
+    if page_pool is not None:
+        page_pool.shutdown(wait=True, cancel_futures=True)
+
+
+def reset_batch_pool(broken: Optional[ProcessPoolExecutor] = None) -> None:
+    """Drop ``broken`` after a worker died so the next call starts a new pool.
+
+    Without ``broken`` the current pool, if any, is shut down.
+    """
+    global _batch_pool
+    with _page_pool_lock:
+        if broken is None:
+            broken = _batch_pool
+        # Another request may already have replaced it
+        if _batch_pool is broken:
+            _batch_pool = None
+    if broken is not None:
+        broken.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(reset_page_pool)
+atexit.register(reset_batch_pool)
+
+
+def _parallel_pypdf2_pages(source: Union[bytes, str], page_count: int) -> Iterator[str]:
+    ranges = [
+        (start, min(start + _PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, _PAGES_PER_TASK)
+    ]
+    pool = _get_page_pool()
+    # One wave of ranges per worker at a time, so a caller that stops early
+    # (stop markers) does not leave the rest of the document queued
+    for wave in range(0, len(ranges), PDF_PAGE_WORKERS):
+        futures = [
+            pool.submit(_pypdf2_page_range, source, start, stop)
+            for start, stop in ranges[wave : wave + PDF_PAGE_WORKERS]
+        ]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def _pypdf2_pages(source: Union[bytes, str, BinaryIO]) -> Iterator[str]:
+    reader = _pypdf2_reader(source)
+    page_count = len(reader.pages)
+    if PDF_PAGE_WORKERS > 1 and page_count >= PDF_PARALLEL_MIN_PAGES:
+        if not isinstance(source, (bytes, str)):
+            # Workers need something picklable
+            source.seek(0)
+            source = source.read()
+        yield from _parallel_pypdf2_pages(source, page_count)
+        return
+    for page in reader.pages:
+        yield page.extract_text() or ""
+
+
+def _collect_pages(
+    pages: Iterator[str], stop_markers: Sequence[str], max_pages: Optional[int]
+) -> str:
+    parts = []
+    found = 0
+    with closing(pages):
+        for text in islice(pages, max_pages or None):
+            parts.append(text)
+            pos = 0
+            while found < len(stop_markers):
+                pos = text.find(stop_markers[found], pos)
+                if pos < 0:
+                    break
+                pos += len(stop_markers[found])
+                found += 1
+            if stop_markers and found == len(stop_markers):
+                break
+    return "\n".join(parts)
+
+
+def extract_pdf_text(
+    source: Union[bytes, str, BinaryIO],
+    stop_markers: Sequence[str] = (),
+    max_pages: Optional[int] = None,
+) -> str:
+    """Text of the pages of a PDF given as raw bytes, a file path or a stream.
+
+    Seekable binary streams (e.g. an upload's spooled temp file) are read on
+    demand by both backends, so the whole file never has to sit in memory.
+    With ``stop_markers``, pages after the one where the last of them has
+    appeared (in that order) are not extracted at all; ``max_pages`` caps the
+    number of pages read the same way.
+    """
+    if pdfium is not None and PDF_TEXT_BACKEND == "pdfium":
+        try:
+            return _collect_pages(_pdfium_pages(source), stop_markers, max_pages)
+        except Exception as e:
+            logger.warning(f"PDFium could not read PDF, falling back to PyPDF2: {e}")
+            if hasattr(source, "seek"):
+                source.seek(0)
+    return _collect_pages(_pypdf2_pages(source), stop_markers, max_pages)
 
 
 class CourseExtractor:
+    def __init__(self, cache_dir: Optional[str] = None):
+        if cache_dir is None:
+            cache_dir = os.environ.get("PDF_EXTRACT_CACHE_DIR", ".cache/pdf_extract")
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+
     def extract_from_pdf(self, pdf_path: str) -> Optional[Dict]:
+        cache_path = self._cache_path(pdf_path)
+        if cache_path is not None and cache_path.exists():
+            try:
+                with open(cache_path, "r", encoding="utf-8") as fh:
+                    return json.load(fh)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable extraction cache {cache_path}: {e}")
+
         try:
-            with open(pdf_path, "rb") as file:
-                reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in reader.pages:
-                    text += page.extract_text()
-                return self._parse_course_data(text, pdf_path)
+            text = extract_pdf_text(
+                pdf_path, stop_markers=COURSE_END_MARKERS, max_pages=COURSE_MAX_PAGES
+            )
+            course_data = self._parse_course_data(text, pdf_path)
         except Exception as e:
             logger.error(f"Error processing {pdf_path}: {e}")
             return None
 
+        if cache_path is not None:
+            self._write_cache(cache_path, course_data)
+        return course_data
+
+    def _cache_path(self, pdf_path: str) -> Optional[Path]:
+        """Cache entries are keyed on path, mtime and size so edits invalidate
+        them, and on the parser version and page cap so parser changes do."""
+        if self.cache_dir is None:
+            return None
+        try:
+            stat = os.stat(pdf_path)
+        except OSError:
+            return None
+        raw_key = (
+            f"{os.path.abspath(pdf_path)}:{stat.st_mtime_ns}:{stat.st_size}"
+            f":v{EXTRACTOR_VERSION}:{COURSE_MAX_PAGES}"
+        )
+        return self.cache_dir / f"{hashlib.sha1(raw_key.encode()).hexdigest()}.json"
+
+    def _write_cache(self, cache_path: Path, course_data: Dict) -> None:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump(course_data, fh)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"Could not write extraction cache {cache_path}: {e}")
+
     def _parse_course_data(self, text: str, pdf_path: str) -> Dict:
         lines = [l.strip() for l in text.split("\n")]
 
         filename = Path(pdf_path).name
-        filename_match = re.search(r"class_(\d+)", filename, re.IGNORECASE)
+        filename_match = _CLASS_ID_FILENAME_RE.search(filename)
         class_id = f"CLASS_{filename_match.group(1)}" if filename_match else None
 
         title = "Unknown"
@@ -93,28 +365,20 @@ class CourseExtractor:
         )
         cost = extract_value_after_embedded_label("Cost:")
 
-        objectives_match = re.search(
-            r"Learning Objectives\s*\n(.+?)Provided Materials", text, re.DOTALL
-        )
+        objectives_match = _OBJECTIVES_RE.search(text)
         learning_objectives = text_to_list(
             objectives_match.group(1).strip() if objectives_match else None
         )
 
-        materials_match = re.search(
-            r"Provided Materials\s*\n(.+?)Skills Developed", text, re.DOTALL
-        )
+        materials_match = _MATERIALS_RE.search(text)
         provided_materials = text_to_list(
             materials_match.group(1).strip() if materials_match else None
         )
 
-        skills_match = re.search(
-            r"Skills Developed\s*\n(.+?)Course Description", text, re.DOTALL
-        )
+        skills_match = _SKILLS_RE.search(text)
         skills = text_to_list(skills_match.group(1).strip() if skills_match else None)
 
-        description_match = re.search(
-            r"Course Description\s*\n(.+?)Class ID:", text, re.DOTALL
-        )
+        description_match = _DESCRIPTION_RE.search(text)
         description = description_match.group(1).strip() if description_match else None
         description = (
             " ".join(line.strip() for line in description.split("\n"))
@@ -135,3 +399,25 @@ class CourseExtractor:
             "description": description,
             "filename": Path(pdf_path).name,
         }
+
+
+# Stateless apart from its cache directory, so one instance serves every upload
+COURSE_EXTRACTOR = CourseExtractor()
+
+
+def parse_course_pdf(
+    source: Union[bytes, str, BinaryIO], filename: Optional[str] = None
+) -> Optional[Dict]:
+    """Course fields of one uploaded PDF, or None when it can't be read.
+
+    Module-level and given plain bytes by the batch upload, so it can run in
+    :func:`get_batch_pool` workers.
+    """
+    try:
+        text = extract_pdf_text(
+            source, stop_markers=COURSE_END_MARKERS, max_pages=COURSE_MAX_PAGES
+        )
+        return COURSE_EXTRACTOR._parse_course_data(text, filename)
+    except Exception as e:
+        logger.error(f"PDF extraction error: {e}")
+        return None
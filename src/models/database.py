@@ -1,22 +1,37 @@
 import os
+import queue
 import sqlite3
 import json
+import threading
+from contextlib import contextmanager
 from typing import Dict, Optional
 
 import psycopg2
-from psycopg2 import extras
+from psycopg2 import errors, extras, pool
 
 from src.core.config import DATABASE_URL, DB_PATH
-from src.core.utils import to_json
+from src.core.utils import JSON_FIELDS, to_json
 from src.core.logging import get_logger
 
 logger = get_logger("database")
 
+# Course columns matched with LIKE '%term%' by the search box, the listing
+# filters and the search fallback; each gets its own trigram index on Postgres
+# so an OR of them becomes a BitmapOr of index scans.
+TRIGRAM_INDEXED_COLUMNS = (
+    "title",
+    "class_id",
+    "description",
+    "instructor",
+    "location",
+    "course_type",
+)
+
 
 class DatabaseManager:
     def __init__(self, database_url: str = None, db_path: str = None):
-        self.database_url = database_url or os.environ.get("DATABASE_URL")
-        self.db_path = db_path or os.environ.get("DB_PATH", "courses.db")
+        self.database_url = database_url or DATABASE_URL
+        self.db_path = db_path or DB_PATH
         self.conn = None
 
     def connect(self):
@@ -37,9 +52,9 @@ class DatabaseManager:
                     location TEXT,
                     course_type TEXT,
                     cost TEXT,
-                    learning_objectives TEXT,
-                    provided_materials TEXT,
-                    skills TEXT,
+                    learning_objectives JSONB,
+                    provided_materials JSONB,
+                    skills JSONB,
                     description TEXT,
                     filename TEXT NOT NULL UNIQUE,
                     pdf_url TEXT,
@@ -70,6 +85,14 @@ class DatabaseManager:
                     created_at TIMESTAMP DEFAULT NOW()
                 )
             """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS chat_conversations (
+                    id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    messages TEXT NOT NULL,
+                    updated_at DOUBLE PRECISION NOT NULL
+                )
+            """)
         else:
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS courses (
@@ -113,8 +136,181 @@ class DatabaseManager:
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS chat_conversations (
+                    id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    messages TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+        # user_profiles.user_id is the primary key, so profile lookups are
+        # already indexed; reviews are looked up by user and by course.
+        # (user_id, created_at, id) also serves the keyset-paginated review
+        # listing, so it supersedes the old single-column user_id index.
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_reviews_user_created "
+            "ON reviews (user_id, created_at DESC, id DESC)"
+        )
+        cursor.execute("DROP INDEX IF EXISTS idx_reviews_user_id")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_reviews_course_user ON reviews (course_id, user_id)"
+        )
+        # The course listing pages by (class_id, id), by offset or by keyset
+        # cursor; walking this index replaces a sort of the whole table.
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_courses_listing "
+            "ON courses (COALESCE(class_id, ''), id)"
+        )
+        cursor.execute("DROP INDEX IF EXISTS idx_courses_class_id")
+        # Expired chat conversations are pruned by last activity
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_chat_conversations_updated "
+            "ON chat_conversations (updated_at)"
+        )
+        self._ensure_review_count(cursor)
+        if self.database_url:
+            self._ensure_json_columns(cursor)
+            self._ensure_search_index(cursor)
+        else:
+            # Gathers planner statistics for newly created indexes so SQLite
+            # weighs the listing index against the filters it can't serve
+            cursor.execute("PRAGMA optimize")
         self.conn.commit()
 
+    def _ensure_json_columns(self, cursor):
+        """Store the list fields as ``jsonb`` so psycopg2 returns them decoded.
+
+        Tables created before the switch hold them as TEXT and are converted
+        in place. A column with a value that isn't valid JSON stays TEXT;
+        ``parse_json_rows`` still decodes string values either way.
+        """
+        cursor.execute(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_name = 'courses' AND data_type = 'text' "
+            "AND column_name = ANY(%s)",
+            (list(JSON_FIELDS),),
+        )
+        for (column,) in cursor.fetchall():
+            cursor.execute("SAVEPOINT json_column")
+            try:
+                cursor.execute(
+                    f"ALTER TABLE courses ALTER COLUMN {column} "
+                    f"TYPE jsonb USING {column}::jsonb"
+                )
+            except psycopg2.Error as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT json_column")
+                logger.warning(f"Keeping courses.{column} as TEXT: {e}")
+            cursor.execute("RELEASE SAVEPOINT json_column")
+
+    def _ensure_search_index(self, cursor):
+        """Index course search and filter text with trigrams for ``%term%`` matches.
+
+        Creating the extension needs privileges the app role may lack; search
+        then falls back to a sequential scan instead of failing startup.
+        """
+        cursor.execute("SAVEPOINT search_index")
+        try:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            # Superseded by per-column indexes: matching one concatenation let
+            # a term span the boundary between two fields
+            cursor.execute("DROP INDEX IF EXISTS idx_courses_search_trgm")
+            for column in TRIGRAM_INDEXED_COLUMNS:
+                cursor.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_courses_{column}_trgm "
+                    f"ON courses USING gin ({column} gin_trgm_ops)"
+                )
+        except psycopg2.Error as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT search_index")
+            logger.warning(f"Skipping trigram search index: {e}")
+        cursor.execute("RELEASE SAVEPOINT search_index")
+
+    def _ensure_review_count(self, cursor):
+        """Keep ``user_profiles.review_count`` in step with ``reviews`` via triggers.
+
+        The column is backfilled once when it is first added; from then on the
+        triggers maintain it (creating a bare profile row for new reviewers).
+        """
+        if self.database_url:
+            cursor.execute(
+                """SELECT 1 FROM information_schema.columns
+                   WHERE table_name = 'user_profiles' AND column_name = 'review_count'"""
+            )
+            has_column = cursor.fetchone() is not None
+        else:
+            cursor.execute("PRAGMA table_info(user_profiles)")
+            has_column = any(row[1] == "review_count" for row in cursor.fetchall())
+
+        if not has_column:
+            cursor.execute(
+                "ALTER TABLE user_profiles ADD COLUMN review_count INTEGER NOT NULL DEFAULT 0"
+            )
+            if self.database_url:
+                cursor.execute(
+                    """INSERT INTO user_profiles (user_id)
+                       SELECT DISTINCT user_id FROM reviews
+                       ON CONFLICT (user_id) DO NOTHING"""
+                )
+            else:
+                cursor.execute(
+                    "INSERT OR IGNORE INTO user_profiles (user_id) SELECT DISTINCT user_id FROM reviews"
+                )
+            cursor.execute(
+                """UPDATE user_profiles SET review_count = (
+                       SELECT COUNT(*) FROM reviews r WHERE r.user_id = user_profiles.user_id
+                   )"""
+            )
+
+        if self.database_url:
+            cursor.execute("""
+                CREATE OR REPLACE FUNCTION reviews_count_sync() RETURNS trigger AS $$
+                BEGIN
+                    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                        UPDATE user_profiles SET review_count = review_count - 1
+                        WHERE user_id = OLD.user_id;
+                    END IF;
+                    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                        INSERT INTO user_profiles (user_id, review_count) VALUES (NEW.user_id, 1)
+                        ON CONFLICT (user_id) DO UPDATE
+                        SET review_count = user_profiles.review_count + 1;
+                    END IF;
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql
+            """)
+            cursor.execute("DROP TRIGGER IF EXISTS reviews_count_sync ON reviews")
+            cursor.execute("""
+                CREATE TRIGGER reviews_count_sync
+                AFTER INSERT OR DELETE OR UPDATE OF user_id ON reviews
+                FOR EACH ROW EXECUTE FUNCTION reviews_count_sync()
+            """)
+        else:
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS reviews_count_ins AFTER INSERT ON reviews
+                BEGIN
+                    INSERT OR IGNORE INTO user_profiles (user_id) VALUES (NEW.user_id);
+                    UPDATE user_profiles SET review_count = review_count + 1
+                    WHERE user_id = NEW.user_id;
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS reviews_count_del AFTER DELETE ON reviews
+                BEGIN
+                    UPDATE user_profiles SET review_count = review_count - 1
+                    WHERE user_id = OLD.user_id;
+                END
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS reviews_count_upd AFTER UPDATE OF user_id ON reviews
+                BEGIN
+                    UPDATE user_profiles SET review_count = review_count - 1
+                    WHERE user_id = OLD.user_id;
+                    INSERT OR IGNORE INTO user_profiles (user_id) VALUES (NEW.user_id);
+                    UPDATE user_profiles SET review_count = review_count + 1
+                    WHERE user_id = NEW.user_id;
+                END
+            """)
+
     def insert_course(self, course_data: Dict) -> bool:
         try:
             cursor = self.conn.cursor()
@@ -199,17 +395,328 @@ class DatabaseManager:
             self.conn.close()
 
 
-def get_db_connection():
-    database_url = os.environ.get("DATABASE_URL")
-    db_path = os.environ.get("DB_PATH", "courses.db")
-    if database_url:
-        conn = psycopg2.connect(database_url, cursor_factory=extras.RealDictCursor)
-    else:
-        conn = sqlite3.connect(db_path)
+class SQLiteConnectionPool:
+    """Queue-backed pool of long-lived SQLite connections.
+
+    Connections are opened with ``check_same_thread=False`` so any worker
+    thread may borrow them, and are configured once with WAL-friendly
+    pragmas instead of on every request.
+    """
+
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-8000",
+    )
+
+    def __init__(self, db_path: str, size: int = 5, healthcheck_sql: str = "SELECT 1"):
+        self.db_path = db_path
+        self.size = size
+        self.healthcheck_sql = healthcheck_sql
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._stats = {"created": 0, "reused": 0, "recycled": 0, "in_use": 0}
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
         conn.row_factory = sqlite3.Row
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            self._stats["created"] += 1
+        return conn
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute(self.healthcheck_sql).fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def getconn(self) -> sqlite3.Connection:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        else:
+            if self._is_healthy(conn):
+                with self._lock:
+                    self._stats["reused"] += 1
+            else:
+                with self._lock:
+                    self._stats["recycled"] += 1
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+                conn = self._connect()
+        with self._lock:
+            self._stats["in_use"] += 1
+        return conn
+
+    def putconn(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            self._stats["in_use"] -= 1
+        try:
+            conn.rollback()
+            self._idle.put_nowait(conn)
+        except (sqlite3.Error, queue.Full):
+            conn.close()
+
+    def closeall(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "idle": self._idle.qsize(), "size": self.size}
+
+
+class BlockingConnectionPool(pool.ThreadedConnectionPool):
+    """``ThreadedConnectionPool`` that waits for a free connection.
+
+    psycopg2's pool raises ``PoolError`` the moment ``maxconn`` connections
+    are checked out, so a burst of requests turned into 500s. Here callers
+    queue for up to ``timeout`` seconds before giving up.
+    """
+
+    def __init__(
+        self, minconn: int, maxconn: int, *args, timeout: float = 10.0, **kwargs
+    ):
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self.timeout = timeout
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def getconn(self, key=None):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise pool.PoolError(f"no database connection free after {self.timeout:g}s")
+        try:
+            return super().getconn(key)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        super().putconn(conn, key, close)
+        self._slots.release()
+
+
+class PreparingConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that remembers which statements it has PREPAREd.
+
+    Prepared statements live as long as the server session, so on a pooled
+    connection they are parsed and planned once and reused across requests.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+
+_PREPARED_STATEMENTS = os.environ.get("DB_PREPARED_STATEMENTS", "true").lower() == "true"
+
+
+def _to_dollar_params(sql: str) -> str:
+    parts = sql.split("%s")
+    return "".join(
+        part + (f"${i}" if i < len(parts) else "") for i, part in enumerate(parts, 1)
+    )
+
+
+def execute_prepared(cursor, name: str, sql: str, params=()) -> None:
+    """Execute ``sql`` as the named server-side prepared statement ``name``.
+
+    Only applies to pooled Postgres connections; SQLite already caches
+    compiled statements per connection, so there it is a plain execute.
+    Set DB_PREPARED_STATEMENTS=false behind transaction-mode poolers
+    (pgbouncer, Supavisor on :6543), which cannot keep session state.
+    """
+    conn = getattr(cursor, "connection", None)
+    prepared = getattr(conn, "prepared", None)
+    if not _PREPARED_STATEMENTS or prepared is None:
+        cursor.execute(sql, params)
+        return
+    starts_transaction = (
+        conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    )
+    try:
+        _execute_prepared(cursor, prepared, name, sql, params)
+    except errors.FeatureNotSupported as e:
+        # A column type changed (e.g. _ensure_json_columns run by another
+        # worker) after this session planned the statement. Every plan on
+        # the session may be stale, so drop them all and re-prepare.
+        if "cached plan must not change result type" not in str(e):
+            raise
+        conn.rollback()
+        cursor.execute("DEALLOCATE ALL")
+        prepared.clear()
+        # Retrying after earlier statements in the transaction would
+        # silently drop their work with the rollback
+        if not starts_transaction:
+            raise
+        _execute_prepared(cursor, prepared, name, sql, params)
+
+
+def _execute_prepared(cursor, prepared, name: str, sql: str, params) -> None:
+    if name not in prepared:
+        cursor.execute(f"PREPARE {name} AS {_to_dollar_params(sql)}")
+        prepared.add(name)
+    if params:
+        cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+    else:
+        cursor.execute(f"EXECUTE {name}")
+
+
+_pg_pool = None
+_sqlite_pools: Dict[str, SQLiteConnectionPool] = {}
+_pool_lock = threading.Lock()
+
+
+def get_connection_pool():
+    """Return the process-wide pool for the configured backend.
+
+    The backend comes from :mod:`src.core.config`, read once at import like
+    the SQL the routes specialize for it, so no environment lookups happen
+    per request.
+    """
+    global _pg_pool
+    if not DATABASE_URL:
+        sqlite_pool = _sqlite_pools.get(DB_PATH)
+        if sqlite_pool is None:
+            with _pool_lock:
+                sqlite_pool = _sqlite_pools.get(DB_PATH)
+                if sqlite_pool is None:
+                    sqlite_pool = SQLiteConnectionPool(
+                        DB_PATH,
+                        size=int(os.environ.get("DB_POOL_SIZE", "5")),
+                        healthcheck_sql=os.environ.get(
+                            "DB_POOL_HEALTHCHECK_SQL", "SELECT 1"
+                        ),
+                    )
+                    _sqlite_pools[DB_PATH] = sqlite_pool
+        return sqlite_pool
+
+    if _pg_pool is None:
+        with _pool_lock:
+            if _pg_pool is None:
+                _pg_pool = BlockingConnectionPool(
+                    minconn=int(os.environ.get("DB_POOL_MIN_CONN", "1")),
+                    maxconn=int(os.environ.get("DB_POOL_MAX_CONN", "8")),
+                    timeout=float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+                    dsn=DATABASE_URL,
+                    connection_factory=PreparingConnection,
+                    cursor_factory=extras.RealDictCursor,
+                )
+    return _pg_pool
+
+
+def get_pool_stats() -> Dict[str, int]:
+    db_pool = get_connection_pool()
+    if isinstance(db_pool, SQLiteConnectionPool):
+        return db_pool.get_stats()
+    return {
+        "idle": len(db_pool._pool),
+        "in_use": len(db_pool._used),
+        "size": db_pool.maxconn,
+    }
+
+
+def _checkout(db_pool):
+    conn = db_pool.getconn()
+    if not isinstance(db_pool, SQLiteConnectionPool) and conn.closed:
+        # Server-side disconnects leave dead sockets in the pool; swap them out
+        db_pool.putconn(conn, close=True)
+        conn = db_pool.getconn()
     return conn
 
 
+def _release(db_pool, conn) -> None:
+    if isinstance(db_pool, SQLiteConnectionPool):
+        db_pool.putconn(conn)
+        return
+    if not conn.closed:
+        conn.rollback()
+    db_pool.putconn(conn)
+
+
+class PooledConnection:
+    """A pooled connection whose ``close()`` hands it back instead of closing.
+
+    Everything else is delegated, so callers written against a plain DB-API
+    connection keep working unchanged.
+    """
+
+    def __init__(self, conn, db_pool):
+        self._conn = conn
+        self._pool = db_pool
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self._conn.__enter__()
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._conn.__exit__(exc_type, exc, tb)
+
+    def close(self) -> None:
+        db_pool, self._pool = self._pool, None
+        if db_pool is not None:
+            _release(db_pool, self._conn)
+
+    def __del__(self):
+        # Safety net for error paths that return without closing
+        if getattr(self, "_pool", None) is not None:
+            self.close()
+
+
+@contextmanager
+def pooled_connection():
+    """Borrow a pooled connection for the duration of a ``with`` block.
+
+    The connection is handed back on exit; any transaction left open is
+    rolled back, so callers must commit their own writes.
+    """
+    db_pool = get_connection_pool()
+    conn = _checkout(db_pool)
+    try:
+        yield conn
+    finally:
+        _release(db_pool, conn)
+
+
+def get_db_connection():
+    """Check a connection out of the pool; ``conn.close()`` returns it.
+
+    Inside a Flask request the connection is also recorded so that
+    :func:`release_request_connections` can hand it back at teardown if an
+    error path skipped ``close()``.
+    """
+    db_pool = get_connection_pool()
+    conn = PooledConnection(_checkout(db_pool), db_pool)
+    _track_for_request(conn)
+    return conn
+
+
+def _track_for_request(conn: PooledConnection) -> None:
+    from flask import g, has_app_context
+
+    if has_app_context():
+        g.setdefault("_db_connections", []).append(conn)
+
+
+def release_request_connections(exc: Optional[BaseException] = None) -> None:
+    """``teardown_appcontext`` hook returning connections a request left open."""
+    from flask import g
+
+    for conn in g.pop("_db_connections", ()):
+        conn.close()
+
+
 def extract_returning_id(row):
     if row is None:
         return None
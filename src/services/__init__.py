@@ -1,20 +1,43 @@
 """Unified service factory for vector and graph retrieval modes."""
 from __future__ import annotations
 
-from typing import Literal, Optional, Union
+import importlib
+from typing import TYPE_CHECKING, Literal, Optional, Union
 
-from src.services.base_rag_service import BaseRAGService
-from src.services.graph_rag_service import GraphRAGService, get_graph_rag_service
-from src.services.rag_service import RAGService, get_rag_service
+if TYPE_CHECKING:
+    from src.services.base_rag_service import BaseRAGService
+    from src.services.graph_rag_service import GraphRAGService
+    from src.services.rag_service import RAGService
+
+# Service modules pull in vector store clients and scikit-learn, so they are
+# imported on first use; importing e.g. src.services.chat_service stays cheap.
+_LAZY_EXPORTS = {
+    "BaseRAGService": "src.services.base_rag_service",
+    "GraphRAGService": "src.services.graph_rag_service",
+    "get_graph_rag_service": "src.services.graph_rag_service",
+    "RAGService": "src.services.rag_service",
+    "get_rag_service": "src.services.rag_service",
+}
+
+
+def __getattr__(name: str):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module), name)
 
 
 def get_service(
     mode: Literal["vector", "graph"] = "vector",
     provider: Optional[str] = None,
     **service_kwargs,
-) -> Union[RAGService, GraphRAGService, BaseRAGService]:
+) -> Union["RAGService", "GraphRAGService", "BaseRAGService"]:
     """Return the appropriate retrieval service based on mode."""
 
     if mode == "graph":
+        from src.services.graph_rag_service import get_graph_rag_service
+
         return get_graph_rag_service(provider=provider, **service_kwargs)
-    return get_rag_service(provider=provider)
+    from src.services.rag_service import get_rag_service
+
+    return get_rag_service(provider=provider, **service_kwargs)
@@ -1,18 +1,134 @@
 from __future__ import annotations
 
+import importlib.util
 import json
 import os
+import random
 import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import date, datetime, time
-from time import monotonic
-from typing import Any, Dict, Generator, List, Optional, Tuple
+from typing import Any, Callable, Dict, Generator, Hashable, Iterator, List, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from src.core.utils import parse_json_fields
+from src.core.cache import TTLCache
+from src.core.config import DATABASE_URL
+from src.core.logging import get_logger
+from src.core.resilience import CircuitBreaker
+from src.core.tokens import compact_history, trim_history
+from src.core.utils import JSON_FIELDS, parse_json_rows
 from src.models.database import get_db_connection
+from src.services.rerank import query_cache_key, rerank_hits
+from src.services.response_cache import SemanticResponseCache
 from src.services.safety_service import safety_service
 
 DISPLAY_PATTERN = re.compile(r"display\((\d+)\)")
+# Whole-message greetings / acknowledgements that never need a course lookup
+SMALL_TALK_PATTERN = re.compile(
+    r"^(?:hi|hello|hey|hiya|howdy|yo|good (?:morning|afternoon|evening)"
+    r"|thanks|thank you|thx|ty|cheers|ok(?:ay)?|cool|great|nice|awesome|perfect"
+    r"|bye|goodbye|see you|got it|sounds good)"
+    r"(?:\s+(?:there|so much|a lot|again|you|all|then|dandori))*[\s!.,?:)]*$",
+    re.IGNORECASE,
+)
+# Pure pleasantries get a canned reply with no completion call at all
+_GREETING_KINDS = (
+    ("thanks", re.compile(r"\b(?:thanks|thank you|thx|ty|cheers)\b", re.IGNORECASE)),
+    ("farewell", re.compile(r"\b(?:bye|goodbye|see you)\b", re.IGNORECASE)),
+    (
+        "hello",
+        re.compile(r"\b(?:hi|hello|hey|hiya|howdy|yo|good \w+)\b", re.IGNORECASE),
+    ),
+)
+_GREETING_REPLIES = {
+    "hello": (
+        "Hello, moonlit wanderer! Tell me a craft, a city or a budget and I'll "
+        "conjure some Dandori courses to match.",
+        "Greetings from the School of Dandori! What would you like to learn, "
+        "make or explore today?",
+    ),
+    "thanks": (
+        "You're most welcome! Ask whenever another course idea starts to glimmer.",
+        "A pleasure! I'm here if you'd like more courses to wander through.",
+    ),
+    "farewell": (
+        "Farewell for now, and may your next class be a delightful one!",
+        "Goodbye! The lanterns stay lit whenever you want to find another course.",
+    ),
+    "ack": (
+        "Wonderful! Shall I look for anything else, perhaps another vibe, "
+        "budget or instructor?",
+    ),
+}
+# Questions about the previous answer rather than the course catalogue
+FOLLOW_UP_PATTERN = re.compile(
+    r"\b(?:you (?:just )?(?:say|said|recommend(?:ed)?|mention(?:ed)?|suggest(?:ed)?)"
+    r"|(?:the )?(?:first|second|third|last|previous) one|that one|those ones?"
+    r"|summari[sz]e|say that again|rephrase)\b",
+    re.IGNORECASE,
+)
+FOLLOW_UP_MAX_WORDS = 12
+logger = get_logger("chat")
+# Shared pool for running a round's independent tool calls concurrently
+_TOOL_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("CHAT_TOOL_WORKERS", "4")),
+    thread_name_prefix="chat-tool",
+)
+# Speculative first searches run on their own small pool so they never queue
+# ahead of real tool calls; once every slot is busy, speculation is skipped.
+CHAT_SPECULATIVE_WORKERS = int(os.environ.get("CHAT_SPECULATIVE_WORKERS", "2"))
+_SPECULATIVE_EXECUTOR = ThreadPoolExecutor(
+    max_workers=CHAT_SPECULATIVE_WORKERS,
+    thread_name_prefix="chat-speculate",
+)
+_speculation_slots = threading.BoundedSemaphore(CHAT_SPECULATIVE_WORKERS)
+# Without the SDK installed chat degrades to local search; it is only probed
+# for, never imported, since importing it costs about half a second.
+OPENAI_SDK_AVAILABLE = importlib.util.find_spec("openai") is not None
+# Most recent history turns sent to the model must fit this many tokens
+CHAT_HISTORY_TOKEN_BUDGET = int(os.environ.get("CHAT_HISTORY_TOKEN_BUDGET", "2000"))
+# Course search tool results are reused for this long across users
+CHAT_SEARCH_CACHE_TTL = float(os.environ.get("CHAT_SEARCH_CACHE_TTL", "300"))
+# semantic_search fetches this many chunks and reranks them down to ``limit``
+SEMANTIC_OVERSAMPLE = int(os.environ.get("CHAT_SEMANTIC_OVERSAMPLE", "20"))
+# Hits farther than this cosine distance (similarity below 0.25) are dropped
+SEMANTIC_MAX_DISTANCE = float(os.environ.get("CHAT_SEMANTIC_MAX_DISTANCE", "0.75"))
+
+
+def _build_openrouter_session() -> requests.Session:
+    """Keep-alive session for OpenRouter, retrying rate limits and 5xx.
+
+    Retries happen before any body is read, so a streamed answer is never
+    replayed halfway through.
+    """
+    session = requests.Session()
+    retries = Retry(
+        total=2,
+        backoff_factor=1.0,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"POST"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=retries)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Completions go over plain HTTP with server-sent events through this session
+_openrouter_session = _build_openrouter_session()
+# Opens once OpenRouter keeps failing after retries, so chat requests fail
+# fast with an error event instead of each holding a worker for the timeout.
+_openrouter_breaker = CircuitBreaker(
+    "OpenRouter",
+    fail_max=20,
+    reset_timeout=30.0,
+    failure_exceptions=(requests.RequestException,),
+    is_failure=lambda response: response.status_code == 429
+    or response.status_code >= 500,
+)
 ALLOWED_FILTER_COLUMNS = {
     "id",
     "class_id",
@@ -31,14 +147,196 @@ ALLOWED_FILTER_COLUMNS = {
     "updated_at",
 }
 
+# The backend is fixed at import, so the course SQL is specialized once.
+_USE_POSTGRES = bool(DATABASE_URL)
+_PH = "%s" if _USE_POSTGRES else "?"
+_TEXT_MATCH_COLUMNS = (
+    "title",
+    "class_id",
+    "description",
+    "instructor",
+    "location",
+    "course_type",
+)
+_TEXT_MATCH_SQL = (
+    "("
+    + " OR ".join(
+        f"{column} {'ILIKE' if _USE_POSTGRES else 'LIKE'} {_PH}"
+        for column in _TEXT_MATCH_COLUMNS
+    )
+    + ")"
+)
+
+
+# Prompts and tool schemas are built once so every request sends a
+# byte-identical prefix, which lets provider-side prompt caching kick in.
+_PERSONA = (
+    "You are the School of Dandori assistant, a whimsical moonlit concierge who speaks with gentle wonder while staying factual. "
+)
+SYSTEM_PROMPT = (
+    _PERSONA
+    + "Always call search_courses, semantic_search, or graph_neighbors before answering course questions. "
+    "Do NOT answer until you have called at least one tool and incorporated the results. "
+    "When replying, ground every recommendation in the retrieved evidence, weave concise markdown bullets with playful verbs, "
+    "and close with an inviting next step (e.g., suggest another vibe, budget, or instructor to explore)."
+)
+GRAPHRAG_SYSTEM_PROMPT = (
+    SYSTEM_PROMPT
+    + " Use graph_neighbors when node-level context from Neo4j can improve the answer."
+)
+FOLLOW_UP_SYSTEM_PROMPT = (
+    _PERSONA
+    + "This turn is a follow-up about the conversation so far: reply briefly from that context, "
+    "without inventing new course details, and invite the user to ask about courses."
+)
+# Shared across requests: append to the messages list, never mutate these
+_SYSTEM_MESSAGES = {
+    "standard": {"role": "system", "content": SYSTEM_PROMPT},
+    "graphrag": {"role": "system", "content": GRAPHRAG_SYSTEM_PROMPT},
+    "follow_up": {"role": "system", "content": FOLLOW_UP_SYSTEM_PROMPT},
+}
+BASE_TOOLS: Tuple[Dict[str, Any], ...] = (
+    {
+        "type": "function",
+        "function": {
+            "name": "search_courses",
+            "description": "Search courses in the SQL database using free text and flexible filters.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string"},
+                    "filters": {"type": "object", "additionalProperties": True},
+                    "limit": {"type": "integer", "minimum": 1, "maximum": 100},
+                    "offset": {"type": "integer", "minimum": 0},
+                    "order_by": {"type": "string"},
+                    "order_dir": {"type": "string", "enum": ["asc", "desc"]},
+                },
+            },
+        },
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "semantic_search",
+            "description": "Run semantic vector search over course content.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string"},
+                    "limit": {"type": "integer", "minimum": 1, "maximum": 20},
+                    "provider": {"type": "string"},
+                },
+                "required": ["query"],
+            },
+        },
+    },
+)
+GRAPHRAG_TOOLS: Tuple[Dict[str, Any], ...] = BASE_TOOLS + (
+    {
+        "type": "function",
+        "function": {
+            "name": "graph_neighbors",
+            "description": "Fetch nearby entities for a graph node from Neo4j-backed GraphRAG store.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "value": {"type": "string"},
+                    "limit": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "maximum": 100,
+                    },
+                    "provider": {"type": "string"},
+                },
+                "required": ["value"],
+            },
+        },
+    },
+)
+
 
 class ChatService:
     def __init__(self):
         self._rag_service = None
         self._graph_rag_service = None
-        self._semantic_cache: Dict[
-            Tuple[str, int, Optional[str]], Tuple[float, Dict[str, Any]]
-        ] = {}
+        self._init_lock = threading.Lock()
+        self._search_cache = TTLCache(maxsize=512, ttl=CHAT_SEARCH_CACHE_TTL)
+        self._inflight: Dict[Hashable, Future] = {}
+        self._inflight_lock = threading.Lock()
+        self._response_cache = SemanticResponseCache(
+            threshold=float(os.environ.get("CHAT_RESPONSE_CACHE_THRESHOLD", "0.95")),
+            ttl=float(os.environ.get("CHAT_RESPONSE_CACHE_TTL", "900")),
+        )
+
+    def invalidate_response_cache(self) -> None:
+        """Drop cached answers, e.g. after the course index has changed."""
+        self._response_cache.clear()
+        self._search_cache.clear()
+
+    def _cached_search(
+        self, key: Hashable, compute: Callable[[], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Serve ``key`` from the search cache, sharing one in-flight lookup.
+
+        Concurrent callers with the same key wait on the first caller's
+        future instead of repeating the query. Errors are not cached.
+        """
+        cached = self._search_cache.get(key)
+        if cached is not None:
+            return cached
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+        if not owner:
+            return future.result()
+        try:
+            result = compute()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            self._search_cache.set(key, result)
+            future.set_result(result)
+            return result
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _get_rag_service(self, provider: Optional[str] = None):
+        # Tool calls may run on several threads; build the service only once
+        with self._init_lock:
+            if self._rag_service is None or (
+                provider
+                and provider != getattr(self._rag_service, "provider_name", None)
+            ):
+                from src.services.rag_service import get_rag_service
+
+                self._rag_service = get_rag_service(provider)
+            return self._rag_service
+
+    def _query_embedding(self, text: str) -> Optional[List[float]]:
+        """Embed ``text`` with the vector store's model, or None if unavailable."""
+        if self._response_cache.ttl <= 0:
+            return None
+        try:
+            embedder = getattr(self._get_rag_service().vector_store, "embedder", None)
+            if embedder is None:
+                return None
+            return embedder([text])[0]
+        except Exception:
+            return None
+
+    @staticmethod
+    def _response_scope(mode: str, model: str, history: List[Dict[str, Any]]) -> Tuple:
+        recent = tuple(
+            (item.get("role"), item.get("content"))
+            for item in history[-3:]
+            if isinstance(item, dict)
+        )
+        return (mode, model, hash(recent))
 
     def _json_safe(self, value: Any) -> Any:
         if isinstance(value, (datetime, date, time)):
@@ -53,9 +351,6 @@ class ChatService:
             return [self._json_safe(item) for item in value]
         return value
 
-    def _placeholder(self) -> str:
-        return "%s" if bool(os.environ.get("DATABASE_URL")) else "?"
-
     def _search_courses(
         self,
         *,
@@ -71,63 +366,60 @@ class ChatService:
         offset = max(0, int(offset))
         order_by = order_by if order_by in ALLOWED_FILTER_COLUMNS else "id"
         order_dir = "desc" if str(order_dir).lower() == "desc" else "asc"
+        key = (
+            "courses",
+            query.strip().lower(),
+            json.dumps(filters, sort_keys=True, default=str),
+            limit,
+            offset,
+            order_by,
+            order_dir,
+        )
+        return self._cached_search(
+            key,
+            lambda: self._query_courses(
+                query, filters, limit, offset, order_by, order_dir
+            ),
+        )
 
-        placeholder = self._placeholder()
+    def _query_courses(
+        self,
+        query: str,
+        filters: Dict[str, Any],
+        limit: int,
+        offset: int,
+        order_by: str,
+        order_dir: str,
+    ) -> Dict[str, Any]:
         where_parts = ["1=1"]
         params: List[Any] = []
 
         if query:
-            q = f"%{query}%"
-            if placeholder == "%s":
-                where_parts.append(
-                    "("
-                    + " OR ".join(
-                        [
-                            "title ILIKE %s",
-                            "class_id ILIKE %s",
-                            "description ILIKE %s",
-                            "instructor ILIKE %s",
-                            "location ILIKE %s",
-                            "course_type ILIKE %s",
-                        ]
-                    )
-                    + ")"
-                )
-            else:
-                where_parts.append(
-                    "("
-                    + " OR ".join(
-                        [
-                            "title LIKE ?",
-                            "class_id LIKE ?",
-                            "description LIKE ?",
-                            "instructor LIKE ?",
-                            "location LIKE ?",
-                            "course_type LIKE ?",
-                        ]
-                    )
-                    + ")"
-                )
-            params.extend([q, q, q, q, q, q])
+            where_parts.append(_TEXT_MATCH_SQL)
+            params.extend([f"%{query}%"] * len(_TEXT_MATCH_COLUMNS))
 
         for key, raw_value in filters.items():
             if key not in ALLOWED_FILTER_COLUMNS:
                 continue
             if raw_value is None or raw_value == "":
                 continue
+            column = key
+            if _USE_POSTGRES and key in JSON_FIELDS:
+                # jsonb has no LIKE or text comparison; match its JSON text
+                column = f"{key}::text"
             if isinstance(raw_value, list) and raw_value:
-                placeholders = ",".join([placeholder] * len(raw_value))
-                where_parts.append(f"{key} IN ({placeholders})")
+                placeholders = ",".join([_PH] * len(raw_value))
+                where_parts.append(f"{column} IN ({placeholders})")
                 params.extend(raw_value)
             elif isinstance(raw_value, (int, float)):
-                where_parts.append(f"{key} = {placeholder}")
+                where_parts.append(f"{column} = {_PH}")
                 params.append(raw_value)
             else:
-                where_parts.append(f"{key} LIKE {placeholder}")
+                where_parts.append(f"{column} LIKE {_PH}")
                 params.append(f"%{raw_value}%")
 
         where_sql = " AND ".join(where_parts)
-        sql = f"SELECT * FROM courses WHERE {where_sql} ORDER BY {order_by} {order_dir} LIMIT {placeholder} OFFSET {placeholder}"
+        sql = f"SELECT * FROM courses WHERE {where_sql} ORDER BY {order_by} {order_dir} LIMIT {_PH} OFFSET {_PH}"
         count_sql = f"SELECT COUNT(*) as count FROM courses WHERE {where_sql}"
 
         conn = get_db_connection()
@@ -143,44 +435,56 @@ class ChatService:
         )
 
         cursor.execute(sql, [*params, limit, offset])
-        rows = [parse_json_fields(row) for row in cursor.fetchall()]
+        rows = parse_json_rows(cursor.fetchall())
         conn.close()
         return {"courses": rows, "count": total, "limit": limit, "offset": offset}
 
+    def _speculate_semantic_search(self, query: str) -> None:
+        """Start ``semantic_search(query)`` in the background if a slot is free."""
+        if not _speculation_slots.acquire(blocking=False):
+            return
+
+        def finished(future: Future) -> None:
+            _speculation_slots.release()
+            error = future.exception() or future.result().get("error")
+            if error:
+                logger.warning(f"Speculative semantic search failed: {error}")
+
+        _SPECULATIVE_EXECUTOR.submit(self._semantic_search, query).add_done_callback(
+            finished
+        )
+
     def _semantic_search(
         self, query: str, limit: int = 5, provider: Optional[str] = None
     ) -> Dict[str, Any]:
         try:
             normalized_limit = max(1, min(int(limit), 20))
-            cache_key = (query.strip().lower(), normalized_limit, provider)
-            cached = self._semantic_cache.get(cache_key)
-            now = monotonic()
-            if cached and now - cached[0] < 30:
-                return cached[1]
-
-            if self._rag_service is None or (
-                provider
-                and provider != getattr(self._rag_service, "provider_name", None)
-            ):
-                from src.services.rag_service import get_rag_service
-
-                self._rag_service = get_rag_service(provider)
-
-            results = self._rag_service.search(query, n_results=normalized_limit)
-            self._semantic_cache[cache_key] = (now, results)
-            return results
+            key = ("semantic", query_cache_key(query), normalized_limit, provider)
+            return self._cached_search(
+                key, lambda: self._vector_search(query, normalized_limit, provider)
+            )
         except Exception as exc:
             return {"error": f"semantic_search unavailable: {exc}"}
 
+    def _vector_search(
+        self, query: str, limit: int, provider: Optional[str]
+    ) -> Dict[str, Any]:
+        service = self._get_rag_service(provider)
+        results = service.search(query, n_results=max(limit, SEMANTIC_OVERSAMPLE))
+        # Chroma collections use squared L2, which is twice the cosine
+        # distance for the unit-length embeddings stored here
+        scale = 2.0 if getattr(service, "provider_name", None) == "chroma" else 1.0
+        return rerank_hits(
+            query, results, limit, max_distance=SEMANTIC_MAX_DISTANCE * scale
+        )
+
     def _graph_neighbors(
         self, value: str, limit: int = 25, provider: Optional[str] = None
     ) -> Dict[str, Any]:
         if self._graph_rag_service is None:
-            from src.services.graph_rag_service import get_graph_rag_service
+            from src.services.graph_rag_service import shared_graph_rag_service
 
-            self._graph_rag_service = get_graph_rag_service(
-                provider or os.environ.get("GRAPH_RAG_VECTOR_PROVIDER", "chroma")
-            )
+            self._graph_rag_service = shared_graph_rag_service(provider)
 
         if not getattr(self._graph_rag_service, "neo4j_enabled", False):
             return {"error": "Neo4j neighbors are disabled"}
@@ -210,6 +514,34 @@ class ChatService:
                     pass
         return "\n".join(snippets)
 
+    @staticmethod
+    def _route_message(user_message: str, history: List[Dict[str, Any]]) -> str:
+        """How a turn is answered: ``"canned"`` for a pure pleasantry,
+        ``"follow_up"`` for a short question about the last answer (one
+        completion, no tools) and ``"retrieval"`` for everything else."""
+        if SMALL_TALK_PATTERN.match(user_message):
+            return "canned"
+        has_answer = any(
+            isinstance(item, dict) and item.get("role") == "assistant"
+            for item in history
+        )
+        if (
+            has_answer
+            and len(user_message.split()) <= FOLLOW_UP_MAX_WORDS
+            and FOLLOW_UP_PATTERN.search(user_message)
+        ):
+            return "follow_up"
+        return "retrieval"
+
+    @staticmethod
+    def _canned_reply(user_message: str) -> Tuple[str, str]:
+        """``(kind, reply)`` for a message routed as a pleasantry."""
+        kind = next(
+            (name for name, pattern in _GREETING_KINDS if pattern.search(user_message)),
+            "ack",
+        )
+        return kind, random.choice(_GREETING_REPLIES[kind])
+
     @staticmethod
     def _display_artifacts(text: str) -> List[Dict[str, Any]]:
         seen = set()
@@ -224,12 +556,11 @@ class ChatService:
         if not ids:
             return []
 
-        placeholder = "%s" if bool(os.environ.get("DATABASE_URL")) else "?"
         conn = get_db_connection()
         cursor = conn.cursor()
-        ph = ",".join([placeholder] * len(ids))
+        ph = ",".join([_PH] * len(ids))
         cursor.execute(f"SELECT * FROM courses WHERE id IN ({ph})", ids)
-        courses = [parse_json_fields(c) for c in cursor.fetchall()]
+        courses = parse_json_rows(cursor.fetchall())
         conn.close()
         cmap = {c["id"]: c for c in courses if "id" in c}
         return [
@@ -301,67 +632,9 @@ class ChatService:
             lines.append(f"{idx}. {label} (score: {score})")
         return "\n".join(lines)
 
-    def _tool_schemas(self, enable_graph_neighbors: bool) -> List[Dict[str, Any]]:
-        tools = [
-            {
-                "type": "function",
-                "function": {
-                    "name": "search_courses",
-                    "description": "Search courses in the SQL database using free text and flexible filters.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "query": {"type": "string"},
-                            "filters": {"type": "object", "additionalProperties": True},
-                            "limit": {"type": "integer", "minimum": 1, "maximum": 100},
-                            "offset": {"type": "integer", "minimum": 0},
-                            "order_by": {"type": "string"},
-                            "order_dir": {"type": "string", "enum": ["asc", "desc"]},
-                        },
-                    },
-                },
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "semantic_search",
-                    "description": "Run semantic vector search over course content.",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "query": {"type": "string"},
-                            "limit": {"type": "integer", "minimum": 1, "maximum": 20},
-                            "provider": {"type": "string"},
-                        },
-                        "required": ["query"],
-                    },
-                },
-            },
-        ]
-        if enable_graph_neighbors:
-            tools.append(
-                {
-                    "type": "function",
-                    "function": {
-                        "name": "graph_neighbors",
-                        "description": "Fetch nearby entities for a graph node from Neo4j-backed GraphRAG store.",
-                        "parameters": {
-                            "type": "object",
-                            "properties": {
-                                "value": {"type": "string"},
-                                "limit": {
-                                    "type": "integer",
-                                    "minimum": 1,
-                                    "maximum": 100,
-                                },
-                                "provider": {"type": "string"},
-                            },
-                            "required": ["value"],
-                        },
-                    },
-                }
-            )
-        return tools
+    @staticmethod
+    def _tool_schemas(enable_graph_neighbors: bool) -> Tuple[Dict[str, Any], ...]:
+        return GRAPHRAG_TOOLS if enable_graph_neighbors else BASE_TOOLS
 
     def _run_tool(self, name: str, args: Dict[str, Any], mode: str) -> Dict[str, Any]:
         if name == "search_courses":
@@ -389,6 +662,79 @@ class ChatService:
             )
         return {"error": f"Unknown tool: {name}"}
 
+    @staticmethod
+    def _stream_completion(
+        chat_url: str,
+        headers: Dict[str, str],
+        body: Dict[str, Any],
+        timeout: int,
+        message: Dict[str, Any],
+    ) -> Iterator[Tuple[str, bool]]:
+        """POST a streamed chat completion and yield ``(content_delta, tool_call_seen)``.
+
+        Tool-call fragments are reassembled by index. Once the stream is
+        exhausted ``message`` holds the full ``content`` and ``tool_calls``.
+        """
+        parts: List[str] = []
+        # Fragments are collected per call and joined once the stream ends
+        tool_calls: Dict[int, Dict[str, Any]] = {}
+        with _openrouter_breaker.call(
+            _openrouter_session.post,
+            chat_url,
+            headers=headers,
+            json={**body, "stream": True},
+            timeout=timeout,
+            stream=True,
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                # Skip keep-alive comments such as ": OPENROUTER PROCESSING"
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
+                chunk = json.loads(data)
+                if chunk.get("error"):
+                    raise RuntimeError(chunk["error"].get("message") or chunk["error"])
+                delta = ((chunk.get("choices") or [{}])[0].get("delta")) or {}
+                for call in delta.get("tool_calls") or []:
+                    slot = tool_calls.setdefault(
+                        call.get("index", 0), {"id": None, "name": [], "arguments": []}
+                    )
+                    if call.get("id"):
+                        slot["id"] = call["id"]
+                    function = call.get("function") or {}
+                    if function.get("name"):
+                        slot["name"].append(function["name"])
+                    if function.get("arguments"):
+                        slot["arguments"].append(function["arguments"])
+                content = delta.get("content")
+                if content:
+                    parts.append(content)
+                    yield content, bool(tool_calls)
+        message["content"] = "".join(parts)
+        message["tool_calls"] = [
+            {
+                "id": tool_calls[index]["id"],
+                "type": "function",
+                "function": {
+                    "name": "".join(tool_calls[index]["name"]),
+                    "arguments": "".join(tool_calls[index]["arguments"]),
+                },
+            }
+            for index in sorted(tool_calls)
+        ]
+
+    def _run_tool_safely(
+        self, name: str, args: Dict[str, Any], mode: str
+    ) -> Dict[str, Any]:
+        try:
+            result = self._run_tool(name, args, mode)
+        except Exception as exc:
+            result = {"error": f"{name} failed: {exc}"}
+        return self._json_safe(result)
+
     def stream_chat(
         self, payload: Dict[str, Any]
     ) -> Generator[Tuple[str, Dict[str, Any]], None, None]:
@@ -417,10 +763,22 @@ class ChatService:
                     "artifacts": [],
                     "mode": mode,
                     "model": None,
+                    "blocked": True,
                 },
             )
             return
 
+        route = self._route_message(user_message, history)
+        if route == "canned":
+            kind, text = self._canned_reply(user_message)
+            logger.info(f"Canned chat reply ({kind}) for {user_message[:40]!r}")
+            yield "text_delta", {"delta": text}
+            yield (
+                "message_end",
+                {"message": text, "artifacts": [], "mode": mode, "model": None},
+            )
+            return
+
         api_key = os.environ.get("OPENROUTER_API_KEY") or os.environ.get(
             "OPENAI_API_KEY"
         )
@@ -448,9 +806,7 @@ class ChatService:
             )
             return
 
-        try:
-            from openai import OpenAI
-        except ModuleNotFoundError:
+        if not OPENAI_SDK_AVAILABLE:
             quick = self._search_courses(
                 query=user_message, filters=payload.get("filters") or {}, limit=5
             )
@@ -480,18 +836,39 @@ class ChatService:
         chat_url = f"{base_url}/chat/completions"
         timeout = int(os.environ.get("OPENROUTER_TIMEOUT_SECONDS", "60"))
 
-        system_prompt = (
-            "You are the School of Dandori assistant, a whimsical moonlit concierge who speaks with gentle wonder while staying factual. "
-            "Always call search_courses, semantic_search, or graph_neighbors before answering course questions. "
-            "Do NOT answer until you have called at least one tool and incorporated the results. "
-            "When replying, ground every recommendation in the retrieved evidence, weave concise markdown bullets with playful verbs, "
-            "and close with an inviting next step (e.g., suggest another vibe, budget, or instructor to explore)."
-        )
-        if mode == "graphrag":
-            system_prompt += " Use graph_neighbors when node-level context from Neo4j can improve the answer."
+        # Near-duplicate questions in the same conversational context reuse
+        # the earlier answer instead of another multi-second LLM loop.
+        response_scope = self._response_scope(mode, model, history)
+        query_embedding = self._query_embedding(user_message)
+        if query_embedding is not None:
+            cached = self._response_cache.get(query_embedding, response_scope)
+            if cached is not None:
+                cached_text, cached_artifacts = cached
+                if cached_text:
+                    yield "text_delta", {"delta": cached_text}
+                yield (
+                    "message_end",
+                    {
+                        "message": cached_text,
+                        "artifacts": cached_artifacts,
+                        "mode": mode,
+                        "model": model,
+                        "cached": True,
+                    },
+                )
+                return
 
-        messages: List[Dict[str, Any]] = [{"role": "system", "content": system_prompt}]
-        context_blob = self._initial_context(user_message, mode)
+        # Follow-ups skip the tools (and the forced tool round), so they are
+        # answered in a single completion.
+        needs_retrieval = route == "retrieval"
+        prompt_key = mode if needs_retrieval else "follow_up"
+        messages: List[Dict[str, Any]] = [_SYSTEM_MESSAGES[prompt_key]]
+        if needs_retrieval:
+            # Speculatively run the semantic search the model usually asks for
+            # first. It overlaps the first completion, and a matching tool call
+            # then joins the in-flight lookup or hits the search cache.
+            self._speculate_semantic_search(user_message)
+        context_blob = self._initial_context(user_message, mode) if needs_retrieval else ""
         if context_blob:
             messages.append(
                 {
@@ -499,41 +876,81 @@ class ChatService:
                     "content": "Initial Dandori context:\n" + context_blob,
                 }
             )
-        for item in history:
-            role = item.get("role")
-            content = item.get("content")
-            if role in {"user", "assistant", "system"} and isinstance(content, str):
-                messages.append({"role": role, "content": content})
+        valid_history = [
+            {"role": item.get("role"), "content": item.get("content")}
+            for item in history
+            if isinstance(item, dict)
+            and item.get("role") in {"user", "assistant", "system"}
+            and isinstance(item.get("content"), str)
+        ]
+        messages.extend(
+            trim_history(compact_history(valid_history), CHAT_HISTORY_TOKEN_BUDGET)
+        )
         messages.append({"role": "user", "content": user_message})
 
         max_rounds = 5
-        tools = self._tool_schemas(enable_graph_neighbors=(mode == "graphrag"))
+        tools = (
+            self._tool_schemas(enable_graph_neighbors=(mode == "graphrag"))
+            if needs_retrieval
+            else None
+        )
         missed_tool_attempts = 0
         has_called_tool = False
 
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        }
+
         for _ in range(max_rounds):
             payload_body = {
                 "model": model,
                 "messages": messages,
-                "tools": tools,
-                "tool_choice": "auto",
                 "temperature": 0.2,
             }
+            if tools:
+                payload_body["tools"] = tools
+                payload_body["tool_choice"] = "auto"
+
+            # Content from a round that may end up as the answer is released
+            # as it streams, one safety-checked paragraph at a time. Rounds
+            # that must call a tool first are buffered, since their text is
+            # discarded if no tool call arrives.
+            can_answer = not tools or has_called_tool or missed_tool_attempts >= 2
+            message: Dict[str, Any] = {}
+            # Unreleased text since the last paragraph break, kept as parts so
+            # a long paragraph is joined once rather than re-copied per token
+            pending: List[str] = []
+            last_char = ""
+            released = False
+            blocked = None
             try:
-                completion = requests.post(
-                    chat_url,
-                    headers={
-                        "Authorization": f"Bearer {api_key}",
-                        "Content-Type": "application/json",
-                    },
-                    json=payload_body,
-                    timeout=timeout,
-                )
-                completion.raise_for_status()
-                completion_data = completion.json()
-                message = (
-                    (completion_data.get("choices") or [{}])[0].get("message")
-                ) or {}
+                for delta, tool_call_seen in self._stream_completion(
+                    chat_url, headers, payload_body, timeout, message
+                ):
+                    if not can_answer or tool_call_seen:
+                        continue
+                    # Only the new delta (plus one char, for a split "\n\n")
+                    # can contain a break that was not already released.
+                    cut = (last_char + delta).rfind("\n\n")
+                    if cut < 0:
+                        pending.append(delta)
+                        last_char = delta[-1:]
+                        continue
+                    split = cut + 2 - len(last_char)
+                    chunk = "".join(pending) + delta[:split]
+                    rest = delta[split:]
+                    pending = [rest] if rest else []
+                    last_char = rest[-1:]
+                    if not released:
+                        chunk = chunk.lstrip()
+                    output_safety = safety_service.check_output(chunk)
+                    if not output_safety.safe:
+                        blocked = (chunk, output_safety)
+                        break
+                    if chunk:
+                        released = True
+                        yield "text_delta", {"delta": chunk}
             except Exception as exc:
                 yield "error", {"message": f"Chat completion failed: {exc}"}
                 return
@@ -541,8 +958,8 @@ class ChatService:
             tool_calls = message.get("tool_calls") or []
             message_content = message.get("content") or ""
 
-            if not tool_calls:
-                if not has_called_tool and missed_tool_attempts < 2:
+            if not tool_calls and not blocked:
+                if not can_answer:
                     missed_tool_attempts += 1
                     messages.append({"role": "assistant", "content": message_content})
                     reminder = (
@@ -551,32 +968,54 @@ class ChatService:
                     )
                     messages.append({"role": "system", "content": reminder})
                     continue
-                final_text = message_content.strip()
-                output_safety = safety_service.check_output(final_text)
-                if not output_safety.safe:
-                    safety_service.log_block(
-                        stage="output", text=final_text, result=output_safety
-                    )
-                    block_message = (
-                        output_safety.message
-                        or "Model output blocked by safety filters."
-                    )
-                    yield "text_delta", {"delta": block_message}
-                    yield (
-                        "message_end",
-                        {
-                            "message": block_message,
-                            "artifacts": [],
-                            "mode": mode,
-                            "model": model,
-                        },
-                    )
-                    return
+                tail = "".join(pending)
+                tail = tail.rstrip() if released else tail.strip()
+                if tail:
+                    output_safety = safety_service.check_output(tail)
+                    if not output_safety.safe:
+                        blocked = (tail, output_safety)
+                # Per-paragraph checks miss content split across paragraphs,
+                # so a streamed answer is checked whole before it completes.
+                if released and not blocked:
+                    full_text = message_content.strip()
+                    output_safety = safety_service.check_output(full_text)
+                    if not output_safety.safe:
+                        blocked = (full_text, output_safety)
+
+            if blocked:
+                blocked_text, output_safety = blocked
+                safety_service.log_block(
+                    stage="output", text=blocked_text, result=output_safety
+                )
+                block_message = (
+                    output_safety.message or "Model output blocked by safety filters."
+                )
+                if released:
+                    # Tell the client to discard the paragraphs already shown
+                    yield "retract", {"message": block_message}
+                yield "text_delta", {"delta": block_message}
+                yield (
+                    "message_end",
+                    {
+                        "message": block_message,
+                        "artifacts": [],
+                        "mode": mode,
+                        "model": model,
+                        "blocked": True,
+                    },
+                )
+                return
 
-                if final_text:
-                    yield "text_delta", {"delta": final_text}
+            if not tool_calls:
+                final_text = message_content.strip()
+                if tail:
+                    yield "text_delta", {"delta": tail}
                 artifacts = self._display_artifacts(final_text)
                 safe_artifacts = self._json_safe(artifacts)
+                if query_embedding is not None and final_text:
+                    self._response_cache.set(
+                        query_embedding, response_scope, (final_text, safe_artifacts)
+                    )
                 yield (
                     "message_end",
                     {
@@ -598,6 +1037,7 @@ class ChatService:
 
             has_called_tool = True
 
+            parsed_calls = []
             for tool_call in tool_calls:
                 function_payload = tool_call.get("function") or {}
                 name = function_payload.get("name") or ""
@@ -606,6 +1046,7 @@ class ChatService:
                     args = json.loads(raw_args)
                 except Exception:
                     args = {}
+                parsed_calls.append((tool_call.get("id"), name, args))
                 yield (
                     "tool_call",
                     {
@@ -615,29 +1056,44 @@ class ChatService:
                         "status": "running",
                     },
                 )
-                try:
-                    result = self._run_tool(name, args, mode)
-                except Exception as exc:
-                    result = {"error": f"{name} failed: {exc}"}
-                safe_result = self._json_safe(result)
+
+            # Independent tool calls run concurrently; results are reported
+            # as they finish but fed back to the model in call order.
+            results: Dict[int, Dict[str, Any]] = {}
+            if len(parsed_calls) > 1:
+                futures = {
+                    _TOOL_EXECUTOR.submit(self._run_tool_safely, name, args, mode): idx
+                    for idx, (_, name, args) in enumerate(parsed_calls)
+                }
+                finished = (
+                    (futures[future], future.result())
+                    for future in as_completed(futures)
+                )
+            else:
+                finished = (
+                    (idx, self._run_tool_safely(name, args, mode))
+                    for idx, (_, name, args) in enumerate(parsed_calls)
+                )
+            for idx, result in finished:
+                call_id, name, args = parsed_calls[idx]
+                results[idx] = result
                 yield (
                     "tool_result",
                     {
-                        "id": tool_call.get("id"),
+                        "id": call_id,
                         "name": name,
                         "arguments": args,
-                        "status": "completed"
-                        if not safe_result.get("error")
-                        else "error",
-                        "result": safe_result,
+                        "status": "completed" if not result.get("error") else "error",
+                        "result": result,
                     },
                 )
+            for idx, (call_id, name, _) in enumerate(parsed_calls):
                 messages.append(
                     {
                         "role": "tool",
-                        "tool_call_id": tool_call.get("id"),
+                        "tool_call_id": call_id,
                         "name": name,
-                        "content": json.dumps(safe_result),
+                        "content": json.dumps(results[idx]),
                     }
                 )
         fallback = self._search_courses(
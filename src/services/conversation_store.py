@@ -0,0 +1,104 @@
+"""Server-side chat history, kept in the database so every worker shares it."""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from src.core.config import DATABASE_URL
+from src.models.database import execute_prepared, pooled_connection
+
+# Idle lifetime of a conversation and the number of messages kept for it
+CHAT_CONVERSATION_TTL = float(os.environ.get("CHAT_CONVERSATION_TTL", "3600"))
+CONVERSATION_MAX_MESSAGES = 40
+
+_PH = "%s" if DATABASE_URL else "?"
+_LOAD_SQL = (
+    "SELECT messages FROM chat_conversations "
+    f"WHERE id = {_PH} AND user_id = {_PH} AND updated_at > {_PH}"
+)
+_CREATE_SQL = (
+    "INSERT INTO chat_conversations (id, user_id, messages, updated_at) "
+    f"VALUES ({_PH}, {_PH}, {_PH}, {_PH})"
+)
+# The user_id condition keeps one user from overwriting another's conversation
+_SAVE_SQL = (
+    f"UPDATE chat_conversations SET messages = {_PH}, updated_at = {_PH} "
+    f"WHERE id = {_PH} AND user_id = {_PH}"
+)
+_PRUNE_SQL = f"DELETE FROM chat_conversations WHERE updated_at < {_PH}"
+
+
+class ConversationStore:
+    """Conversations owned by one user each, expiring after ``ttl`` idle seconds."""
+
+    def __init__(
+        self,
+        ttl: float = CHAT_CONVERSATION_TTL,
+        max_messages: int = CONVERSATION_MAX_MESSAGES,
+    ):
+        self.ttl = ttl
+        self.max_messages = max_messages
+
+    def create(self, user_id: str) -> str:
+        """Allocate an empty conversation for ``user_id``; expired ones are pruned."""
+        conversation_id = uuid.uuid4().hex
+        now = time.time()
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            execute_prepared(cursor, "chat_conversation_prune", _PRUNE_SQL, (now - self.ttl,))
+            execute_prepared(
+                cursor,
+                "chat_conversation_create",
+                _CREATE_SQL,
+                (conversation_id, user_id, "[]", now),
+            )
+            conn.commit()
+        return conversation_id
+
+    def load(self, conversation_id: str, user_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Messages of a live conversation owned by ``user_id``, else None."""
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            execute_prepared(
+                cursor,
+                "chat_conversation_load",
+                _LOAD_SQL,
+                (conversation_id, user_id, time.time() - self.ttl),
+            )
+            row = cursor.fetchone()
+        return json.loads(row["messages"]) if row else None
+
+    def append(
+        self,
+        conversation_id: str,
+        user_id: str,
+        history: List[Dict[str, Any]],
+        user_message: str,
+        reply: str,
+    ) -> None:
+        """Store ``history`` plus one finished turn, keeping the newest messages."""
+        messages = history + [
+            {"role": "user", "content": user_message},
+            {"role": "assistant", "content": reply},
+        ]
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            execute_prepared(
+                cursor,
+                "chat_conversation_save",
+                _SAVE_SQL,
+                (
+                    json.dumps(messages[-self.max_messages:]),
+                    time.time(),
+                    conversation_id,
+                    user_id,
+                ),
+            )
+            conn.commit()
+
+
+conversation_store = ConversationStore()
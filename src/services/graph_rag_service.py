@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import os
+import threading
 from typing import Any, Dict, List, Optional
 
 from src.core.logging import api_logger
@@ -118,3 +119,49 @@ class GraphRAGService(BaseRAGService):
 
 def get_graph_rag_service(provider: Optional[str] = None) -> GraphRAGService:
     return GraphRAGService(provider=provider)
+
+
+_shared_services: Dict[str, GraphRAGService] = {}
+_shared_lock = threading.Lock()
+
+
+def _resolve_provider(provider: Optional[str]) -> str:
+    return provider or os.environ.get("GRAPH_RAG_VECTOR_PROVIDER", "chroma")
+
+
+def shared_graph_rag_service(provider: Optional[str] = None) -> GraphRAGService:
+    """Process-wide GraphRAG service per provider, built on first use.
+
+    Construction opens two vector collections (and optionally Neo4j), so
+    request handlers share one instance instead of paying that per call.
+    Callers must not ``close()`` the returned service.
+    """
+    provider = _resolve_provider(provider)
+    service = _shared_services.get(provider)
+    if service is None:
+        with _shared_lock:
+            service = _shared_services.get(provider)
+            if service is None:
+                service = GraphRAGService(provider=provider)
+                _shared_services[provider] = service
+    return service
+
+
+def warm_graph_rag_service(
+    provider: Optional[str] = None, query: str = "pottery"
+) -> threading.Thread:
+    """Build the shared service and run one query on a daemon thread.
+
+    The throwaway search loads the embedding model and opens the store
+    connections so the first real request does not pay for them.
+    """
+
+    def _warm() -> None:
+        try:
+            shared_graph_rag_service(provider).search(query, n_results=1)
+        except Exception as exc:
+            api_logger.log_info("GraphRAG warm-up failed", {"error": str(exc)})
+
+    thread = threading.Thread(target=_warm, name="graph-rag-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -1,8 +1,13 @@
 from src.services.base_rag_service import BaseRAGService, sanitize_metadata
 from src.services.chunk_builder import CourseChunkBuilder
 import os
+import re
 from typing import Optional
 
+# Simple chunk ids look like "<course id>_<label>_<index>".
+_CHUNK_COURSE_ID_RE = re.compile(r"(\d+)_")
+
+
 class RAGService(BaseRAGService):
     def __init__(self, provider: Optional[str] = None, **kwargs):
         super().__init__(provider=provider or os.environ.get("VECTOR_STORE_PROVIDER", "qdrant"), **kwargs)
@@ -17,10 +22,20 @@ class RAGService(BaseRAGService):
         if chunks:
             self._replace_collection(self.vector_store, chunks)
 
+    def indexed_course_ids(self) -> set[int]:
+        """Course ids that currently have at least one chunk in the store."""
+        course_ids: set[int] = set()
+        match = _CHUNK_COURSE_ID_RE.match
+        for chunk_id in self.vector_store.iter_ids():
+            m = match(chunk_id)
+            if m:
+                course_ids.add(int(m.group(1)))
+        return course_ids
+
     def search(self, query: str, n_results: int = 5) -> dict:
         results = self.vector_store.query(query_texts=[query], n_results=n_results)
         return self._shape_results(results)
 
 
-def get_rag_service(provider: str = None) -> RAGService:
-    return RAGService(provider=provider)
+def get_rag_service(provider: str = None, **kwargs) -> RAGService:
+    return RAGService(provider=provider, **kwargs)
@@ -0,0 +1,116 @@
+"""Lightweight reranking of oversampled vector search hits."""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional
+
+_TERM_RE = re.compile(r"[a-z0-9]+")
+# Quoted phrases and bare ids/codes are exact lookups; reranking adds nothing
+_LITERAL_QUERY_RE = re.compile(r"""^\s*(?:"[^"]*"|'[^']*'|[A-Za-z]{0,4}[-_]?\d+)\s*$""")
+_STOPWORDS = frozenset(
+    "a an and any are as at be by can course courses do for from have i in is it "
+    "me my near of on or show some that the to want what with you".split()
+)
+# How much full query-term coverage is worth relative to vector distance
+LEXICAL_WEIGHT = 0.5
+# Chunks shorter than this are headings or stray fields, not evidence
+MIN_DOCUMENT_CHARS = 20
+
+
+def _terms(text: str) -> set[str]:
+    return {
+        term
+        for term in _TERM_RE.findall(text.lower())
+        if len(term) > 1 and term not in _STOPWORDS
+    }
+
+
+def is_literal_query(query: str) -> bool:
+    return bool(_LITERAL_QUERY_RE.match(query))
+
+
+def query_cache_key(query: str) -> str:
+    """Key under which reworded variants of one question share results.
+
+    Case, word order, repeats and stopwords are ignored, so "yoga London"
+    and "London yoga courses" map to the same key. Literal queries are
+    kept verbatim.
+    """
+    if is_literal_query(query):
+        return query.strip()
+    terms = _terms(query)
+    return " ".join(sorted(terms)) if terms else query.strip().lower()
+
+
+def rerank_hits(
+    query: str,
+    results: Dict[str, Any],
+    limit: int,
+    max_distance: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Keep the best ``limit`` hits of a shaped result, one per course.
+
+    Hits farther than ``max_distance`` or with fewer than
+    :data:`MIN_DOCUMENT_CHARS` characters of text are dropped first. The
+    rest are scored by vector distance plus :data:`LEXICAL_WEIGHT` times the
+    share of query terms found in the document, so chunks that actually
+    mention what was asked outrank near-misses. Only the best chunk of each
+    course is kept so several chunks of one course don't crowd out the
+    others. Literal queries keep the store's order. When nothing survives,
+    the result carries ``note: "no_matches"``.
+    """
+    documents = results.get("documents") or []
+    metadatas = results.get("metadatas") or []
+    distances = results.get("distances") or []
+    ids = results.get("ids") or []
+
+    def relevant(index: int) -> bool:
+        if len((documents[index] or "").strip()) < MIN_DOCUMENT_CHARS:
+            return False
+        if max_distance is None or index >= len(distances):
+            return True
+        return distances[index] is None or float(distances[index]) <= max_distance
+
+    hits = [index for index in range(len(documents)) if relevant(index)]
+
+    if not is_literal_query(query):
+        query_terms = _terms(query)
+
+        def score(index: int) -> float:
+            distance = distances[index] if index < len(distances) else None
+            value = -float(distance) if distance is not None else 0.0
+            if query_terms:
+                found = query_terms & _terms(documents[index] or "")
+                value += LEXICAL_WEIGHT * len(found) / len(query_terms)
+            return value
+
+        hits.sort(key=score, reverse=True)
+
+    kept: List[int] = []
+    seen_courses = set()
+    for index in hits:
+        metadata = metadatas[index] if index < len(metadatas) else None
+        course_id = (metadata or {}).get("course_id")
+        if course_id is not None:
+            if course_id in seen_courses:
+                continue
+            seen_courses.add(course_id)
+        kept.append(index)
+        if len(kept) >= limit:
+            break
+
+    def pick(values: List[Any]) -> List[Any]:
+        return [values[index] for index in kept if index < len(values)]
+
+    reranked = {
+        **results,
+        "documents": pick(documents),
+        "metadatas": pick(metadatas),
+        "distances": pick(distances),
+        "ids": pick(ids),
+        "count": len(kept),
+    }
+    if not kept:
+        reranked["note"] = "no_matches"
+    return reranked
@@ -0,0 +1,122 @@
+"""Semantic cache for final chat answers, indexed by random-projection LSH."""
+
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+
+
+class SemanticResponseCache:
+    """Return a cached answer when a new question embeds close to an old one.
+
+    Each entry is bucketed in ``tables`` hash tables keyed by the sign pattern
+    of ``bits`` random hyperplanes, so a lookup only scores the few entries
+    that share a bucket instead of the whole cache. A candidate is a hit only
+    if its cosine similarity clears ``threshold`` and its ``scope`` (mode,
+    model, recent history) matches exactly.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        ttl: float = 900.0,
+        maxsize: int = 2048,
+        tables: int = 8,
+        bits: int = 16,
+        seed: int = 7,
+    ):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.tables = tables
+        self.bits = bits
+        self._rng = np.random.default_rng(seed)
+        self._planes: Optional[np.ndarray] = None
+        self._buckets: List[Dict[bytes, Set[int]]] = [{} for _ in range(tables)]
+        self._entries: Dict[int, Tuple[float, Hashable, np.ndarray, List[bytes], Any]] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def _signatures(self, vector: np.ndarray) -> List[bytes]:
+        if self._planes is None or self._planes.shape[-1] != vector.shape[0]:
+            self._planes = self._rng.standard_normal(
+                (self.tables, self.bits, vector.shape[0])
+            )
+            self._buckets = [{} for _ in range(self.tables)]
+            self._entries.clear()
+        bits = (self._planes @ vector) > 0
+        return [np.packbits(row).tobytes() for row in bits]
+
+    @staticmethod
+    def _normalize(embedding) -> Optional[np.ndarray]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if vector.ndim != 1 or norm == 0.0:
+            return None
+        return vector / norm
+
+    def _evict(self, entry_id: int) -> None:
+        _, _, _, signatures, _ = self._entries.pop(entry_id)
+        for table, signature in zip(self._buckets, signatures):
+            bucket = table.get(signature)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del table[signature]
+
+    def get(self, embedding, scope: Hashable) -> Optional[Any]:
+        vector = self._normalize(embedding)
+        if vector is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            signatures = self._signatures(vector)
+            candidates: Set[int] = set()
+            for table, signature in zip(self._buckets, signatures):
+                candidates |= table.get(signature, set())
+
+            best, best_score = None, self.threshold
+            for entry_id in candidates:
+                expires_at, entry_scope, entry_vector, _, value = self._entries[entry_id]
+                if expires_at <= now:
+                    self._evict(entry_id)
+                    continue
+                if entry_scope != scope:
+                    continue
+                score = float(entry_vector @ vector)
+                if score >= best_score:
+                    best, best_score = value, score
+            return best
+
+    def set(self, embedding, scope: Hashable, value: Any) -> None:
+        vector = self._normalize(embedding)
+        if vector is None:
+            return
+        with self._lock:
+            signatures = self._signatures(vector)
+            # Entries are inserted in expiry order, so the oldest id goes first
+            while len(self._entries) >= self.maxsize:
+                self._evict(next(iter(self._entries)))
+            entry_id = next(self._ids)
+            self._entries[entry_id] = (
+                time.monotonic() + self.ttl,
+                scope,
+                vector,
+                signatures,
+                value,
+            )
+            for table, signature in zip(self._buckets, signatures):
+                table.setdefault(signature, set()).add(entry_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets = [{} for _ in range(self.tables)]
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
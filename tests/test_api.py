@@ -22,6 +22,90 @@ def test_index(client):
     assert response.status_code in [200, 500]
 
 
+def test_page_revalidates_with_etag(client):
+    response = client.get("/login")
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    etag = response.headers["ETag"]
+    cached = client.get("/login", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.data == b""
+
+
+def test_favicon_is_immutable_and_conditional(client):
+    response = client.get("/favicon.ico")
+    assert response.status_code == 200
+    assert "immutable" in response.headers["Cache-Control"]
+
+    cached = client.get(
+        "/favicon.ico", headers={"If-None-Match": response.headers["ETag"]}
+    )
+    assert cached.status_code == 304
+
+
+def test_profile_update_is_visible_to_next_get(client, monkeypatch):
+    from src.api.auth import auth_service
+
+    monkeypatch.setattr(auth_service, "dev_bypass", True)
+    client.get("/api/auth/profile")
+    response = client.put("/api/auth/profile", json={"bio": "Weaves baskets"})
+    assert response.status_code == 200
+
+    profile = client.get("/api/auth/profile").get_json()["user"]
+    assert profile["bio"] == "Weaves baskets"
+
+
+def test_user_reviews_are_keyset_paginated(client, monkeypatch):
+    from src.api import auth
+    from src.api.auth import auth_service
+    from src.models.database import pooled_connection
+
+    monkeypatch.setattr(auth_service, "dev_bypass", True)
+    with pooled_connection() as conn:
+        conn.execute("DELETE FROM reviews WHERE user_id = 'dev_user'")
+        conn.executemany(
+            "INSERT INTO reviews (course_id, user_id, rating, review, created_at)"
+            " VALUES (?, 'dev_user', 5, ?, '2024-01-01 10:00:00')",
+            [(n, f"Review {n}") for n in range(3)],
+        )
+        conn.commit()
+
+    first = client.get("/api/auth/reviews?limit=2").get_json()
+    assert [r["review"] for r in first["reviews"]] == ["Review 2", "Review 1"]
+
+    rest = client.get(
+        "/api/auth/reviews",
+        query_string={
+            "limit": 2,
+            "before": first["next_before"],
+            "before_id": first["next_before_id"],
+        },
+    ).get_json()
+    assert [r["review"] for r in rest["reviews"]] == ["Review 0"]
+    assert rest["next_before"] is None
+
+
+def test_me_combines_profile_and_review_count(client, monkeypatch):
+    from src.api.auth import auth_service
+    from src.models.database import pooled_connection
+
+    monkeypatch.setattr(auth_service, "dev_bypass", True)
+    client.put("/api/auth/profile", json={"name": "Dev"})
+    with pooled_connection() as conn:
+        conn.execute("DELETE FROM reviews WHERE user_id = 'dev_user'")
+        conn.execute(
+            "INSERT INTO reviews (course_id, user_id, rating, review)"
+            " VALUES (1, 'dev_user', 4, 'Great')"
+        )
+        conn.commit()
+
+    data = client.get("/api/auth/me").get_json()
+    assert data["profile"]["name"] == "Dev"
+    assert data["user"]["id"] == "dev_user"
+    assert data["review_count"] == 1
+
+
 def test_get_courses(client):
     response = client.get("/api/courses")
     assert response.status_code == 200
@@ -46,6 +130,19 @@ def test_get_courses_with_search(client):
     assert "courses" in data
 
 
+def test_get_courses_search_matches_within_a_single_field(client):
+    import uuid
+
+    class_id = f"QX{uuid.uuid4().hex[:8]}"
+    client.post("/api/courses", json={"title": "Boundary Pottery", "class_id": class_id})
+
+    found = client.get(f"/api/courses?search={class_id}").get_json()
+    assert [c["title"] for c in found["courses"]] == ["Boundary Pottery"]
+    # The end of the title plus the start of the class id is not a match
+    spanning = client.get(f"/api/courses?search=Pottery {class_id}").get_json()
+    assert spanning["courses"] == []
+
+
 def test_get_courses_with_filters(client):
     response = client.get("/api/courses?location=Harrogate&course_type=Culinary")
     assert response.status_code == 200
@@ -62,6 +159,54 @@ def test_get_course_by_id(client):
         assert response.status_code == 404
 
 
+def test_get_courses_counts_all_matches_across_pages(client):
+    import uuid
+
+    location = f"Harrogate {uuid.uuid4().hex[:8]}"
+    for index in range(3):
+        client.post(
+            "/api/courses",
+            json={"title": f"Window Count {index}", "location": location},
+        )
+
+    first = client.get(f"/api/courses?location={location}&limit=2").get_json()
+    assert first["count"] == 3
+    assert first["total_pages"] == 2
+    assert len(first["courses"]) == 2
+    assert "total_count" not in first["courses"][0]
+
+    beyond = client.get(f"/api/courses?location={location}&limit=2&page=5")
+    beyond = beyond.get_json()
+    assert beyond["courses"] == []
+    assert beyond["count"] == 3
+
+
+def test_get_courses_keyset_pages_follow_the_offset_order(client):
+    import uuid
+
+    location = f"Keyset {uuid.uuid4().hex[:8]}"
+    for class_id in ("KS_B", "KS_A", "KS_A", "KS_C", None):
+        client.post(
+            "/api/courses",
+            json={"title": "Keyset", "location": location, "class_id": class_id},
+        )
+
+    listing = client.get(f"/api/courses?location={location}&limit=10").get_json()
+    expected = [course["id"] for course in listing["courses"]]
+    assert listing["next_after"] is None
+
+    seen, url = [], f"/api/courses?location={location}&limit=2"
+    first = client.get(url).get_json()
+    seen += [course["id"] for course in first["courses"]]
+    cursor = (first["next_after"], first["next_after_id"])
+    while cursor[1] is not None:
+        page = client.get(f"{url}&after={cursor[0]}&after_id={cursor[1]}").get_json()
+        assert "count" not in page
+        seen += [course["id"] for course in page["courses"]]
+        cursor = (page["next_after"], page["next_after_id"])
+    assert seen == expected
+
+
 def test_get_course_not_found(client):
     response = client.get("/api/courses/999999")
     assert response.status_code == 404
@@ -100,6 +245,49 @@ def test_bulk_courses(client):
     assert "courses" in data
 
 
+def test_course_cache_serves_lookups_until_update_or_delete(client):
+    course_id = client.post(
+        "/api/courses", json={"title": "Cached Clay", "location": "Ripon"}
+    ).get_json()["id"]
+
+    assert client.get(f"/api/courses/{course_id}").get_json()["title"] == "Cached Clay"
+    client.put(f"/api/courses/{course_id}", json={"title": "Fresh Clay"})
+    assert client.get(f"/api/courses/{course_id}").get_json()["title"] == "Fresh Clay"
+
+    bulk = client.post("/api/courses/bulk", json={"ids": [course_id, course_id]})
+    assert [c["title"] for c in bulk.get_json()["courses"]] == ["Fresh Clay"] * 2
+
+    client.delete(f"/api/courses/{course_id}")
+    assert client.get(f"/api/courses/{course_id}").status_code == 404
+    bulk = client.post("/api/courses/bulk", json={"ids": [course_id]})
+    assert bulk.get_json()["courses"] == []
+
+
+def test_course_read_racing_an_update_is_not_cached(client, monkeypatch):
+    from src.api import routes
+    from src.models.database import pooled_connection
+
+    course_id = client.post(
+        "/api/courses", json={"title": "Racing Clay", "location": "Ripon"}
+    ).get_json()["id"]
+    parse_json_fields = routes.parse_json_fields
+
+    def update_after_read(row):
+        # Another request's update commits and drops the cache entry between
+        # get_course's read and its cache store
+        with pooled_connection() as conn:
+            conn.execute(
+                "UPDATE courses SET title = ? WHERE id = ?", ("Settled Clay", course_id)
+            )
+            conn.commit()
+        routes._course_cache.pop(course_id)
+        return parse_json_fields(row)
+
+    monkeypatch.setattr(routes, "parse_json_fields", update_after_read)
+    assert client.get(f"/api/courses/{course_id}").get_json()["title"] == "Racing Clay"
+    assert client.get(f"/api/courses/{course_id}").get_json()["title"] == "Settled Clay"
+
+
 def test_bulk_courses_invalid(client):
     response = client.post("/api/courses/bulk", json={})
     assert response.status_code == 400
@@ -112,6 +300,29 @@ def test_search(client):
     assert "results" in data
 
 
+def test_search_fallback_counts_all_matches_across_pages(client, monkeypatch):
+    import uuid
+
+    from src.api import search
+
+    def unavailable():
+        raise RuntimeError("vector store offline")
+
+    monkeypatch.setattr(search, "get_rag", unavailable)
+    term = f"Fallback {uuid.uuid4().hex[:8]}"
+    for index in range(3):
+        client.post("/api/courses", json={"title": f"{term} {index}"})
+
+    first = client.get(f"/api/search?q={term}&n=2").get_json()
+    assert first["fallback"] == "sql"
+    assert (first["count"], first["total_pages"]) == (3, 2)
+    assert len(first["results"]) == 2
+    assert "total_count" not in first["results"][0]
+
+    beyond = client.get(f"/api/search?q={term}&n=2&page=5").get_json()
+    assert (beyond["results"], beyond["count"]) == ([], 3)
+
+
 def test_search_missing_query(client):
     response = client.get("/api/search")
     assert response.status_code == 400
@@ -154,6 +365,56 @@ def test_chat_stream_sse(client):
     )
     assert response.status_code == 200
     assert response.content_type.startswith("text/event-stream")
+    frames = response.get_data().split(b"\n\n")
+    assert frames[-1] == b""
+    assert frames[-2].startswith(b"event: message_end\ndata: {")
+
+
+def test_chat_keeps_conversations_server_side_per_user(client, monkeypatch):
+    from src.api.auth import auth_service
+    from src.services.chat_service import chat_service
+    from src.services.conversation_store import conversation_store
+
+    seen_histories = []
+
+    def fake_stream_chat(payload):
+        seen_histories.append(payload.get("history"))
+        reply = f"Reply {len(seen_histories)}."
+        yield "text_delta", {"delta": reply}
+        yield "message_end", {"message": reply, "artifacts": [], "mode": "standard"}
+
+    monkeypatch.setattr(auth_service, "dev_bypass", True)
+    monkeypatch.setattr(chat_service, "stream_chat", fake_stream_chat)
+
+    first = client.post("/api/chat", json={"message": "hello"}).get_json()
+    conversation_id = first["conversation_id"]
+    second = client.post(
+        "/api/chat", json={"message": "thanks", "conversation_id": conversation_id}
+    ).get_json()
+    assert second["conversation_id"] == conversation_id
+    assert seen_histories[1] == [
+        {"role": "user", "content": "hello"},
+        {"role": "assistant", "content": "Reply 1."},
+    ]
+
+    stateless = client.post("/api/chat", json={"message": "hi", "history": []})
+    assert stateless.get_json()["conversation_id"] is None
+
+    unknown = client.post(
+        "/api/chat", json={"message": "hi", "conversation_id": "missing"}
+    )
+    assert unknown.status_code == 404
+    someone_else = conversation_store.create("another_user")
+    stolen = client.post(
+        "/api/chat", json={"message": "hi", "conversation_id": someone_else}
+    )
+    assert stolen.status_code == 404
+
+    monkeypatch.setattr(auth_service, "dev_bypass", False)
+    anonymous = client.post(
+        "/api/chat", json={"message": "hi", "conversation_id": conversation_id}
+    )
+    assert anonymous.status_code == 401
 
 
 def test_cors_allows_origin_with_trailing_slash_env(monkeypatch, setup_test_db):
@@ -174,3 +435,49 @@ def test_cors_allows_origin_with_trailing_slash_env(monkeypatch, setup_test_db):
         response.headers.get("Access-Control-Allow-Origin")
         == "https://house-of-dandori.netlify.app"
     )
+
+
+def test_upload_batch_processes_files_in_request_order(client, text_pdf):
+    import io
+
+    def pdf(title):
+        lines = [title, "Instructor:", "Ada Calm Location:", "Leeds"]
+        return io.BytesIO(text_pdf(lines))
+
+    response = client.post(
+        "/api/upload/batch",
+        data={
+            "files": [
+                (pdf("Moonlit Pottery"), "class_101.pdf"),
+                (io.BytesIO(b"not a pdf"), "notes.txt"),
+                (pdf("Tidal Weaving"), "class_102.pdf"),
+            ]
+        },
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 200
+    data = response.get_json()
+    assert (data["total"], data["successful"], data["failed"]) == (3, 2, 1)
+    assert [r.get("title") for r in data["results"]] == [
+        "Moonlit Pottery",
+        None,
+        "Tidal Weaving",
+    ]
+
+    first, _, last = data["results"]
+    assert last["course_id"] > first["course_id"]
+    for result in (first, last):
+        course = client.get(f"/api/courses/{result['course_id']}").get_json()
+        assert course["title"] == result["title"]
+
+
+def test_course_list_is_compressed_when_accepted(client):
+    pytest.importorskip("flask_compress")
+    for index in range(12):
+        client.post(
+            "/api/courses",
+            json={"title": f"Compressed {index}", "description": "Clay " * 40},
+        )
+
+    response = client.get("/api/courses", headers={"Accept-Encoding": "gzip"})
+    assert response.headers.get("Content-Encoding") == "gzip"
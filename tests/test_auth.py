@@ -0,0 +1,60 @@
+import time
+
+import jwt
+import pytest
+
+from src.core.auth import AuthService
+from src.core.errors import AuthenticationError
+
+
+@pytest.fixture
+def service():
+    auth = AuthService()
+    auth.dev_bypass = False
+    auth.supabase_url = "https://example.supabase.co"
+    auth.anon_key = "anon"
+    return auth
+
+
+def _token(**claims):
+    return jwt.encode({"sub": "user-1", **claims}, "test-signing-secret-at-least-32-bytes", algorithm="HS256")
+
+
+def test_verify_token_caches_successful_verifications(service, monkeypatch):
+    token = _token(exp=int(time.time()) + 3600)
+    calls = []
+    original = service._decode_token
+
+    def counting_decode(value):
+        calls.append(value)
+        return original(value)
+
+    monkeypatch.setattr(service, "_decode_token", counting_decode)
+
+    assert service.verify_token(token)["sub"] == "user-1"
+    assert service.verify_token(token)["sub"] == "user-1"
+    assert len(calls) == 1
+
+
+def test_verify_token_does_not_cache_failures(service):
+    token = _token(exp=int(time.time()) - 10)
+    for _ in range(2):
+        with pytest.raises(AuthenticationError):
+            service.verify_token(token)
+    assert len(service._verified_tokens) == 0
+
+
+def test_verify_token_cache_is_keyed_by_digest(service):
+    token = _token(exp=int(time.time()) + 3600)
+    service.verify_token(token)
+    assert service._verified_tokens.get(token) is None
+
+
+def test_supabase_session_never_resends_login_posts():
+    from src.api.auth import _supabase_session
+
+    retries = _supabase_session.get_adapter("https://example.supabase.co").max_retries
+    assert not retries.is_retry("POST", 429)
+    assert not retries.is_retry("POST", 503)
+    assert retries.is_retry("GET", 503)
+    assert retries.read == 0
@@ -0,0 +1,213 @@
+import psycopg2
+import pytest
+from psycopg2 import pool
+
+from src.models.database import (
+    BlockingConnectionPool,
+    DatabaseManager,
+    SQLiteConnectionPool,
+    execute_prepared,
+    get_connection_pool,
+    get_db_connection,
+    pooled_connection,
+)
+
+
+def test_sqlite_pool_reuses_connections(tmp_path):
+    db_pool = SQLiteConnectionPool(str(tmp_path / "pool.db"), size=2)
+    conn = db_pool.getconn()
+    db_pool.putconn(conn)
+    assert db_pool.getconn() is conn
+    db_pool.putconn(conn)
+
+    stats = db_pool.get_stats()
+    assert stats["created"] == 1
+    assert stats["reused"] == 1
+    assert stats["in_use"] == 0
+    db_pool.closeall()
+
+
+def test_sqlite_pool_recycles_broken_connections(tmp_path):
+    db_pool = SQLiteConnectionPool(str(tmp_path / "pool.db"), size=2)
+    conn = db_pool.getconn()
+    db_pool.putconn(conn)
+    conn.close()
+
+    fresh = db_pool.getconn()
+    assert fresh is not conn
+    assert fresh.execute("SELECT 1").fetchone()[0] == 1
+    assert db_pool.get_stats()["recycled"] == 1
+    db_pool.putconn(fresh)
+    db_pool.closeall()
+
+
+def test_blocking_pool_waits_for_a_free_connection(monkeypatch):
+    class FakeConnection:
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    monkeypatch.setattr(pool.psycopg2, "connect", lambda *a, **k: FakeConnection())
+    db_pool = BlockingConnectionPool(0, 1, timeout=0.05)
+
+    conn = db_pool.getconn()
+    with pytest.raises(pool.PoolError):
+        db_pool.getconn()
+    db_pool.putconn(conn)
+    db_pool.putconn(db_pool.getconn())
+
+
+class _StalePlanConnection:
+    """Fake Postgres session whose first EXECUTE hits a changed column type."""
+
+    def __init__(self, status):
+        self.prepared = {"course_get"}
+        self.status = status
+        self.stale = True
+        self.statements = []
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.statements.append("ROLLBACK")
+
+
+class _StalePlanCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, sql, params=None):
+        self.connection.statements.append(sql.split(" (")[0])
+        if sql.startswith("EXECUTE") and self.connection.stale:
+            self.connection.stale = False
+            raise psycopg2.errors.FeatureNotSupported(
+                "cached plan must not change result type"
+            )
+
+
+def test_execute_prepared_replans_after_a_column_type_change():
+    conn = _StalePlanConnection(psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+    execute_prepared(_StalePlanCursor(conn), "course_get", "SELECT %s", (1,))
+    assert conn.statements == [
+        "EXECUTE course_get",
+        "ROLLBACK",
+        "DEALLOCATE ALL",
+        "PREPARE course_get AS SELECT $1",
+        "EXECUTE course_get",
+    ]
+    assert conn.prepared == {"course_get"}
+
+    # Mid-transaction the earlier work is already lost, so the error surfaces
+    conn = _StalePlanConnection(psycopg2.extensions.TRANSACTION_STATUS_INTRANS)
+    with pytest.raises(psycopg2.errors.FeatureNotSupported):
+        execute_prepared(_StalePlanCursor(conn), "course_get", "SELECT %s", (1,))
+    assert conn.statements[-1] == "DEALLOCATE ALL"
+    assert conn.prepared == set()
+
+
+def test_pooled_connection_rolls_back_uncommitted_writes():
+    with pooled_connection() as conn:
+        conn.execute(
+            "INSERT INTO user_profiles (user_id, name) VALUES (?, ?)",
+            ("pool-test-user", "Uncommitted"),
+        )
+
+    with pooled_connection() as conn:
+        row = conn.execute(
+            "SELECT name FROM user_profiles WHERE user_id = ?", ("pool-test-user",)
+        ).fetchone()
+    assert row is None
+
+
+def test_get_db_connection_close_returns_connection_to_pool():
+    db_pool = get_connection_pool()
+    before = db_pool.get_stats()
+
+    conn = get_db_connection()
+    conn.execute("SELECT 1")
+    conn.close()
+    conn.close()
+
+    after = db_pool.get_stats()
+    assert after["in_use"] == before["in_use"]
+    assert after["idle"] >= 1
+
+
+def test_request_teardown_returns_unclosed_connections():
+    from flask import Flask
+
+    from src.models.database import release_request_connections
+
+    app = Flask(__name__)
+    app.teardown_appcontext(release_request_connections)
+    db_pool = get_connection_pool()
+    before = db_pool.get_stats()["in_use"]
+
+    with app.app_context():
+        leaked = get_db_connection()
+        leaked.execute("SELECT 1")
+        assert db_pool.get_stats()["in_use"] == before + 1
+
+    assert db_pool.get_stats()["in_use"] == before
+
+
+def test_review_count_tracks_review_inserts_and_deletes(tmp_path):
+    db = DatabaseManager(db_path=str(tmp_path / "reviews.db"))
+    db.connect()
+    db.initialize_schema()
+    cursor = db.conn.cursor()
+    for course_id in (1, 2):
+        cursor.execute(
+            "INSERT INTO reviews (course_id, user_id, rating, review) VALUES (?, ?, ?, ?)",
+            (course_id, "reviewer", 5, "Lovely"),
+        )
+    cursor.execute("DELETE FROM reviews WHERE course_id = 1")
+
+    count = cursor.execute(
+        "SELECT review_count FROM user_profiles WHERE user_id = ?", ("reviewer",)
+    ).fetchone()[0]
+    assert count == 1
+    db.close()
+
+
+def test_review_count_is_backfilled_when_column_is_added(tmp_path):
+    db = DatabaseManager(db_path=str(tmp_path / "legacy.db"))
+    db.connect()
+    db.conn.execute(
+        "CREATE TABLE user_profiles (user_id TEXT PRIMARY KEY, name TEXT, email TEXT,"
+        " location TEXT, bio TEXT, created_at TIMESTAMP, updated_at TIMESTAMP)"
+    )
+    db.conn.execute(
+        "CREATE TABLE reviews (id INTEGER PRIMARY KEY AUTOINCREMENT, course_id INTEGER NOT NULL,"
+        " user_id TEXT NOT NULL, rating INTEGER NOT NULL, review TEXT NOT NULL,"
+        " author_name TEXT, author_email TEXT, created_at TIMESTAMP)"
+    )
+    db.conn.executemany(
+        "INSERT INTO reviews (course_id, user_id, rating, review) VALUES (?, ?, ?, ?)",
+        [(1, "early", 4, "Good"), (2, "early", 3, "Fine")],
+    )
+    db.initialize_schema()
+
+    count = db.conn.execute(
+        "SELECT review_count FROM user_profiles WHERE user_id = ?", ("early",)
+    ).fetchone()[0]
+    assert count == 2
+    db.close()
+
+
+def test_course_listing_order_uses_listing_index(tmp_path):
+    db = DatabaseManager(db_path=str(tmp_path / "courses.db"))
+    db.connect()
+    db.initialize_schema()
+
+    plan = db.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM courses "
+        "WHERE (COALESCE(class_id, ''), id) > ('CLASS_1', 1) "
+        "ORDER BY COALESCE(class_id, ''), id LIMIT 20"
+    ).fetchall()
+    details = " ".join(row[-1] for row in plan)
+    assert "idx_courses_listing" in details
+    assert "TEMP B-TREE" not in details
+    db.close()
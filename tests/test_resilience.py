@@ -0,0 +1,52 @@
+import pytest
+
+from src.core.resilience import CircuitBreaker, CircuitOpenError
+
+
+class Upstream:
+    def __init__(self):
+        self.calls = 0
+        self.healthy = False
+
+    def __call__(self):
+        self.calls += 1
+        if not self.healthy:
+            raise ConnectionError("upstream down")
+        return "ok"
+
+
+def test_breaker_opens_after_consecutive_failures():
+    upstream = Upstream()
+    breaker = CircuitBreaker("upstream", fail_max=2, reset_timeout=60)
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(upstream)
+
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.call(upstream)
+    assert excinfo.value.status_code == 503
+    assert upstream.calls == 2
+    assert breaker.state == "open"
+
+
+def test_breaker_closes_after_successful_trial():
+    upstream = Upstream()
+    breaker = CircuitBreaker("upstream", fail_max=1, reset_timeout=0)
+
+    with pytest.raises(ConnectionError):
+        breaker.call(upstream)
+    assert breaker.state == "half-open"
+
+    upstream.healthy = True
+    assert breaker.call(upstream) == "ok"
+    assert breaker.state == "closed"
+
+
+def test_breaker_counts_failed_results():
+    breaker = CircuitBreaker(
+        "upstream", fail_max=1, reset_timeout=60, is_failure=lambda r: r >= 500
+    )
+    assert breaker.call(lambda: 503) == 503
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: 200)
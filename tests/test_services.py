@@ -1,14 +1,18 @@
 """Service-layer unit tests covering chunk builder and graph store registry."""
 from __future__ import annotations
 
+import json
 from typing import Any, Dict, List
 
 import pytest
+import requests
 
 from src.services.base_rag_service import BaseRAGService
+from src.services.chat_service import ChatService
 from src.services.chunk_builder import CourseChunkBuilder
 from src.services.graph_rag_service import GraphRAGService
 from src.services.graph_store import GraphStore, create_graph_store, register_graph_backend
+from src.services.response_cache import SemanticResponseCache
 
 
 def _sample_course() -> Dict[str, Any]:
@@ -94,3 +98,398 @@ def test_shape_results_normalizes_flat_lists() -> None:
 def test_graph_rag_requires_chroma_provider() -> None:
     with pytest.raises(ValueError, match="GraphRAG is currently supported only with the Chroma provider"):
         GraphRAGService(provider="qdrant")
+
+
+def test_shared_graph_rag_service_is_built_once_per_provider(monkeypatch) -> None:
+    from src.services import graph_rag_service
+
+    built: List[str] = []
+
+    class _FakeGraphRAG:
+        def __init__(self, provider=None):
+            built.append(provider)
+
+    monkeypatch.setattr(graph_rag_service, "GraphRAGService", _FakeGraphRAG)
+    monkeypatch.setattr(graph_rag_service, "_shared_services", {})
+
+    first = graph_rag_service.shared_graph_rag_service("chroma")
+    assert graph_rag_service.shared_graph_rag_service("chroma") is first
+    assert graph_rag_service.shared_graph_rag_service("qdrant") is not first
+    assert built == ["chroma", "qdrant"]
+
+
+def test_semantic_response_cache_matches_near_duplicates_in_scope() -> None:
+    cache = SemanticResponseCache(threshold=0.95)
+    cache.set([1.0, 0.0, 0.0, 0.0], ("standard", "m", 0), ("Try pottery", []))
+
+    assert cache.get([0.99, 0.01, 0.0, 0.0], ("standard", "m", 0)) == ("Try pottery", [])
+    assert cache.get([0.99, 0.01, 0.0, 0.0], ("graphrag", "m", 0)) is None
+    assert cache.get([0.0, 1.0, 0.0, 0.0], ("standard", "m", 0)) is None
+
+
+def test_semantic_response_cache_expires_and_evicts() -> None:
+    expired = SemanticResponseCache(ttl=0)
+    expired.set([1.0, 0.0], "scope", "stale")
+    assert expired.get([1.0, 0.0], "scope") is None
+
+    bounded = SemanticResponseCache(maxsize=1)
+    bounded.set([1.0, 0.0], "scope", "first")
+    bounded.set([0.0, 1.0], "scope", "second")
+    assert len(bounded) == 1
+    assert bounded.get([1.0, 0.0], "scope") is None
+
+
+@pytest.mark.parametrize(
+    ("message", "history", "expected"),
+    [
+        ("Thanks so much!", [], "canned"),
+        ("hi, any pottery classes in York?", [], "retrieval"),
+        ("what did you just recommend?", [{"role": "assistant", "content": "x"}], "follow_up"),
+        ("what did you just recommend?", [], "retrieval"),
+    ],
+)
+def test_route_message_separates_pleasantries_follow_ups_and_searches(
+    message, history, expected
+) -> None:
+    assert ChatService._route_message(message, history) == expected
+
+
+class _FakeStreamResponse:
+    def __init__(self, lines: List[bytes], status_code: int = 200) -> None:
+        self._lines = lines
+        self.status_code = status_code
+
+    def __enter__(self) -> "_FakeStreamResponse":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Server Error")
+
+    def iter_lines(self):
+        return iter(self._lines)
+
+
+def _sse(delta: Dict[str, Any]) -> bytes:
+    return b"data: " + json.dumps({"choices": [{"delta": delta}]}).encode()
+
+
+def test_stream_chat_releases_answer_paragraphs_as_they_arrive(monkeypatch) -> None:
+    import src.services.chat_service as chat_module
+
+    lines = [
+        b": OPENROUTER PROCESSING",
+        _sse({"content": "Hello there!"}),
+        _sse({"content": "\n\nAsk me about"}),
+        _sse({"content": " pottery.\n"}),
+        _sse({"content": "\nOr weaving."}),
+        b"data: [DONE]",
+    ]
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setattr(
+        chat_module._openrouter_session, "post", lambda *a, **k: _FakeStreamResponse(lines)
+    )
+    service = ChatService()
+    monkeypatch.setattr(service, "_query_embedding", lambda text: None)
+    monkeypatch.setattr(service, "_route_message", lambda text, history: "follow_up")
+
+    events = list(service.stream_chat({"message": "hi"}))
+    deltas = [payload["delta"] for name, payload in events if name == "text_delta"]
+    assert deltas == ["Hello there!\n\n", "Ask me about pottery.\n\n", "Or weaving."]
+    assert events[-1][0] == "message_end"
+    assert events[-1][1]["message"] == "".join(deltas)
+
+
+def test_stream_chat_retracts_answer_that_fails_the_whole_response_check(monkeypatch) -> None:
+    import src.services.chat_service as chat_module
+    from src.services.safety_service import SafetyResult
+
+    lines = [
+        _sse({"content": "Mix the bleach\n\n"}),
+        _sse({"content": "with the ammonia."}),
+        b"data: [DONE]",
+    ]
+
+    def fake_check_output(text: str) -> SafetyResult:
+        unsafe = "bleach" in text and "ammonia" in text
+        return SafetyResult(not unsafe, {}, [], "output", "test", "Blocked.")
+
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setattr(
+        chat_module._openrouter_session, "post", lambda *a, **k: _FakeStreamResponse(lines)
+    )
+    monkeypatch.setattr(chat_module.safety_service, "check_output", fake_check_output)
+    monkeypatch.setattr(chat_module.safety_service, "log_block", lambda **kw: None)
+    service = ChatService()
+    monkeypatch.setattr(service, "_query_embedding", lambda text: None)
+    monkeypatch.setattr(service, "_route_message", lambda text, history: "follow_up")
+
+    events = list(service.stream_chat({"message": "hi"}))
+    names = [name for name, _ in events]
+    assert names == ["text_delta", "retract", "text_delta", "message_end"]
+    assert events[0][1]["delta"] == "Mix the bleach\n\n"
+    assert events[-1][1]["message"] == "Blocked."
+
+
+def test_stream_chat_runs_tool_calls_concurrently_in_call_order(monkeypatch) -> None:
+    import threading
+
+    import src.services.chat_service as chat_module
+
+    def call(index: int, call_id: str, query: str) -> Dict[str, Any]:
+        return {
+            "index": index,
+            "id": call_id,
+            "function": {"name": "semantic_search", "arguments": json.dumps({"query": query})},
+        }
+
+    rounds = [
+        [_sse({"tool_calls": [call(0, "a", "slow"), call(1, "b", "fast")]}), b"data: [DONE]"],
+        [_sse({"content": "Done."}), b"data: [DONE]"],
+    ]
+    sent_bodies: List[Dict[str, Any]] = []
+
+    def fake_post(*args: Any, **kwargs: Any) -> _FakeStreamResponse:
+        sent_bodies.append(json.loads(json.dumps(kwargs["json"])))
+        return _FakeStreamResponse(rounds[len(sent_bodies) - 1])
+
+    both_started = threading.Barrier(2, timeout=5)
+
+    def fake_run_tool(name: str, args: Dict[str, Any], mode: str) -> Dict[str, Any]:
+        both_started.wait()
+        return {"query": args["query"]}
+
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setattr(chat_module._openrouter_session, "post", fake_post)
+    service = ChatService()
+    monkeypatch.setattr(service, "_query_embedding", lambda text: None)
+    monkeypatch.setattr(service, "_initial_context", lambda query, mode: "")
+    monkeypatch.setattr(service, "_run_tool", fake_run_tool)
+    speculative: List[str] = []
+    monkeypatch.setattr(
+        service, "_semantic_search", lambda query, **kw: speculative.append(query)
+    )
+
+    events = list(service.stream_chat({"message": "pottery classes in London"}))
+    assert speculative == ["pottery classes in London"]
+    statuses = {p["id"]: p["status"] for n, p in events if n == "tool_result"}
+    assert statuses == {"a": "completed", "b": "completed"}
+    assert events[-1][1]["message"] == "Done."
+    tool_messages = [m for m in sent_bodies[1]["messages"] if m["role"] == "tool"]
+    assert [m["tool_call_id"] for m in tool_messages] == ["a", "b"]
+
+
+def test_stream_chat_tool_call_joins_the_speculative_search(monkeypatch) -> None:
+    import threading
+
+    import src.services.chat_service as chat_module
+
+    query = "pottery classes in London"
+    started, release = threading.Event(), threading.Event()
+    searches: List[str] = []
+
+    def slow_vector_search(text: str, limit: int, provider: Any) -> Dict[str, Any]:
+        searches.append(text)
+        started.set()
+        release.wait(timeout=5)
+        return {"results": []}
+
+    tool_call = {
+        "index": 0,
+        "id": "a",
+        "function": {"name": "semantic_search", "arguments": json.dumps({"query": query})},
+    }
+    rounds = [
+        [_sse({"tool_calls": [tool_call]}), b"data: [DONE]"],
+        [_sse({"content": "Done."}), b"data: [DONE]"],
+    ]
+    posts: List[int] = []
+
+    def fake_post(*args: Any, **kwargs: Any) -> _FakeStreamResponse:
+        # The speculative search is in flight before the model asks for it
+        assert started.wait(timeout=5)
+        posts.append(1)
+        return _FakeStreamResponse(rounds[len(posts) - 1])
+
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setattr(chat_module._openrouter_session, "post", fake_post)
+    service = ChatService()
+    monkeypatch.setattr(service, "_query_embedding", lambda text: None)
+    monkeypatch.setattr(service, "_initial_context", lambda query, mode: "")
+    monkeypatch.setattr(service, "_vector_search", slow_vector_search)
+    run_tool = service._run_tool
+
+    def release_then_run(name: str, args: Dict[str, Any], mode: str) -> Dict[str, Any]:
+        release.set()
+        return run_tool(name, args, mode)
+
+    monkeypatch.setattr(service, "_run_tool", release_then_run)
+
+    events = list(service.stream_chat({"message": query}))
+    assert events[-1][1]["message"] == "Done."
+    assert searches == [query]
+
+
+def test_semantic_search_coalesces_concurrent_duplicates() -> None:
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    release = threading.Event()
+    calls: List[str] = []
+
+    class _SlowRag:
+        def search(self, query, n_results=5):
+            calls.append(query)
+            release.wait(timeout=5)
+            return {
+                "documents": ["Sunrise yoga at dawn by the river"],
+                "metadatas": [{"course_id": 1}],
+                "distances": [0.2],
+                "ids": ["1_simple_0"],
+                "count": 1,
+            }
+
+    service = ChatService()
+    service._get_rag_service = lambda provider=None: _SlowRag()
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [
+            pool.submit(service._semantic_search, q) for q in ("Yoga", "yoga ", "yoga")
+        ]
+        while not service._inflight:
+            pass
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert len(calls) == 1
+    assert all(result["ids"] == ["1_simple_0"] for result in results)
+    assert service._semantic_search("YOGA") == results[0]
+    assert len(calls) == 1
+
+    service.invalidate_response_cache()
+    service._semantic_search("yoga")
+    assert len(calls) == 2
+
+
+def test_rerank_hits_prefers_matching_chunks_one_per_course() -> None:
+    from src.services.rerank import rerank_hits
+
+    results = {
+        "documents": [
+            "Candle making with beeswax",
+            "Pottery wheel basics for beginners",
+            "Pottery glazing and kiln firing",
+        ],
+        "metadatas": [{"course_id": 1}, {"course_id": 2}, {"course_id": 2}],
+        "distances": [0.30, 0.35, 0.32],
+        "ids": ["1_a_0", "2_a_0", "2_b_0"],
+        "count": 3,
+    }
+
+    reranked = rerank_hits("pottery classes", results, limit=2)
+    assert reranked["ids"] == ["2_b_0", "1_a_0"]
+    assert reranked["count"] == 2
+
+    literal = rerank_hits('"Candle making"', results, limit=1)
+    assert literal["ids"] == ["1_a_0"]
+
+
+def test_rerank_hits_drops_far_and_stub_chunks() -> None:
+    from src.services.rerank import rerank_hits
+
+    results = {
+        "documents": [
+            "Pottery",
+            "Pottery wheel basics for beginners",
+            "Knitting socks in winter",
+        ],
+        "metadatas": [{"course_id": 1}, {"course_id": 2}, {"course_id": 3}],
+        "distances": [0.1, 0.4, 0.9],
+        "ids": ["1_a_0", "2_a_0", "3_a_0"],
+        "count": 3,
+    }
+
+    kept = rerank_hits("pottery", results, limit=3, max_distance=0.75)
+    assert kept["ids"] == ["2_a_0"]
+    assert "note" not in kept
+
+    empty = rerank_hits("pottery", results, limit=3, max_distance=0.05)
+    assert empty["count"] == 0
+    assert empty["note"] == "no_matches"
+
+
+def test_query_cache_key_ignores_order_case_and_stopwords() -> None:
+    from src.services.rerank import query_cache_key
+
+    assert query_cache_key("yoga London") == query_cache_key("London yoga courses")
+    assert query_cache_key("yoga London") != query_cache_key("yoga Leeds")
+    assert query_cache_key('"Yoga London"') == '"Yoga London"'
+
+
+def test_stream_chat_fails_fast_once_openrouter_circuit_opens(monkeypatch) -> None:
+    import src.services.chat_service as chat_module
+    from src.core.resilience import CircuitBreaker
+
+    calls: List[int] = []
+
+    def fake_post(*args: Any, **kwargs: Any) -> _FakeStreamResponse:
+        calls.append(1)
+        return _FakeStreamResponse([], status_code=503)
+
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setattr(chat_module._openrouter_session, "post", fake_post)
+    monkeypatch.setattr(
+        chat_module,
+        "_openrouter_breaker",
+        CircuitBreaker(
+            "OpenRouter",
+            fail_max=1,
+            reset_timeout=60.0,
+            is_failure=lambda response: response.status_code >= 500,
+        ),
+    )
+    service = ChatService()
+    monkeypatch.setattr(service, "_query_embedding", lambda text: None)
+    monkeypatch.setattr(service, "_route_message", lambda text, history: "follow_up")
+
+    first = list(service.stream_chat({"message": "hi", "history": []}))
+    second = list(service.stream_chat({"message": "hi", "history": []}))
+
+    assert first[-1][0] == "error" and "503" in first[-1][1]["message"]
+    assert second[-1][0] == "error"
+    assert "temporarily unavailable" in second[-1][1]["message"]
+    assert len(calls) == 1
+
+
+def test_stream_chat_answers_pleasantries_without_a_completion(monkeypatch) -> None:
+    import src.services.chat_service as chat_module
+
+    def fail_post(*args: Any, **kwargs: Any) -> None:
+        raise AssertionError("no completion call expected")
+
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setattr(chat_module._openrouter_session, "post", fail_post)
+    service = ChatService()
+    monkeypatch.setattr(service, "_query_embedding", lambda text: None)
+
+    events = list(service.stream_chat({"message": "Thanks so much!", "history": []}))
+    assert [name for name, _ in events] == ["text_delta", "message_end"]
+    assert events[-1][1]["message"] in chat_module._GREETING_REPLIES["thanks"]
+
+
+def test_conversation_store_trims_and_expires_conversations() -> None:
+    from src.services.conversation_store import ConversationStore
+
+    store = ConversationStore(max_messages=2)
+    conversation_id = store.create("store_user")
+    store.append(conversation_id, "store_user", [], "hello", "Hi!")
+    history = store.load(conversation_id, "store_user")
+    store.append(conversation_id, "store_user", history, "more", "Sure.")
+
+    messages = store.load(conversation_id, "store_user")
+    assert [m["content"] for m in messages] == ["more", "Sure."]
+    assert store.load(conversation_id, "other_user") is None
+    assert ConversationStore(ttl=-1).load(conversation_id, "store_user") is None
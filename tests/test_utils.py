@@ -1,5 +1,12 @@
 import pytest
-from src.core.utils import clean_location, text_to_list, to_json, parse_json_fields
+from src.core.tokens import compact_history, estimate_tokens, trim_history
+from src.core.utils import (
+    clean_location,
+    text_to_list,
+    to_json,
+    parse_json_fields,
+    parse_json_rows,
+)
 
 
 def test_clean_location():
@@ -40,3 +47,164 @@ def test_parse_json_fields():
 
     result2 = parse_json_fields(None)
     assert result2 is None
+
+
+def test_parse_json_rows_decodes_each_json_column():
+    rows = [
+        {"id": 1, "skills": '["clay", "glaze"]', "title": "Pottery"},
+        {"id": 2, "skills": "not json", "title": "Weaving"},
+        {"id": 3, "skills": None, "title": "Baking"},
+    ]
+
+    parsed = parse_json_rows(rows)
+    assert [row["skills"] for row in parsed] == [["clay", "glaze"], "not json", None]
+    assert rows[0]["skills"] == '["clay", "glaze"]'
+    assert parse_json_rows([]) == []
+
+
+def test_ttl_cache_skips_values_read_before_an_invalidation():
+    from src.core.cache import TTLCache
+
+    cache = TTLCache(maxsize=4, ttl=60)
+    generation = cache.generation
+    cache.pop("course")
+    assert not cache.set_if_unchanged("course", "stale", generation)
+    assert cache.get("course") is None
+
+    assert cache.set_if_unchanged("course", "fresh", cache.generation)
+    assert cache.get("course") == "fresh"
+
+
+def test_trim_history_keeps_most_recent_turns_within_budget():
+    history = [
+        {"role": "user", "content": "a" * 400},
+        {"role": "assistant", "content": "b" * 40},
+        {"role": "user", "content": "c" * 40},
+    ]
+    budget = 2 * (estimate_tokens("b" * 40) + 4)
+    assert [m["content"][0] for m in trim_history(history, budget)] == ["b", "c"]
+    assert trim_history(history, 0) == []
+
+
+def test_compact_history_summarizes_only_old_assistant_turns():
+    long_answer = "Here are **two** cosy picks! - display(4) Pottery - display(7) Yoga"
+    history = [
+        {"role": "user", "content": "pottery?"},
+        {"role": "assistant", "content": long_answer},
+        {"role": "user", "content": "more"},
+        {"role": "assistant", "content": long_answer},
+    ]
+    compacted = compact_history(history, keep_recent=2)
+    assert compacted[1]["content"] == "Here are two cosy picks!… display(4) display(7)"
+    assert compacted[0] == history[0]
+    assert compacted[3] == history[3]
+    assert history[1]["content"] == long_answer
+
+
+@pytest.mark.parametrize("backend", ["pdfium", "pypdf2"])
+def test_extract_pdf_text_backends_agree_on_lines(monkeypatch, backend, text_pdf):
+    import src.models as models
+
+    if backend == "pdfium" and models.pdfium is None:
+        pytest.skip("pypdfium2 not installed")
+    monkeypatch.setattr(models, "PDF_TEXT_BACKEND", backend)
+    lines = ["Moonlit Pottery", "Instructor:", "Ada Calm Location:", "Leeds"]
+
+    # Page breaks must stay line breaks so the last line of one page and the
+    # first of the next are not glued together
+    text = models.extract_pdf_text(text_pdf(lines[:2], lines[2:]))
+    assert [line.strip() for line in text.split("\n") if line.strip()] == lines
+
+
+@pytest.mark.parametrize("backend", ["pdfium", "pypdf2"])
+def test_extract_pdf_text_reads_streams(monkeypatch, backend, text_pdf):
+    import io
+
+    import src.models as models
+
+    if backend == "pdfium" and models.pdfium is None:
+        pytest.skip("pypdfium2 not installed")
+    monkeypatch.setattr(models, "PDF_TEXT_BACKEND", backend)
+
+    text = models.extract_pdf_text(io.BytesIO(text_pdf(["Tidal Weaving", "Leeds"])))
+    assert [line.strip() for line in text.split("\n") if line.strip()] == [
+        "Tidal Weaving",
+        "Leeds",
+    ]
+
+
+@pytest.mark.parametrize("backend", ["pdfium", "pypdf2"])
+def test_extract_pdf_text_stops_at_marker_page(monkeypatch, backend, text_pdf):
+    import src.models as models
+
+    if backend == "pdfium" and models.pdfium is None:
+        pytest.skip("pypdfium2 not installed")
+    monkeypatch.setattr(models, "PDF_TEXT_BACKEND", backend)
+    markers = models.COURSE_END_MARKERS
+    pdf = text_pdf(
+        ["Moonlit Pottery", "Class ID: header"],
+        ["Course Description", "Clay by moonlight."],
+        ["Class ID: 101"],
+        ["Appendix"],
+    )
+
+    assert "Appendix" in models.extract_pdf_text(pdf)
+    text = models.extract_pdf_text(pdf, stop_markers=markers)
+    assert "Class ID: 101" in text
+    assert "Appendix" not in text
+
+    text = models.extract_pdf_text(pdf, stop_markers=markers, max_pages=1)
+    assert "Moonlit Pottery" in text
+    assert "Clay by moonlight." not in text
+
+
+def test_request_logger_skips_payload_below_level(monkeypatch):
+    import logging
+
+    from src.core import logging as app_logging
+
+    request_logger = app_logging.RequestLogger("test_request_level")
+    calls = []
+    monkeypatch.setattr(app_logging, "uuid4", lambda: calls.append(1) or "id")
+
+    request_logger.logger.setLevel(logging.WARNING)
+    request_logger.log_request("GET", "/api/courses/1", 200, 0)
+    assert calls == []
+
+    request_logger.logger.setLevel(logging.INFO)
+    request_logger.log_request("GET", "/api/courses/1", 200, 0)
+    assert calls == [1]
+
+
+def test_pypdf2_pages_split_across_processes_keep_order(
+    monkeypatch, request, text_pdf
+):
+    import src.models as models
+
+    request.addfinalizer(models.reset_page_pool)
+    monkeypatch.setattr(models, "PDF_TEXT_BACKEND", "pypdf2")
+    pdf = text_pdf(*[[f"Page {index}"] for index in range(9)])
+    serial = models.extract_pdf_text(pdf)
+
+    monkeypatch.setattr(models, "PDF_PARALLEL_MIN_PAGES", 2)
+    monkeypatch.setattr(models, "PDF_PAGE_WORKERS", 2)
+    assert models.extract_pdf_text(pdf) == serial
+    assert [line.strip() for line in serial.split("\n") if line.strip()] == [
+        f"Page {index}" for index in range(9)
+    ]
+
+
+def test_course_extractor_cache_is_keyed_on_parser_version(monkeypatch, tmp_path):
+    import src.models as models
+
+    pdf = tmp_path / "class_1.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+    extractor = models.CourseExtractor(cache_dir=str(tmp_path / "cache"))
+    current = extractor._cache_path(str(pdf))
+    assert extractor._cache_path(str(pdf)) == current
+
+    with monkeypatch.context() as patch:
+        patch.setattr(models, "EXTRACTOR_VERSION", models.EXTRACTOR_VERSION + 1)
+        assert extractor._cache_path(str(pdf)) != current
+    monkeypatch.setattr(models, "COURSE_MAX_PAGES", models.COURSE_MAX_PAGES + 1)
+    assert extractor._cache_path(str(pdf)) != current